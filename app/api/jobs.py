@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app import crud, schemas
+from app.pagination import decode_cursor, next_cursor
+from typing import Optional
+
+router = APIRouter()
+
+@router.get("/", response_model=list[schemas.ImportJobResponse])
+def list_jobs(
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    kind: str = "",
+    status: str = "",
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Import / delete-all history, newest first; follow X-Next-Cursor for older runs."""
+    before_id = None
+    if cursor:
+        try:
+            before_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(400, "Invalid cursor")
+    rows = crud.get_import_jobs(db, limit, kind or None, status or None, before_id=before_id)
+    nxt = next_cursor(rows, limit)
+    if nxt:
+        response.headers["X-Next-Cursor"] = nxt
+    return rows
+
+@router.get("/{job_ref}", response_model=schemas.ImportJobResponse)
+def get_job(job_ref: str, db: Session = Depends(get_db)):
+    """A job by its id or by the task_id its upload / delete request returned."""
+    job = crud.get_import_job(db, job_ref)
+    if not job:
+        raise HTTPException(404, "Job not found")
+    return job
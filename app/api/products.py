@@ -1,29 +1,102 @@
-from fastapi import APIRouter, Depends, HTTPException
+import os
+import json
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from pydantic import TypeAdapter, ValidationError
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.tasks.celery_app import celery
 from app.database import get_db
 from app import crud, schemas
-from app.models import Product
+from app.pagination import decode_cursor, next_cursor
+from app.services import cancellation, export, product_counts
+from app.services.product_cache import product_cache
 from typing import Optional
 
 router = APIRouter()
 
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "10000"))
+
+
+async def _read_items(request: Request, model) -> list:
+    """Parse a bulk body: a JSON array, or NDJSON (one object per line) for application/x-ndjson."""
+    body = await request.body()
+    try:
+        if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+            raw = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            raw = json.loads(body or b"[]")
+        items = TypeAdapter(list[model]).validate_python(raw)
+    except json.JSONDecodeError as exc:
+        raise HTTPException(400, f"Invalid JSON: {exc}")
+    except ValidationError as exc:
+        raise HTTPException(422, exc.errors(include_url=False, include_context=False))
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(413, f"At most {BULK_MAX_ITEMS} items per request")
+    return items
+
 @router.get("/", response_model=list[schemas.ProductResponse])
 def list_products(
+    response: Response,
     page: int = 1,
     per_page: int = 20,
     search: str = "",
     active: Optional[bool] = None,
+    include_archived: bool = False,
+    cursor: Optional[str] = None,
+    count: bool = False,
     db: Session = Depends(get_db)
 ):
+    # `cursor` (from a previous X-Next-Cursor header) takes precedence over `page`;
+    # `count=true` adds X-Total-Count / X-Total-Count-Exact for the same filters
+    before_id = None
+    if cursor:
+        try:
+            before_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(400, "Invalid cursor")
     if page < 1:
         page = 1
     skip = (page - 1) * per_page
-    return crud.get_products(db, skip=skip, limit=per_page, search=search, active=active)
+    rows = crud.get_products(
+        db, skip=skip, limit=per_page, search=search, active=active, before_id=before_id, include_archived=include_archived
+    )
+    nxt = next_cursor(rows, per_page)
+    if nxt:
+        response.headers["X-Next-Cursor"] = nxt
+    if count:
+        product_counts.set_headers(response, crud.count_products(db, search=search, active=active, include_archived=include_archived))
+    return rows
+
+@router.get("/export")
+def export_products(format: str = "csv", search: str = "", active: Optional[bool] = None):
+    if format == "csv":
+        body, media_type = export.iter_csv(search, active), "text/csv"
+    elif format == "ndjson":
+        body, media_type = export.iter_ndjson(search, active), "application/x-ndjson"
+    else:
+        raise HTTPException(400, "format must be 'csv' or 'ndjson'")
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="products.{format}"'},
+    )
+
+@router.get("/cache/stats")
+def product_cache_stats():
+    return product_cache.stats()
+
+@router.get("/sku/{sku}", response_model=schemas.ProductResponse)
+def get_product_by_sku(sku: str, db: Session = Depends(get_db)):
+    prod = crud.get_by_sku_cached(db, sku)
+    if not prod:
+        raise HTTPException(404, "Product not found")
+    return prod
 
 @router.get("/{product_id}", response_model=schemas.ProductResponse)
 def get_product(product_id: int, db: Session = Depends(get_db)):
-    prod = db.query(Product).filter(Product.id == product_id).first()
+    prod = crud.get_product_cached(db, product_id)
     if not prod:
         raise HTTPException(404, "Product not found")
     return prod
@@ -33,6 +106,22 @@ def get_product(product_id: int, db: Session = Depends(get_db)):
 def create_product(product: schemas.ProductCreate, db: Session = Depends(get_db)):
     return crud.create_product(db, product)
 
+@router.post("/bulk", response_model=schemas.BulkResult)
+async def bulk_upsert_products(request: Request, db: Session = Depends(get_db)):
+    items = await _read_items(request, schemas.ProductCreate)
+    return await run_in_threadpool(crud.bulk_upsert_products, db, items)
+
+@router.patch("/bulk", response_model=schemas.BulkResult)
+async def bulk_update_products(request: Request, db: Session = Depends(get_db)):
+    items = await _read_items(request, schemas.ProductBulkUpdate)
+    return await run_in_threadpool(crud.bulk_update_products, db, items)
+
+@router.post("/bulk/delete", response_model=schemas.BulkResult)
+def bulk_delete_products(data: schemas.ProductBulkDelete, db: Session = Depends(get_db)):
+    if len(data.ids) + len(data.skus) > BULK_MAX_ITEMS:
+        raise HTTPException(413, f"At most {BULK_MAX_ITEMS} items per request")
+    return crud.bulk_delete_products(db, data.ids, data.skus)
+
 @router.put("/{product_id}", response_model=schemas.ProductResponse)
 def update_product(product_id: int, data: schemas.ProductUpdate, db: Session = Depends(get_db)):
     updated = crud.update_product(db, product_id, data)
@@ -40,11 +129,44 @@ def update_product(product_id: int, data: schemas.ProductUpdate, db: Session = D
         raise HTTPException(404, "Product not found")
     return updated
 
+DELETE_STRATEGIES = ("auto", "truncate", "batched")
+
+
 @router.delete("/delete-all")
-def delete_all_products():
-    task = celery.send_task("app.tasks.delete_task.delete_all_products")
+def delete_all_products(strategy: Optional[str] = None, batch_size: Optional[int] = None):
+    """strategy=truncate is near-instant when nothing references products; batched reports progress and can be cancelled."""
+    if strategy is not None and strategy not in DELETE_STRATEGIES:
+        raise HTTPException(400, f"strategy must be one of {', '.join(DELETE_STRATEGIES)}")
+    if batch_size is not None and batch_size < 1:
+        raise HTTPException(400, "batch_size must be positive")
+    task = celery.send_task(
+        "app.tasks.delete_task.delete_all_products", kwargs={"strategy": strategy, "batch_size": batch_size}
+    )
+    return {"task_id": task.id}
+
+@router.post("/compact")
+def compact_products(older_than: Optional[int] = None, batch_size: Optional[int] = None):
+    """Purge archived products now instead of waiting for the scheduled run; older_than is in seconds."""
+    if older_than is not None and older_than < 0:
+        raise HTTPException(400, "older_than must not be negative")
+    if batch_size is not None and batch_size < 1:
+        raise HTTPException(400, "batch_size must be positive")
+    task = celery.send_task(
+        "app.tasks.compact_task.purge_archived", kwargs={"older_than": older_than, "batch_size": batch_size}
+    )
     return {"task_id": task.id}
 
+@router.post("/delete-all/{task_id}/cancel")
+def cancel_delete_all(task_id: str):
+    """Stop a batched delete-all (or a compaction) after its current batch; rows already deleted stay deleted."""
+    if not cancellation.request_cancel(task_id):
+        raise HTTPException(503, "Could not reach Redis to cancel the task")
+    try:
+        celery.control.revoke(task_id)  # in case it has not started yet
+    except Exception:
+        pass  # the Redis flag alone stops a running task
+    return {"task_id": task_id, "cancelling": True}
+
 @router.delete("/{product_id}")
 def delete_product(product_id: int, db: Session = Depends(get_db)):
     deleted = crud.delete_product(db, product_id)
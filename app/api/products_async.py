@@ -0,0 +1,60 @@
+"""
+Async versions of the product read routes, mounted ahead of app.api.products when DB_ASYNC=1 so
+listing and lookups run on the event loop instead of the threadpool. Writes stay synchronous.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app import crud_async, schemas
+from app.pagination import decode_cursor, next_cursor
+from app.services import product_counts
+from typing import Optional
+
+router = APIRouter()
+
+@router.get("/", response_model=list[schemas.ProductResponse])
+async def list_products(
+    response: Response,
+    page: int = 1,
+    per_page: int = 20,
+    search: str = "",
+    active: Optional[bool] = None,
+    include_archived: bool = False,
+    cursor: Optional[str] = None,
+    count: bool = False,
+    db: AsyncSession = Depends(get_async_db)
+):
+    before_id = None
+    if cursor:
+        try:
+            before_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(400, "Invalid cursor")
+    if page < 1:
+        page = 1
+    skip = (page - 1) * per_page
+    rows = await crud_async.get_products(
+        db, skip=skip, limit=per_page, search=search, active=active, before_id=before_id, include_archived=include_archived
+    )
+    nxt = next_cursor(rows, per_page)
+    if nxt:
+        response.headers["X-Next-Cursor"] = nxt
+    if count:
+        total = await crud_async.count_products(db, search=search, active=active, include_archived=include_archived)
+        product_counts.set_headers(response, total)
+    return rows
+
+@router.get("/sku/{sku}", response_model=schemas.ProductResponse)
+async def get_product_by_sku(sku: str, db: AsyncSession = Depends(get_async_db)):
+    prod = await crud_async.get_by_sku_cached(db, sku)
+    if not prod:
+        raise HTTPException(404, "Product not found")
+    return prod
+
+# `:int` so non-numeric paths such as /export fall through to the sync router
+@router.get("/{product_id:int}", response_model=schemas.ProductResponse)
+async def get_product(product_id: int, db: AsyncSession = Depends(get_async_db)):
+    prod = await crud_async.get_product_cached(db, product_id)
+    if not prod:
+        raise HTTPException(404, "Product not found")
+    return prod
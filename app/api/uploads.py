@@ -1,23 +1,147 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+import os
+import re
+import json
+import asyncio
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request
+from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional
 from celery.result import AsyncResult
 from app.tasks.celery_app import celery
-from app.services.storage import save_csv
+from app.services import fingerprints, progress, row_validation
+from app.services.formats import STREAMABLE, StreamDecompressor, upload_format
+from app.services.storage import UploadValidator, remove_upload, save_csv
+from app.services.stream_upload import copy_stream, save_stream
 
 router = APIRouter()
 
+
+def _deduplicated(path: str, sha256: str) -> Optional[dict]:
+    """Response for a byte-identical re-upload whose earlier import still reflects the catalog."""
+    previous = fingerprints.lookup(sha256)
+    if previous is None:
+        return None
+    remove_upload(path)
+    return {**previous, "sha256": sha256, "deduplicated": True}
+
+
+def _check_mode(mirror: bool, delta: bool):
+    if mirror and delta:
+        # a delta file leaves out unchanged products, which mirror mode would archive
+        raise HTTPException(status_code=400, detail="mirror and delta cannot be combined")
+
+
 @router.post("/", status_code=200)
-async def upload_csv(file: UploadFile = File(...)):
-    if not file.filename.lower().endswith(".csv"):
-        raise HTTPException(status_code=400, detail="Only CSV files allowed")
+async def upload_csv(
+    file: UploadFile = File(...),
+    chunk_rows: Optional[int] = None,
+    shards: Optional[int] = None,
+    force: bool = False,
+    mirror: bool = False,
+    delta: bool = False,
+):
+    """
+    mirror=true archives every product whose SKU is missing from the file (see PRODUCT_DELETE_MODE).
+    delta=true takes a file of changed rows only: each product it changes gets a webhook event and
+    is listed in the result's changed_skus.
+    """
+    _check_mode(mirror, delta)
+    fmt = upload_format(file.filename)
+    if fmt is None:
+        raise HTTPException(status_code=400, detail="Only .csv, .csv.gz, .csv.zst, .parquet or .arrow files allowed")
+    if shards:
+        from app.tasks.shard_import_task import MAX_SHARDS
 
-    path = save_csv(file)
+        if shards > MAX_SHARDS:
+            raise HTTPException(status_code=400, detail=f"shards must be at most {MAX_SHARDS}")
 
-    task = celery.send_task("app.tasks.import_task.import_csv_task", args=[path])
+    path, sha256 = await run_in_threadpool(save_csv, file)
 
-    return {"task_id": task.id}
+    # the same file again with no catalog writes since its import: hand back that task instead
+    # (not for mirror uploads: the earlier import may not have archived anything)
+    if not force and not mirror:
+        previous = await run_in_threadpool(_deduplicated, path, sha256)
+        if previous is not None:
+            return previous
+
+    if shards and shards > 1 and fmt == "csv":
+        # split by byte ranges and fan out over the worker pool (plain CSV only; byte ranges of
+        # compressed or columnar files are meaningless, so those import in a single pass)
+        task = celery.send_task(
+            "app.tasks.shard_import_task.import_csv_parallel",
+            args=[path],
+            kwargs={"shards": shards, "sha256": sha256, "mirror": mirror, "delta": delta},
+        )
+        return {"task_id": task.id, "sha256": sha256}
+
+    # chunk_rows > 0 selects the batched, resumable import; None uses the worker's IMPORT_CHUNK_ROWS
+    task = celery.send_task(
+        "app.tasks.import_task.import_csv_task",
+        args=[path],
+        kwargs={"chunk_rows": chunk_rows, "sha256": sha256, "mirror": mirror, "delta": delta},
+    )
+
+    return {"task_id": task.id, "sha256": sha256}
+
+@router.post("/stream", status_code=200)
+async def upload_stream(
+    request: Request,
+    filename: str = "upload.csv",
+    stage: bool = True,
+    chunk_rows: Optional[int] = None,
+    force: bool = False,
+    mirror: bool = False,
+    delta: bool = False,
+):
+    """
+    Raw CSV request body (not multipart), validated and hashed as it arrives.
+    stage=true writes it to the uploads volume for import_csv_task; stage=false COPYs it
+    straight into the staging table and only the upsert runs on a worker. Only staged
+    uploads are deduplicated, since by the time the hash is known a COPY has already run.
+    .csv.gz and .csv.zst bodies are decompressed as they arrive.
+    """
+    fmt = upload_format(filename)
+    if fmt not in STREAMABLE:
+        raise HTTPException(status_code=400, detail="Only .csv, .csv.gz or .csv.zst bodies can be streamed")
+    _check_mode(mirror, delta)
 
-@router.get("/status/{task_id}")
-def get_status(task_id: str):
+    try:
+        validator = UploadValidator(decompressor=StreamDecompressor(fmt) if fmt != "csv" else None)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    try:
+        if stage:
+            path = await save_stream(request.stream(), filename, validator)
+            if not force and not mirror:
+                previous = await run_in_threadpool(_deduplicated, path, validator.hexdigest())
+                if previous is not None:
+                    return {**previous, "bytes": validator.size}
+            task = celery.send_task(
+                "app.tasks.import_task.import_csv_task",
+                args=[path],
+                kwargs={"chunk_rows": chunk_rows, "sha256": validator.hexdigest(), "mirror": mirror, "delta": delta},
+            )
+        else:
+            job_id, rows = await copy_stream(request.stream(), validator)
+            task = celery.send_task(
+                "app.tasks.shard_import_task.merge_import_shards",
+                args=[[{"rows": rows}], os.path.basename(filename), job_id],
+                kwargs={"sha256": validator.hexdigest(), "mirror": mirror, "delta": delta},
+            )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    return {"task_id": task.id, "sha256": validator.hexdigest(), "bytes": validator.size}
+
+@router.get("/rejects/{report_id}")
+def download_rejects(report_id: str):
+    """CSV of the rows an import rejected (line, reason, record); linked as rejects_url in its result."""
+    path = row_validation.report_path(report_id)
+    if not re.fullmatch(r"[0-9a-f]{1,64}", report_id) or not path.exists():
+        raise HTTPException(status_code=404, detail="No rejects report with that id")
+    return FileResponse(path, media_type="text/csv", filename=f"rejects-{report_id}.csv")
+
+def _read_status(task_id: str) -> dict:
     try:
         res = AsyncResult(task_id, app=celery)
     except Exception as e:
@@ -29,4 +153,33 @@ def get_status(task_id: str):
     except Exception as e:
         return {"task_id": task_id, "status": "UNKNOWN", "detail": "Unable to read result from backend", "error": str(e)}
 
-    return {"task_id": task_id, "status": status, "result": result}
\ No newline at end of file
+    return progress.status_payload(task_id, status, result)
+
+@router.get("/status/{task_id}")
+def get_status(task_id: str):
+    return _read_status(task_id)
+
+@router.get("/status/{task_id}/events")
+async def status_events(task_id: str):
+    """
+    Server-Sent Events: the current status, then every update the task publishes, ending
+    after a terminal state. Each event's data has the same shape as GET /status/{task_id}.
+    """
+    async def events():
+        q = progress.hub.listen(task_id)  # subscribe before reading, so no update falls in between
+        try:
+            status = await run_in_threadpool(_read_status, task_id)
+            while True:
+                yield f"data: {json.dumps(status, default=str)}\n\n"
+                if status["status"] in progress.TERMINAL_STATES:
+                    return
+                try:
+                    status = await asyncio.wait_for(q.get(), progress.PROGRESS_RECHECK_SECONDS)
+                except asyncio.TimeoutError:
+                    status = await run_in_threadpool(_read_status, task_id)
+        finally:
+            progress.hub.unlisten(task_id, q)
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
\ No newline at end of file
@@ -1,9 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app import crud, schemas
+from app.pagination import decode_cursor, next_cursor
+from typing import Optional
+import json
 import time
-import requests
+import httpx
+from app.services.delivery import SIGNATURE_HEADER, CircuitOpenError, get_delivery_engine, sign_payload
+from app.services.subscriptions import registry
 
 router = APIRouter()
 
@@ -12,8 +18,29 @@ def create_webhook(webhook: schemas.WebhookCreate, db: Session = Depends(get_db)
     return crud.create_webhook(db, webhook)
 
 @router.get("/", response_model=list[schemas.WebhookResponse])
-def list_webhooks(skip: int = 0, limit: int = 100, event: str = "", db: Session = Depends(get_db)):
-    return crud.get_webhooks(db, skip, limit, event or None)
+def list_webhooks(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    event: str = "",
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    before_id = None
+    if cursor:
+        try:
+            before_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(400, "Invalid cursor")
+    rows = crud.get_webhooks(db, skip, limit, event or None, before_id=before_id)
+    nxt = next_cursor(rows, limit)
+    if nxt:
+        response.headers["X-Next-Cursor"] = nxt
+    return rows
+
+@router.get("/subscriptions/stats")
+def subscription_stats():
+    return registry.stats()
 
 @router.get("/{webhook_id}", response_model=schemas.WebhookResponse)
 def get_webhook(webhook_id: int, db: Session = Depends(get_db)):
@@ -37,19 +64,26 @@ def delete_webhook(webhook_id: int, db: Session = Depends(get_db)):
     return {"message": "Deleted"}
 
 @router.post("/{webhook_id}/test")
-def test_webhook(webhook_id: int, payload: dict = {}, db: Session = Depends(get_db)):
-    wh = crud.get_webhook(db, webhook_id)
+async def test_webhook(webhook_id: int, payload: dict = {}, db: Session = Depends(get_db)):
+    wh = await run_in_threadpool(crud.get_webhook, db, webhook_id)
     if not wh:
         raise HTTPException(404, "Webhook not found")
 
     if not wh.enabled:
         raise HTTPException(400, "Webhook is disabled")
 
+    body = json.dumps(payload or {"test": True, "event": wh.event}, separators=(",", ":")).encode()
+    headers = {"Content-Type": "application/json"}
+    if wh.secret:
+        headers[SIGNATURE_HEADER] = sign_payload(wh.secret, body)
+
     start = time.time()
     try:
-        r = requests.post(wh.url, json=payload or {"test": True, "event": wh.event}, timeout=10)
+        r = await get_delivery_engine().apost(wh.url, body, headers=headers, timeout=10)
         duration = time.time() - start
         return {"status_code": r.status_code, "elapsed": duration, "text": r.text[:200]}
-    except requests.RequestException as exc:
+    except CircuitOpenError:
+        raise HTTPException(status_code=503, detail="Circuit open for this endpoint; too many recent failures")
+    except httpx.HTTPError as exc:
         duration = time.time() - start
-        raise HTTPException(status_code=502, detail=f"Request failed: {str(exc)} (elapsed {duration:.2f}s)")
\ No newline at end of file
+        raise HTTPException(status_code=502, detail=f"Request failed: {str(exc)} (elapsed {duration:.2f}s)")
@@ -0,0 +1,37 @@
+"""Async versions of the webhook read routes, mounted ahead of app.api.webhooks when DB_ASYNC=1."""
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app import crud_async, schemas
+from app.pagination import decode_cursor, next_cursor
+from typing import Optional
+
+router = APIRouter()
+
+@router.get("/", response_model=list[schemas.WebhookResponse])
+async def list_webhooks(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    event: str = "",
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    before_id = None
+    if cursor:
+        try:
+            before_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(400, "Invalid cursor")
+    rows = await crud_async.get_webhooks(db, skip, limit, event or None, before_id=before_id)
+    nxt = next_cursor(rows, limit)
+    if nxt:
+        response.headers["X-Next-Cursor"] = nxt
+    return rows
+
+@router.get("/{webhook_id:int}", response_model=schemas.WebhookResponse)
+async def get_webhook(webhook_id: int, db: AsyncSession = Depends(get_async_db)):
+    wh = await crud_async.get_webhook(db, webhook_id)
+    if not wh:
+        raise HTTPException(404, "Webhook not found")
+    return wh
@@ -1,39 +1,132 @@
+import os
+from collections import Counter
 from typing import Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import case, func, text, update, delete
 from sqlalchemy import or_
+from sqlalchemy.dialects import postgresql, sqlite
 from app import models, schemas
+from app.services import events, fingerprints, product_counts
+from app.services.subscriptions import registry
+from app.services.product_cache import product_cache
 
-def get_products(db: Session, skip: int = 0, limit: int = 20, search: str = "", active: bool | None = None):
+# "archive" turns product deletes into soft deletes (active = false, archived_at set); the
+# compaction task purges archived rows later, and re-creating or re-importing a SKU revives it
+PRODUCT_DELETE_MODE = os.getenv("PRODUCT_DELETE_MODE", "hard")
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_filter(search: str):
+    """
+    Substring match on sku/name/description.
+
+    On Postgres each ILIKE is served by the ix_products_*_trgm GIN indexes (terms of 3+ chars)
+    and the planner combines them with a BitmapOr; on SQLite it is a plain LIKE scan.
+    """
+    wildcard = f"%{_escape_like(search)}%"
+    return or_(
+        models.Product.sku.ilike(wildcard, escape="\\"),
+        models.Product.name.ilike(wildcard, escape="\\"),
+        models.Product.description.ilike(wildcard, escape="\\"),
+    )
+
+
+def get_products(
+    db: Session,
+    skip: int = 0,
+    limit: int = 20,
+    search: str = "",
+    active: bool | None = None,
+    before_id: Optional[int] = None,
+    include_archived: bool = False,
+):
     query = db.query(models.Product)
 
+    if not include_archived:
+        query = query.filter(models.Product.archived_at.is_(None))
+
+    # keyset mode: walk ix_products_id from the cursor instead of discarding `skip` rows
+    if before_id is not None:
+        query = query.filter(models.Product.id < before_id)
+        skip = 0
+
     if search:
-        wildcard = f"%{search.lower()}%"
-        query = query.filter(
-            or_(
-                models.Product.sku.ilike(wildcard),
-                models.Product.name.ilike(wildcard),
-                models.Product.description.ilike(wildcard)
-            )
-        )
+        query = query.filter(search_filter(search))
 
     if active is not None:
         query = query.filter(models.Product.active == active)
 
     return query.order_by(models.Product.id.desc()).offset(skip).limit(limit).all()
 
-def get_by_sku_ci(db: Session, sku: str):
-    return db.query(models.Product).filter(func.lower(models.Product.sku) == sku.lower()).first()
+def count_products(db: Session, search: str = "", active: bool | None = None, include_archived: bool = False) -> dict:
+    """
+    {"count", "exact"} for the get_products filters, cached until the next catalog write.
+    A large unfiltered total on PostgreSQL is estimated from pg_class instead of counted.
+    """
+    def load():
+        if not search and active is None and db.get_bind().dialect.name == "postgresql":
+            estimate = db.execute(text(product_counts.ESTIMATE_SQL)).scalar()
+            if estimate is not None and estimate >= product_counts.COUNT_ESTIMATE_MIN_ROWS:
+                if not include_archived:
+                    # archived rows are few and ix_products_archived_at covers exactly them
+                    estimate -= db.query(func.count(models.Product.id)).filter(models.Product.archived_at.isnot(None)).scalar()
+                return {"count": max(0, int(estimate)), "exact": False}
+
+        query = db.query(func.count(models.Product.id))
+        if not include_archived:
+            query = query.filter(models.Product.archived_at.is_(None))
+        if search:
+            query = query.filter(search_filter(search))
+        if active is not None:
+            query = query.filter(models.Product.active == active)
+        return {"count": query.scalar(), "exact": True}
+
+    return product_counts.get_or_count(search, active, include_archived, load)
+
+def get_by_sku_ci(db: Session, sku: str, include_archived: bool = False):
+    query = db.query(models.Product).filter(func.lower(models.Product.sku) == sku.lower())
+    if not include_archived:
+        query = query.filter(models.Product.archived_at.is_(None))
+    return query.first()
+
+
+def get_product(db: Session, product_id: int, include_archived: bool = False):
+    # archived products are deleted as far as lookups go; only revive / purge paths see them
+    query = db.query(models.Product).filter(models.Product.id == product_id)
+    if not include_archived:
+        query = query.filter(models.Product.archived_at.is_(None))
+    return query.first()
+
+
+def _as_dict(product: Optional[models.Product]) -> Optional[dict]:
+    # JSON-safe (archived_at as a string) so the Redis cache tier can store it as-is
+    return schemas.ProductResponse.model_validate(product).model_dump(mode="json") if product else None
+
+
+def get_product_cached(db: Session, product_id: int) -> Optional[dict]:
+    return product_cache.get_or_load(f"id:{product_id}", lambda: _as_dict(get_product(db, product_id)))
+
+
+def get_by_sku_cached(db: Session, sku: str) -> Optional[dict]:
+    return product_cache.get_or_load(f"sku:{sku.lower()}", lambda: _as_dict(get_by_sku_ci(db, sku)))
 
 
 def create_product(db: Session, product: schemas.ProductCreate):
-    existing = get_by_sku_ci(db, product.sku)
+    existing = get_by_sku_ci(db, product.sku, include_archived=True)
     if existing:
         existing.name = product.name
         existing.description = product.description
+        if existing.archived_at is not None:
+            existing.archived_at = None
+            existing.active = True
         db.add(existing)
+        events.emit(db, events.PRODUCT_UPDATED, events.product_data(existing))
         db.commit()
         db.refresh(existing)
+        product_cache.invalidate(existing.id, existing.sku)
+        fingerprints.note_write()
         return existing
 
     db_product = models.Product(
@@ -42,13 +135,17 @@ def create_product(db: Session, product: schemas.ProductCreate):
         description=product.description
     )
     db.add(db_product)
+    db.flush()
+    events.emit(db, events.PRODUCT_CREATED, events.product_data(db_product))
     db.commit()
     db.refresh(db_product)
+    product_cache.invalidate(db_product.id, db_product.sku)
+    fingerprints.note_write()
     return db_product
 
 
 def update_product(db: Session, product_id: int, data: schemas.ProductUpdate):
-    product = db.query(models.Product).filter(models.Product.id == product_id).first()
+    product = get_product(db, product_id)
 
     if not product:
         return None
@@ -60,22 +157,198 @@ def update_product(db: Session, product_id: int, data: schemas.ProductUpdate):
     if hasattr(data, "active") and data.active is not None:
         product.active = data.active
 
+    events.emit(db, events.PRODUCT_UPDATED, events.product_data(product))
     db.commit()
     db.refresh(product)
+    product_cache.invalidate(product.id, product.sku)
+    fingerprints.note_write()
     return product
 
 
 
 def delete_product(db: Session, product_id: int):
-    product = db.query(models.Product).filter(models.Product.id == product_id).first()
+    # in archive mode an archived product is already deleted (not found); hard mode purges it
+    product = get_product(db, product_id, include_archived=PRODUCT_DELETE_MODE != "archive")
     if not product:
         return None
 
-    db.delete(product)
+    events.emit(db, events.PRODUCT_DELETED, {"id": product.id, "sku": product.sku})
+    if PRODUCT_DELETE_MODE == "archive":
+        product.active = False
+        product.archived_at = func.now()
+    else:
+        db.delete(product)
     db.commit()
+    product_cache.invalidate(product.id, product.sku)
+    fingerprints.note_write()
     return product
 
 
+def _bulk_result(items: list[dict]) -> dict:
+    return {"counts": dict(Counter(i["status"] for i in items)), "items": items}
+
+
+def bulk_upsert_products(db: Session, items: list[schemas.ProductCreate]) -> dict:
+    """
+    Create-or-update many products in one transaction with the same case-insensitive SKU
+    semantics as create_product. One SELECT finds the existing rows; new and changed rows then go
+    through a single INSERT ... ON CONFLICT (lower(sku)) on ix_products_sku_lower. Within the
+    payload the last occurrence of a SKU wins and earlier ones are reported as "duplicate".
+    """
+    latest: dict[str, int] = {}
+    for idx, item in enumerate(items):
+        latest[item.sku.lower()] = idx
+
+    existing = {
+        p.sku.lower(): p
+        for p in db.query(models.Product).filter(func.lower(models.Product.sku).in_(list(latest)))
+    }
+
+    results = [{"index": idx, "sku": item.sku, "status": "duplicate"} for idx, item in enumerate(items)]
+    rows = []
+    for key, idx in latest.items():
+        item = items[idx]
+        current = existing.get(key)
+        if current is not None:
+            results[idx]["id"] = current.id
+            same = (current.sku, current.name, current.description) == (item.sku, item.name, item.description)
+            if same and current.archived_at is None:
+                results[idx]["status"] = "unchanged"
+                continue
+        results[idx]["status"] = "updated" if current is not None else "created"
+        rows.append({"sku": item.sku, "name": item.name, "description": item.description})
+
+    if rows:
+        insert = postgresql.insert if db.bind.dialect.name == "postgresql" else sqlite.insert
+        # Core inserts bypass the mapper events, so the content hash is set explicitly
+        stmt = insert(models.Product).values([
+            {**row, "content_hash": models.product_content_hash(row["sku"], row["name"], row["description"])}
+            for row in rows
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[func.lower(models.Product.sku)],
+            set_={
+                "sku": stmt.excluded.sku,
+                "name": stmt.excluded.name,
+                "description": stmt.excluded.description,
+                "content_hash": stmt.excluded.content_hash,
+                # revive archived rows in place instead of leaving them to be purged
+                "active": case((models.Product.archived_at.isnot(None), True), else_=models.Product.active),
+                "archived_at": None,
+                "version": func.coalesce(models.Product.version, 0) + 1,
+                "updated_at": func.now(),
+            },
+        ).returning(models.Product.id, models.Product.sku, models.Product.active)
+        written = {sku.lower(): (pid, active) for pid, sku, active in db.execute(stmt)}
+
+        for row in rows:
+            key = row["sku"].lower()
+            result = results[latest[key]]
+            result["id"], active = written[key]
+            event = events.PRODUCT_CREATED if result["status"] == "created" else events.PRODUCT_UPDATED
+            events.emit(db, event, {"id": result["id"], **row, "active": active})
+
+    db.commit()
+    for row in rows:
+        product_cache.invalidate(results[latest[row["sku"].lower()]]["id"], row["sku"])
+    if rows:
+        fingerprints.note_write()
+    return _bulk_result(results)
+
+
+def bulk_update_products(db: Session, items: list[schemas.ProductBulkUpdate]) -> dict:
+    """Partial updates addressed by id or SKU: one SELECT to resolve them, one executemany UPDATE."""
+    ids = [i.id for i in items if i.id is not None]
+    skus = [i.sku.lower() for i in items if i.sku is not None]
+    # archived products are not_found here, as they are for a single PUT
+    found = db.query(models.Product).filter(
+        or_(models.Product.id.in_(ids), func.lower(models.Product.sku).in_(skus)),
+        models.Product.archived_at.is_(None),
+    ).all()
+    by_id = {p.id: p for p in found}
+    by_sku = {p.sku.lower(): p for p in found}
+
+    results = []
+    params: dict[int, dict] = {}
+    for idx, item in enumerate(items):
+        product = by_id.get(item.id) if item.id is not None else by_sku.get(item.sku.lower())
+        if product is None:
+            results.append({"index": idx, "id": item.id, "sku": item.sku, "status": "not_found"})
+            continue
+        changes = item.model_dump(include={"name", "description", "active"}, exclude_none=True)
+        params.setdefault(product.id, {"id": product.id}).update(changes)
+        results.append({"index": idx, "id": product.id, "sku": product.sku, "status": "updated"})
+
+    # ORM bulk UPDATE by primary key; rows with the same set of columns share one executemany
+    to_update = [p for p in params.values() if len(p) > 1]
+    for p in to_update:
+        if "name" in p or "description" in p:
+            product = by_id[p["id"]]
+            p["content_hash"] = models.product_content_hash(
+                product.sku, p.get("name", product.name), p.get("description", product.description)
+            )
+    if to_update:
+        db.execute(update(models.Product), to_update)
+        # the executemany above takes plain values only, so the version bump is one more statement
+        db.execute(
+            update(models.Product)
+            .where(models.Product.id.in_([p["id"] for p in to_update]))
+            .values(version=func.coalesce(models.Product.version, 0) + 1, updated_at=func.now()),
+            execution_options={"synchronize_session": False},
+        )
+        for p in to_update:
+            changes = {k: v for k, v in p.items() if k != "content_hash"}
+            events.emit(db, events.PRODUCT_UPDATED, {**events.product_data(by_id[p["id"]]), **changes})
+
+    db.commit()
+    for p in found:
+        product_cache.invalidate(p.id, p.sku)
+    if to_update:
+        fingerprints.note_write()
+    return _bulk_result(results)
+
+
+def bulk_delete_products(db: Session, ids: list[int], skus: list[str]) -> dict:
+    query = db.query(models.Product.id, models.Product.sku).filter(
+        or_(models.Product.id.in_(ids), func.lower(models.Product.sku).in_([s.lower() for s in skus]))
+    )
+    if PRODUCT_DELETE_MODE == "archive":
+        query = query.filter(models.Product.archived_at.is_(None))
+    found = query.all()
+    by_id = {pid: sku for pid, sku in found}
+    by_sku = {sku.lower(): pid for pid, sku in found}
+
+    results = []
+    for pid in ids:
+        results.append({"index": len(results), "id": pid, "sku": by_id.get(pid), "status": "deleted" if pid in by_id else "not_found"})
+    for sku in skus:
+        pid = by_sku.get(sku.lower())
+        results.append({"index": len(results), "id": pid, "sku": sku, "status": "deleted" if pid is not None else "not_found"})
+
+    if by_id and PRODUCT_DELETE_MODE == "archive":
+        db.execute(
+            update(models.Product).where(models.Product.id.in_(list(by_id))).values(
+                active=False,
+                archived_at=func.now(),
+                version=func.coalesce(models.Product.version, 0) + 1,
+                updated_at=func.now(),
+            ),
+            execution_options={"synchronize_session": False},
+        )
+    elif by_id:
+        db.execute(delete(models.Product).where(models.Product.id.in_(list(by_id))), execution_options={"synchronize_session": False})
+    if by_id:
+        for pid, sku in by_id.items():
+            events.emit(db, events.PRODUCT_DELETED, {"id": pid, "sku": sku})
+
+    db.commit()
+    for pid, sku in by_id.items():
+        product_cache.invalidate(pid, sku)
+    if by_id:
+        fingerprints.note_write()
+    return _bulk_result(results)
+
+
 def create_webhook(db: Session, webhook_in: schemas.WebhookCreate) -> models.Webhook:
     db_wh = models.Webhook(
         name=webhook_in.name,
@@ -88,10 +361,14 @@ def create_webhook(db: Session, webhook_in: schemas.WebhookCreate) -> models.Web
     db.add(db_wh)
     db.commit()
     db.refresh(db_wh)
+    registry.invalidate()
     return db_wh
 
-def get_webhooks(db: Session, skip: int = 0, limit: int = 100, event: Optional[str] = None):
+def get_webhooks(db: Session, skip: int = 0, limit: int = 100, event: Optional[str] = None, before_id: Optional[int] = None):
     q = db.query(models.Webhook)
+    if before_id is not None:
+        q = q.filter(models.Webhook.id < before_id)
+        skip = 0
     if event:
         q = q.filter(models.Webhook.event == event)
     return q.order_by(models.Webhook.id.desc()).offset(skip).limit(limit).all()
@@ -117,6 +394,7 @@ def update_webhook(db: Session, webhook_id: int, data: schemas.WebhookUpdate):
         wh.description = data.description
     db.commit()
     db.refresh(wh)
+    registry.invalidate()
     return wh
 
 def delete_webhook(db: Session, webhook_id: int):
@@ -125,4 +403,21 @@ def delete_webhook(db: Session, webhook_id: int):
         return None
     db.delete(wh)
     db.commit()
-    return wh
\ No newline at end of file
+    registry.invalidate()
+    return wh
+def get_import_jobs(db: Session, limit: int = 50, kind: Optional[str] = None, status: Optional[str] = None, before_id: Optional[int] = None):
+    q = db.query(models.ImportJob)
+    if before_id is not None:
+        q = q.filter(models.ImportJob.id < before_id)
+    if kind:
+        q = q.filter(models.ImportJob.kind == kind)
+    if status:
+        q = q.filter(models.ImportJob.status == status)
+    return q.order_by(models.ImportJob.id.desc()).limit(limit).all()
+
+def get_import_job(db: Session, job_ref: str) -> Optional[models.ImportJob]:
+    """By row id or by Celery task id (the task_id an upload returned)."""
+    q = db.query(models.ImportJob)
+    if job_ref.isdigit():
+        return q.filter(models.ImportJob.id == int(job_ref)).first()
+    return q.filter(models.ImportJob.task_id == job_ref).first()
@@ -0,0 +1,108 @@
+"""Async (AsyncSession) variants of the read paths in crud, used when DB_ASYNC=1."""
+from typing import Optional
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import models, schemas
+from app.crud import search_filter
+from app.services import product_counts
+from app.services.product_cache import product_cache
+
+
+async def get_products(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 20,
+    search: str = "",
+    active: bool | None = None,
+    before_id: Optional[int] = None,
+    include_archived: bool = False,
+):
+    stmt = select(models.Product)
+
+    if not include_archived:
+        stmt = stmt.where(models.Product.archived_at.is_(None))
+
+    if before_id is not None:
+        stmt = stmt.where(models.Product.id < before_id)
+        skip = 0
+
+    if search:
+        stmt = stmt.where(search_filter(search))
+
+    if active is not None:
+        stmt = stmt.where(models.Product.active == active)
+
+    result = await db.execute(stmt.order_by(models.Product.id.desc()).offset(skip).limit(limit))
+    return result.scalars().all()
+
+
+async def count_products(
+    db: AsyncSession, search: str = "", active: bool | None = None, include_archived: bool = False
+) -> dict:
+    async def load():
+        if not search and active is None and db.bind.dialect.name == "postgresql":
+            estimate = (await db.execute(text(product_counts.ESTIMATE_SQL))).scalar()
+            if estimate is not None and estimate >= product_counts.COUNT_ESTIMATE_MIN_ROWS:
+                if not include_archived:
+                    archived = select(func.count(models.Product.id)).where(models.Product.archived_at.isnot(None))
+                    estimate -= (await db.execute(archived)).scalar()
+                return {"count": max(0, int(estimate)), "exact": False}
+
+        stmt = select(func.count(models.Product.id))
+        if not include_archived:
+            stmt = stmt.where(models.Product.archived_at.is_(None))
+        if search:
+            stmt = stmt.where(search_filter(search))
+        if active is not None:
+            stmt = stmt.where(models.Product.active == active)
+        return {"count": (await db.execute(stmt)).scalar(), "exact": True}
+
+    return await product_counts.aget_or_count(search, active, include_archived, load)
+
+
+async def get_product(db: AsyncSession, product_id: int):
+    result = await db.execute(
+        select(models.Product).where(models.Product.id == product_id, models.Product.archived_at.is_(None))
+    )
+    return result.scalars().first()
+
+
+async def get_by_sku_ci(db: AsyncSession, sku: str):
+    result = await db.execute(
+        select(models.Product)
+        .where(func.lower(models.Product.sku) == sku.lower(), models.Product.archived_at.is_(None))
+        .limit(1)
+    )
+    return result.scalars().first()
+
+
+def _as_dict(product: Optional[models.Product]) -> Optional[dict]:
+    # JSON-safe (archived_at as a string) so the Redis cache tier can store it as-is
+    return schemas.ProductResponse.model_validate(product).model_dump(mode="json") if product else None
+
+
+async def get_product_cached(db: AsyncSession, product_id: int) -> Optional[dict]:
+    async def load():
+        return _as_dict(await get_product(db, product_id))
+    return await product_cache.aget_or_load(f"id:{product_id}", load)
+
+
+async def get_by_sku_cached(db: AsyncSession, sku: str) -> Optional[dict]:
+    async def load():
+        return _as_dict(await get_by_sku_ci(db, sku))
+    return await product_cache.aget_or_load(f"sku:{sku.lower()}", load)
+
+
+async def get_webhooks(db: AsyncSession, skip: int = 0, limit: int = 100, event: Optional[str] = None, before_id: Optional[int] = None):
+    stmt = select(models.Webhook)
+    if before_id is not None:
+        stmt = stmt.where(models.Webhook.id < before_id)
+        skip = 0
+    if event:
+        stmt = stmt.where(models.Webhook.event == event)
+    result = await db.execute(stmt.order_by(models.Webhook.id.desc()).offset(skip).limit(limit))
+    return result.scalars().all()
+
+
+async def get_webhook(db: AsyncSession, webhook_id: int) -> Optional[models.Webhook]:
+    return await db.get(models.Webhook, webhook_id)
@@ -2,16 +2,21 @@
 import os
 import time
 import logging
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from sqlalchemy.exc import OperationalError
+from fastapi.responses import FileResponse, PlainTextResponse
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlalchemy.schema import CreateIndex
 
 from app.api.products import router as products_router
 from app.api.uploads import router as uploads_router
 from app.api.webhooks import router as webhooks_router
-from app.database import Base, engine
+from app.api.jobs import router as jobs_router
+from app.database import Base, engine, DB_ASYNC, async_engine
+from app.services.delivery import get_delivery_engine
+from app.services.metrics import metrics
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -23,17 +28,98 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "X-Total-Count-Exact"],
 )
 
+def route_template(request: Request) -> str:
+    # label by route template, not raw path, to keep the series count bounded
+    if "route" not in request.scope:
+        return "other"  # 404s and mounted apps such as /static
+    segments = request.url.path.split("/")
+    names = {str(v): k for k, v in request.scope.get("path_params", {}).items()}
+    return "/".join(f"{{{names[s]}}}" if s in names else s for s in segments)
+
+
+if metrics.enabled:
+    @app.middleware("http")
+    async def record_request_latency(request: Request, call_next):
+        t0 = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            metrics.observe(
+                "http_request_duration_seconds",
+                time.perf_counter() - t0,
+                method=request.method,
+                route=route_template(request),
+                status=status,
+            )
+
+
+    @app.get("/metrics", include_in_schema=False)
+    def prometheus_metrics():
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 static_dir = os.path.join(os.path.dirname(__file__), "static")
 if os.path.isdir(static_dir):
     app.mount("/static", StaticFiles(directory=static_dir), name="static")
 else:
     logger.warning("Static directory not found at %s", static_dir)
 
+if DB_ASYNC:
+    # registered first so their GET routes take precedence over the sync ones
+    from app.api.products_async import router as products_async_router
+    from app.api.webhooks_async import router as webhooks_async_router
+    app.include_router(products_async_router, prefix="/api/products", tags=["Products"])
+    app.include_router(webhooks_async_router, prefix="/api/webhooks", tags=["Webhooks"])
+
 app.include_router(products_router, prefix="/api/products", tags=["Products"])
 app.include_router(uploads_router, prefix="/api/uploads", tags=["Uploads"])
 app.include_router(webhooks_router, prefix="/api/webhooks", tags=["Webhooks"])
+app.include_router(jobs_router, prefix="/api/jobs", tags=["Jobs"])
+
+
+# Startup migrations wait at most this long for a table lock (e.g. behind a running import) and
+# then give up with a warning, instead of queueing every reader behind them
+SCHEMA_LOCK_TIMEOUT = os.getenv("SCHEMA_LOCK_TIMEOUT", "5s")
+
+
+def ensure_schema():
+    # create_all() skips tables that already exist, so add new nullable columns and indexes.
+    # Only what is actually missing: even a no-op ALTER TABLE takes an ACCESS EXCLUSIVE lock
+    if engine.dialect.name != "postgresql":
+        return
+    ddl = engine.dialect.ddl_compiler(engine.dialect, None)
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("SELECT set_config('lock_timeout', :t, true)"), {"t": SCHEMA_LOCK_TIMEOUT})
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            existing = set(conn.execute(text(
+                "SELECT table_name, column_name FROM information_schema.columns WHERE table_schema = current_schema()"
+            )).all())
+            indexes = set(conn.execute(text(
+                "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema()"
+            )).scalars())
+            for table in Base.metadata.sorted_tables:
+                for column in table.columns:
+                    if not column.nullable or column.primary_key or (table.name, column.name) in existing:
+                        continue
+                    default = ddl.get_column_default_string(column)
+                    logger.info("Adding column %s.%s", table.name, column.name)
+                    conn.execute(text(
+                        f"ALTER TABLE {table.name} ADD COLUMN IF NOT EXISTS {column.name} "
+                        f"{column.type.compile(dialect=engine.dialect)}"
+                        + (f" DEFAULT {default}" if default is not None else "")
+                    ))
+                for index in table.indexes:
+                    if index.name not in indexes:
+                        logger.info("Creating index %s", index.name)
+                        conn.execute(CreateIndex(index, if_not_exists=True))
+    except SQLAlchemyError as e:
+        logger.warning("Could not ensure schema: %s", e)
 
 
 @app.on_event("startup")
@@ -45,6 +131,7 @@ def startup_migrate_and_check_db():
         try:
             logger.info("DB init attempt %s/%s", attempt, retries)
             Base.metadata.create_all(bind=engine)
+            ensure_schema()
             logger.info("DB tables ready")
             break
         except OperationalError as e:
@@ -56,6 +143,13 @@ def startup_migrate_and_check_db():
             delay = min(delay * 1.5, 10.0)
 
 
+@app.on_event("shutdown")
+async def close_delivery_clients():
+    await get_delivery_engine().aclose()
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
 @app.get("/", include_in_schema=False)
 def serve_ui():
     index_path = os.path.join(static_dir, "index.html")
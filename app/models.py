@@ -1,6 +1,13 @@
-from sqlalchemy import Column, String, Integer, Index, func, Boolean, Table, Text
+from sqlalchemy import Column, String, Integer, BigInteger, Index, func, Boolean, Table, Text, DateTime, JSON, DDL, Float, event, inspect
 from sqlalchemy.sql import expression
 from .database import Base
+import hashlib
+
+
+def product_content_hash(sku: str, name: str, description) -> str:
+    """md5 of the imported columns; must match CONTENT_HASH_SQL in app.tasks.import_task."""
+    return hashlib.md5("\x1f".join([sku, name, description or ""]).encode()).hexdigest()
+
 
 class Product(Base):
     __tablename__ = "products"
@@ -10,10 +17,59 @@ class Product(Base):
     name = Column(String, nullable=False)
     description = Column(String)
     active = Column(Boolean, nullable=False, server_default=expression.true())
+    content_hash = Column(String(32), nullable=True)  # product_content_hash(); lets imports skip unchanged rows
+    archived_at = Column(DateTime(timezone=True), nullable=True)  # soft-deleted (inactive) since; purged by compact_task
+    # last change to the row's content or state, and how many changes it has had (rows older than
+    # these columns start at the time they were added, version 1). Bulk / SQL write paths
+    # maintain them explicitly, like content_hash
+    updated_at = Column(DateTime(timezone=True), nullable=True, default=func.now(), server_default=func.now())
+    version = Column(Integer, nullable=True, default=1, server_default="1")
+
+
+@event.listens_for(Product, "before_insert")
+@event.listens_for(Product, "before_update")
+def _set_content_hash(mapper, connection, target):
+    target.content_hash = product_content_hash(target.sku, target.name, target.description)
+
+VERSIONED_COLUMNS = ("sku", "name", "description", "active", "archived_at")
+
+
+@event.listens_for(Product, "before_update")
+def _bump_version(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[c].history.has_changes() for c in VERSIONED_COLUMNS):
+        target.version = (target.version or 0) + 1
+        target.updated_at = func.now()
 
 # Case-insensitive unique index on SKU (Postgres expression index)
 Index("ix_products_sku_lower", func.lower(Product.sku), unique=True)
 
+# Partial indexes: newest-first pages of get_products(active=True) walk only active rows, and
+# the compaction task finds archived rows without scanning the live catalog
+Index("ix_products_active_id", Product.id, postgresql_where=Product.active, sqlite_where=Product.active)
+Index(
+    "ix_products_archived_at",
+    Product.archived_at,
+    postgresql_where=Product.archived_at.isnot(None),
+    sqlite_where=Product.archived_at.isnot(None),
+)
+
+# Trigram GIN indexes backing the ILIKE '%term%' search in crud.get_products (Postgres only).
+# ILIKE can use gin_trgm_ops directly, so the indexes are on the plain columns, not lower().
+event.listen(
+    Product.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+for _col in ("sku", "name", "description"):
+    Index(
+        f"ix_products_{_col}_trgm",
+        getattr(Product, _col),
+        postgresql_using="gin",
+        postgresql_ops={_col: "gin_trgm_ops"},
+    ).ddl_if(dialect="postgresql")
+
 
 class Webhook(Base):
     __tablename__ = "webhooks"
@@ -25,3 +81,64 @@ class Webhook(Base):
     enabled = Column(Boolean, nullable=False, server_default=expression.true())
     secret = Column(String, nullable=True)  # optional HMAC secret for signing payloads
     description = Column(Text, nullable=True)
+
+
+class WebhookEvent(Base):
+    """Transactional outbox: written alongside product changes, drained in batches by dispatch_events."""
+    __tablename__ = "webhook_events"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    event = Column(String, nullable=False)
+    data = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    dispatched_at = Column(DateTime(timezone=True), nullable=True)  # legacy: drained events are deleted now
+
+# Only undispatched events are ever scanned by the dispatcher
+Index(
+    "ix_webhook_events_pending",
+    WebhookEvent.id,
+    postgresql_where=WebhookEvent.dispatched_at.is_(None),
+    sqlite_where=WebhookEvent.dispatched_at.is_(None),
+)
+
+
+class ImportCheckpoint(Base):
+    """Progress of a chunked import, committed together with each batch so a retried task can resume."""
+    __tablename__ = "import_checkpoints"
+
+    id = Column(Integer, primary_key=True)
+    path = Column(String, nullable=False, unique=True)
+    byte_offset = Column(BigInteger, nullable=False, server_default="0")  # first byte not yet imported
+    rows_done = Column(BigInteger, nullable=False, server_default="0")
+    created = Column(BigInteger, nullable=False, server_default="0")
+    updated = Column(BigInteger, nullable=False, server_default="0")
+    unchanged = Column(BigInteger, nullable=False, server_default="0")
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now())
+
+
+class ImportJob(Base):
+    """One import / delete-all run, kept after its Celery result expires (written by app.services.jobs)."""
+    __tablename__ = "import_jobs"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    task_id = Column(String, nullable=False, unique=True)
+    kind = Column(String, nullable=False)  # import, import_parallel, import_stream, delete_all, compact
+    status = Column(String, nullable=False, server_default="running")  # running, success, failure, cancelled
+    file = Column(String, nullable=True)
+    size_bytes = Column(BigInteger, nullable=True)
+    sha256 = Column(String(64), nullable=True)
+    rows = Column(BigInteger, nullable=True)  # rows imported, deleted or purged
+    created = Column(BigInteger, nullable=True)
+    updated = Column(BigInteger, nullable=True)
+    unchanged = Column(BigInteger, nullable=True)
+    rejected = Column(BigInteger, nullable=True)
+    stages = Column(JSON, nullable=True)  # stage -> seconds, summed over batches
+    duration_seconds = Column(Float, nullable=True)
+    rows_per_second = Column(Float, nullable=True)
+    result = Column(JSON, nullable=True)  # the task's return value
+    error = Column(Text, nullable=True)
+    started_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+# History listings are id-descending keyset scans, optionally of one kind
+Index("ix_import_jobs_kind_id", ImportJob.kind, ImportJob.id)
@@ -0,0 +1,26 @@
+import base64
+import json
+
+
+def encode_cursor(last_id: int) -> str:
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Return the id the next page starts below. Raises ValueError on a malformed cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded.encode()))["id"]
+    except Exception as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(last_id, int):
+        raise ValueError("Invalid cursor")
+    return last_id
+
+
+def next_cursor(rows: list, limit: int):
+    # Both listings are ordered by id DESC, so the last row's id is the keyset boundary
+    if not rows or len(rows) < limit:
+        return None
+    return encode_cursor(rows[-1].id)
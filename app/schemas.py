@@ -1,4 +1,5 @@
-from pydantic import BaseModel, HttpUrl
+from datetime import datetime
+from pydantic import BaseModel, HttpUrl, model_validator
 from typing import Optional
 
 class ProductBase(BaseModel):
@@ -17,10 +18,37 @@ class ProductUpdate(BaseModel):
 
 class ProductResponse(ProductBase):
     id: int
+    archived_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    version: Optional[int] = None
 
     class Config:
         from_attributes = True
 
+class ProductBulkUpdate(ProductUpdate):
+    id: Optional[int] = None
+    sku: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_key(self):
+        if (self.id is None) == (self.sku is None):
+            raise ValueError("exactly one of id or sku is required")
+        return self
+
+class ProductBulkDelete(BaseModel):
+    ids: list[int] = []
+    skus: list[str] = []
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    sku: Optional[str] = None
+    status: str  # created | updated | unchanged | duplicate | deleted | not_found
+
+class BulkResult(BaseModel):
+    counts: dict[str, int]
+    items: list[BulkItemResult]
+
 class WebhookBase(BaseModel):
     name: Optional[str] = None
     url: HttpUrl
@@ -45,3 +73,27 @@ class WebhookResponse(WebhookBase):
 
     class Config:
         from_attributes = True
+
+class ImportJobResponse(BaseModel):
+    id: int
+    task_id: str
+    kind: str
+    status: str  # running | success | failure | cancelled
+    file: Optional[str] = None
+    size_bytes: Optional[int] = None
+    sha256: Optional[str] = None
+    rows: Optional[int] = None
+    created: Optional[int] = None
+    updated: Optional[int] = None
+    unchanged: Optional[int] = None
+    rejected: Optional[int] = None
+    stages: Optional[dict[str, float]] = None
+    duration_seconds: Optional[float] = None
+    rows_per_second: Optional[float] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,37 @@
+import logging
+
+from redis.exceptions import RedisError
+
+from app.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Long-running tasks poll this between batches; the flag outlives any realistic run
+CANCEL_TTL = 24 * 3600
+
+
+def _key(task_id: str) -> str:
+    return f"task:cancel:{task_id}"
+
+
+def request_cancel(task_id: str) -> bool:
+    try:
+        get_redis().setex(_key(task_id), CANCEL_TTL, 1)
+        return True
+    except RedisError:
+        logger.warning("Could not flag task %s for cancellation", task_id)
+        return False
+
+
+def is_cancelled(task_id: str) -> bool:
+    try:
+        return bool(get_redis().exists(_key(task_id)))
+    except RedisError:
+        return False
+
+
+def clear(task_id: str):
+    try:
+        get_redis().delete(_key(task_id))
+    except RedisError:
+        pass
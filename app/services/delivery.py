@@ -0,0 +1,255 @@
+import os
+import hmac
+import time
+import hashlib
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Connection pool / concurrency limits shared by every delivery made from this process
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "100"))
+WEBHOOK_MAX_KEEPALIVE = int(os.getenv("WEBHOOK_MAX_KEEPALIVE", "20"))
+WEBHOOK_MAX_CONCURRENCY = int(os.getenv("WEBHOOK_MAX_CONCURRENCY", "32"))
+# Of those, at most this many to one endpoint, so a slow (but not failing) subscriber can't take them all
+WEBHOOK_MAX_PER_ENDPOINT = int(os.getenv("WEBHOOK_MAX_PER_ENDPOINT", "8"))
+WEBHOOK_TIMEOUT = float(os.getenv("WEBHOOK_TIMEOUT", "10"))
+# Circuit breaker: open after N consecutive failures, allow one trial request after the cooldown
+WEBHOOK_BREAKER_FAILURES = int(os.getenv("WEBHOOK_BREAKER_FAILURES", "5"))
+WEBHOOK_BREAKER_COOLDOWN = float(os.getenv("WEBHOOK_BREAKER_COOLDOWN", "30"))
+
+
+SIGNATURE_HEADER = "X-Webhook-Signature"
+
+
+def sign_payload(secret: str, body: bytes) -> str:
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint whose breaker is open; retry_after is the cooldown left."""
+
+    def __init__(self, message: str = "circuit open", retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    def __init__(self, failures: int = WEBHOOK_BREAKER_FAILURES, cooldown: float = WEBHOOK_BREAKER_COOLDOWN):
+        self.max_failures = failures
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker lets a trial request through (0 once it is half-open)."""
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.opened_at + self.cooldown - time.monotonic())
+
+    def before_call(self):
+        with self._lock:
+            state = self.state
+            if state == "open" or (state == "half-open" and self.trial_in_flight):
+                raise CircuitOpenError("circuit open", self.retry_after())
+            if state == "half-open":
+                self.trial_in_flight = True
+
+    def record(self, ok: bool):
+        with self._lock:
+            self.trial_in_flight = False
+            if ok:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.failures >= self.max_failures:
+                self.opened_at = time.monotonic()
+
+
+def endpoint_key(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class DeliveryEngine:
+    """
+    Keep-alive HTTP delivery with bounded concurrency, overall and per endpoint
+    (scheme://host:port), and a circuit breaker per endpoint. The sync client serves Celery
+    workers, the async client the API.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = WEBHOOK_MAX_CONNECTIONS,
+        max_keepalive: int = WEBHOOK_MAX_KEEPALIVE,
+        max_concurrency: int = WEBHOOK_MAX_CONCURRENCY,
+        timeout: float = WEBHOOK_TIMEOUT,
+        max_per_endpoint: int = WEBHOOK_MAX_PER_ENDPOINT,
+    ):
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.max_per_endpoint = max(1, min(max_per_endpoint, max_concurrency))
+        self._client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._async_slots: Optional[asyncio.Semaphore] = None
+        self._endpoint_slots: dict[str, threading.BoundedSemaphore] = {}
+        self._async_endpoint_slots: dict[str, asyncio.Semaphore] = {}
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> httpx.Client:
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(limits=self.limits, timeout=self.timeout)
+            return self._client
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        key = endpoint_key(url)
+        with self._lock:
+            if key not in self._breakers:
+                self._breakers[key] = CircuitBreaker()
+            return self._breakers[key]
+
+    def endpoint_slots(self, url: str) -> threading.BoundedSemaphore:
+        key = endpoint_key(url)
+        with self._lock:
+            if key not in self._endpoint_slots:
+                self._endpoint_slots[key] = threading.BoundedSemaphore(self.max_per_endpoint)
+            return self._endpoint_slots[key]
+
+    def _async_endpoint(self, url: str) -> asyncio.Semaphore:
+        # only touched from the API's event loop, so no lock
+        return self._async_endpoint_slots.setdefault(endpoint_key(url), asyncio.Semaphore(self.max_per_endpoint))
+
+    @staticmethod
+    def is_failure(response: httpx.Response) -> bool:
+        return response.status_code >= 500 or response.status_code == 429
+
+    @staticmethod
+    def _observe(started: float, outcome: str):
+        metrics.observe("webhook_delivery_duration_seconds", time.perf_counter() - started, outcome=outcome)
+
+    def post(self, url: str, content: bytes, headers: Optional[dict] = None, timeout: Optional[float] = None) -> httpx.Response:
+        breaker = self.breaker(url)
+        try:
+            breaker.before_call()
+        except CircuitOpenError:
+            metrics.observe("webhook_delivery_duration_seconds", 0.0, outcome="circuit_open")
+            raise
+        # any exception has to end the call in the breaker, or a half-open trial stays in flight
+        # and the endpoint is refused for good
+        try:
+            # the endpoint's slot first: waiting for a busy endpoint must not hold a global slot
+            with self.endpoint_slots(url), self._slots:
+                started = time.perf_counter()
+                try:
+                    r = self.client.post(url, content=content, headers=headers, timeout=timeout or self.timeout)
+                except Exception as exc:
+                    self._observe(started, type(exc).__name__)
+                    raise
+                self._observe(started, f"{r.status_code // 100}xx")
+        except BaseException:
+            breaker.record(False)
+            raise
+        breaker.record(not self.is_failure(r))
+        return r
+
+    def deliver_many(self, deliveries: list) -> list:
+        """
+        POST each (url, content, headers) concurrently, at most max_concurrency at a time and
+        max_per_endpoint to any one endpoint. Returns a response or the raised exception per
+        delivery, in input order.
+        """
+        results: list = [None] * len(deliveries)
+        by_endpoint: dict[str, list[int]] = {}
+        for i, (url, _, _) in enumerate(deliveries):
+            by_endpoint.setdefault(endpoint_key(url), []).append(i)
+
+        def lane(indexes: list[int]):
+            for i in indexes:
+                url, content, headers = deliveries[i]
+                try:
+                    results[i] = self.post(url, content, headers)
+                except Exception as exc:
+                    results[i] = exc
+
+        # each endpoint's deliveries run as at most max_per_endpoint sequential lanes, so pool
+        # threads never queue up behind one slow endpoint while others have work; lanes are
+        # submitted round-robin across endpoints
+        lanes = [
+            [indexes[k::self.max_per_endpoint] for k in range(min(self.max_per_endpoint, len(indexes)))]
+            for indexes in by_endpoint.values()
+        ]
+        order = [ln[j] for j in range(self.max_per_endpoint) for ln in lanes if j < len(ln)]
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            list(pool.map(lane, order))
+        return results
+
+    async def apost(self, url: str, content: bytes, headers: Optional[dict] = None, timeout: Optional[float] = None) -> httpx.Response:
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+            self._async_slots = asyncio.Semaphore(self.max_concurrency)
+        breaker = self.breaker(url)
+        try:
+            breaker.before_call()
+        except CircuitOpenError:
+            metrics.observe("webhook_delivery_duration_seconds", 0.0, outcome="circuit_open")
+            raise
+        # as in post(), including a CancelledError while waiting for a slot or the response
+        try:
+            async with self._async_endpoint(url), self._async_slots:
+                started = time.perf_counter()
+                try:
+                    r = await self._async_client.post(url, content=content, headers=headers, timeout=timeout or self.timeout)
+                except Exception as exc:
+                    self._observe(started, type(exc).__name__)
+                    raise
+                self._observe(started, f"{r.status_code // 100}xx")
+        except BaseException:
+            breaker.record(False)
+            raise
+        breaker.record(not self.is_failure(r))
+        return r
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+
+_engine: Optional[DeliveryEngine] = None
+
+
+def get_delivery_engine() -> DeliveryEngine:
+    """Per-process engine, so connections are reused across tasks and requests."""
+    global _engine
+    if _engine is None:
+        _engine = DeliveryEngine()
+    return _engine
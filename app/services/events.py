@@ -0,0 +1,30 @@
+import json
+
+from sqlalchemy.orm import Session
+
+from app import models
+
+PRODUCT_CREATED = "product.created"
+PRODUCT_UPDATED = "product.updated"
+PRODUCT_DELETED = "product.deleted"
+IMPORT_COMPLETED = "import.completed"
+
+
+def product_data(product: models.Product) -> dict:
+    return {
+        "id": product.id,
+        "sku": product.sku,
+        "name": product.name,
+        "description": product.description,
+        "active": product.active,
+    }
+
+
+def emit(db: Session, event: str, data: dict):
+    """Queue an event in the outbox; it is committed (or rolled back) with the caller's transaction."""
+    db.add(models.WebhookEvent(event=event, data=data))
+
+
+def emit_raw(cur, event: str, data: dict):
+    """Same as emit() for code running on a raw DB-API cursor (the COPY import)."""
+    cur.execute("INSERT INTO webhook_events (event, data) VALUES (%s, %s)", (event, json.dumps(data)))
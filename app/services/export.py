@@ -0,0 +1,46 @@
+import csv
+import io
+import json
+from typing import Iterator, Optional
+
+from sqlalchemy import select
+
+from app import crud
+from app.database import engine
+from app.models import Product
+
+EXPORT_COLUMNS = ("name", "sku", "description", "active", "id")
+BATCH_ROWS = 5000
+
+
+def _rows(search: str = "", active: Optional[bool] = None) -> Iterator:
+    stmt = select(*(getattr(Product, c) for c in EXPORT_COLUMNS)).where(Product.archived_at.is_(None)).order_by(Product.id)
+    if search:
+        stmt = stmt.where(crud.search_filter(search))
+    if active is not None:
+        stmt = stmt.where(Product.active == active)
+
+    # stream_results uses a server-side (named) cursor on psycopg2, so memory stays at one batch
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=BATCH_ROWS).execute(stmt)
+        for partition in result.partitions():
+            yield partition
+
+
+def iter_csv(search: str = "", active: Optional[bool] = None) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_COLUMNS)
+    # send the header straight away so the client sees bytes before the first batch is fetched
+    yield buf.getvalue()
+
+    for partition in _rows(search, active):
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows(partition)
+        yield buf.getvalue()
+
+
+def iter_ndjson(search: str = "", active: Optional[bool] = None) -> Iterator[str]:
+    for partition in _rows(search, active):
+        yield "".join(json.dumps(dict(zip(EXPORT_COLUMNS, row))) + "\n" for row in partition)
@@ -0,0 +1,61 @@
+import os
+import json
+import logging
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from app.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Bumped by every write to products; a fingerprint is only reused while it is unchanged
+WRITES_KEY = "catalog:writes"
+# How long a finished import's fingerprint can short-circuit a re-upload of the same file (0 disables)
+UPLOAD_DEDUP_TTL = int(os.getenv("UPLOAD_DEDUP_TTL", "86400"))
+
+
+def _key(sha256: str) -> str:
+    return f"upload:fingerprint:{sha256}"
+
+
+def note_write() -> Optional[int]:
+    """Record that the catalog changed, which invalidates every stored fingerprint."""
+    try:
+        return int(get_redis().incr(WRITES_KEY))
+    except RedisError:
+        logger.warning("Fingerprints: could not bump %s", WRITES_KEY)
+        return None
+
+
+def record(sha256: Optional[str], task_id: str, result: dict, writes: Optional[int]):
+    """Remember a finished import of this file, valid until the next write after `writes`."""
+    if not sha256 or writes is None or UPLOAD_DEDUP_TTL <= 0:
+        return
+    value = json.dumps({"task_id": task_id, "result": result, "writes": writes})
+    try:
+        get_redis().setex(_key(sha256), UPLOAD_DEDUP_TTL, value)
+    except RedisError:
+        logger.warning("Fingerprints: could not record %s", sha256)
+
+
+def lookup(sha256: str) -> Optional[dict]:
+    """
+    Return {"task_id", "result"} of an earlier import of identical bytes, provided nothing has
+    written to products since it finished (so re-importing would be a no-op).
+    """
+    if UPLOAD_DEDUP_TTL <= 0:
+        return None
+    try:
+        pipe = get_redis().pipeline()
+        pipe.get(_key(sha256))
+        pipe.get(WRITES_KEY)
+        raw, writes = pipe.execute()
+    except RedisError:
+        return None
+    if raw is None:
+        return None
+    entry = json.loads(raw)
+    if entry["writes"] != int(writes or 0):
+        return None
+    return {"task_id": entry["task_id"], "result": entry["result"]}
@@ -0,0 +1,171 @@
+import io
+import os
+import gzip
+import zlib
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+
+from app.services.storage import EXPECTED_HEADER
+
+# Rows per record batch when converting Parquet / Arrow uploads to CSV for COPY
+COLUMNAR_BATCH_ROWS = int(os.getenv("COLUMNAR_BATCH_ROWS", "65536"))
+
+# Longest suffix first, so "x.csv.gz" is gzip rather than unknown
+FORMATS = {
+    ".csv.gz": "gzip",
+    ".csv.zst": "zstd",
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+}
+# Formats that can be decompressed chunk by chunk as the request body arrives
+STREAMABLE = {"csv", "gzip", "zstd"}
+
+
+def upload_format(filename: str) -> Optional[str]:
+    name = filename.lower()
+    for suffix, fmt in FORMATS.items():
+        if name.endswith(suffix):
+            return fmt
+    return None
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("Reading .csv.zst uploads needs the 'zstandard' package")
+    return zstandard
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.csv
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Reading Parquet / Arrow uploads needs the 'pyarrow' package")
+    return pyarrow
+
+
+class _IterReader(io.RawIOBase):
+    """Read-only file object over an iterator of byte chunks (what copy_expert pulls from)."""
+
+    def __init__(self, chunks: Iterator[bytes], close=None):
+        self._chunks = chunks
+        self._buf = b""
+        self._close = close
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buf:
+            self._buf = next(self._chunks, b"")
+            if not self._buf:
+                return 0
+        n = min(len(b), len(self._buf))
+        b[:n] = self._buf[:n]
+        self._buf = self._buf[n:]
+        return n
+
+    def close(self):
+        if self._close is not None:
+            self._close()
+            self._close = None
+        super().close()
+
+
+def _columnar_csv(path: Path, fmt: str) -> BinaryIO:
+    pa = _pyarrow()
+    if fmt == "parquet":
+        source = pa.parquet.ParquetFile(path)
+        names = source.schema_arrow.names
+        batches = source.iter_batches(batch_size=COLUMNAR_BATCH_ROWS)
+        close = source.close
+    else:
+        source = pa.memory_map(str(path))
+        try:
+            reader = pa.ipc.open_file(source)
+            names = reader.schema.names
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        except pa.ArrowInvalid:
+            source.seek(0)
+            reader = pa.ipc.open_stream(source)
+            names = reader.schema.names
+            batches = iter(reader)
+        close = source.close
+
+    # match columns case-insensitively and emit them in CSV header order
+    by_lower = {n.lower(): n for n in names}
+    missing = [c for c in ("name", "sku") if c not in by_lower]
+    if missing:
+        close()
+        raise ValueError(f"Columnar upload is missing column(s): {', '.join(missing)}")
+
+    def chunks() -> Iterator[bytes]:
+        yield (",".join(EXPECTED_HEADER) + "\n").encode()
+        options = pa.csv.WriteOptions(include_header=False)
+        for batch in batches:
+            if batch.num_rows == 0:
+                continue
+            columns = [
+                batch.column(by_lower[c]).cast(pa.string()) if c in by_lower else pa.nulls(batch.num_rows, pa.string())
+                for c in EXPECTED_HEADER
+            ]
+            out = io.BytesIO()
+            pa.csv.write_csv(pa.RecordBatch.from_arrays(columns, names=EXPECTED_HEADER), out, options)
+            yield out.getvalue()
+
+    return io.BufferedReader(_IterReader(chunks(), close=close), buffer_size=1024 * 1024)
+
+
+def open_csv_source(path, fmt: Optional[str] = None) -> BinaryIO:
+    """
+    Open an upload as a binary stream of CSV bytes (header first), decompressing or converting
+    record batch by record batch, so nothing is inflated to disk and memory stays bounded.
+    """
+    path = Path(path)
+    fmt = fmt or upload_format(path.name) or "csv"
+    if fmt == "csv":
+        return open(path, "rb")
+    if fmt == "gzip":
+        return gzip.open(path, "rb")
+    if fmt == "zstd":
+        return _zstandard().ZstdDecompressor().stream_reader(open(path, "rb"), read_across_frames=True)
+    if fmt in ("parquet", "arrow"):
+        return _columnar_csv(path, fmt)
+    raise ValueError(f"Unsupported upload format: {fmt}")
+
+
+class StreamDecompressor:
+    """Incremental gzip / zstd decoder for request bodies; feed() returns the CSV bytes available so far."""
+
+    def __init__(self, fmt: str):
+        self.fmt = fmt
+        self._new()
+
+    def _new(self):
+        if self.fmt == "gzip":
+            self._obj = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+        else:
+            self._obj = _zstandard().ZstdDecompressor().decompressobj()
+
+    def feed(self, chunk: bytes) -> bytes:
+        out = []
+        try:
+            while chunk:
+                out.append(self._obj.decompress(chunk))
+                # concatenated gzip members / zstd frames each need a fresh decoder
+                chunk = self._obj.unused_data if self._obj.eof else b""
+                if chunk:
+                    self._new()
+        except Exception as exc:
+            raise ValueError(f"Invalid {self.fmt} data: {exc}")
+        return b"".join(out)
+
+    def finish(self):
+        if not self._obj.eof:
+            raise ValueError(f"Truncated {self.fmt} stream")
@@ -0,0 +1,105 @@
+import os
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.database import SessionLocal
+from app.models import ImportJob
+from app.services.metrics import stage_sink
+
+logger = logging.getLogger(__name__)
+
+# Celery task name -> (job kind, index of the file path in its args, if any)
+TRACKED_TASKS = {
+    "app.tasks.import_task.import_csv_task": ("import", 0),
+    "app.tasks.shard_import_task.import_csv_parallel": ("import_parallel", 0),
+    # a chord's merge runs under the parallel task's id, so it finishes that job; on its own it
+    # finishes a streamed upload
+    "app.tasks.shard_import_task.merge_import_shards": ("import_stream", 1),
+    "app.tasks.delete_task.delete_all_products": ("delete_all", None),
+    "app.tasks.compact_task.purge_archived": ("compact", None),
+}
+
+# result key holding the rows a job of each kind processed
+ROWS_KEY = {"delete_all": "deleted", "compact": "purged"}
+
+ERROR_CHARS = 2000
+
+
+def _utc(value: datetime) -> datetime:
+    # SQLite hands DateTime(timezone=True) back naive; everything here is stored in UTC
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def task_started(task_id: str, task_name: str, args, kwargs):
+    """task_prerun: open (or, for a retry / chord merge, reopen) the job's history row."""
+    if task_name not in TRACKED_TASKS:
+        stage_sink.set(None)
+        return
+    stage_sink.set({})
+    kind, path_at = TRACKED_TASKS[task_name]
+    path = args[path_at] if path_at is not None and len(args) > path_at else None
+    db = SessionLocal()
+    try:
+        job = db.query(ImportJob).filter(ImportJob.task_id == task_id).first()
+        if job is None:
+            job = ImportJob(task_id=task_id, kind=kind, started_at=datetime.now(timezone.utc))
+            db.add(job)
+        elif job.stages:
+            # keep what earlier runs under this id measured (shard splitting, batches before a retry)
+            stage_sink.get().update(job.stages)
+        job.status = "running"
+        job.file = job.file or (Path(path).name if path else None)
+        job.sha256 = job.sha256 or kwargs.get("sha256")
+        if path and job.size_bytes is None and os.path.exists(path):
+            job.size_bytes = os.path.getsize(path)
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        logger.exception("Could not record start of job %s", task_id)
+    finally:
+        db.close()
+
+
+def task_finished(task_id: str, task_name: str, state: Optional[str], retval):
+    """task_postrun: record outcome, row counts, stage durations and throughput."""
+    if task_name not in TRACKED_TASKS:
+        return
+    stages = stage_sink.get() or {}
+    stage_sink.set(None)
+    if state not in ("SUCCESS", "FAILURE", "IGNORED"):
+        return  # RETRY: the same task id starts again
+    db = SessionLocal()
+    try:
+        job = db.query(ImportJob).filter(ImportJob.task_id == task_id).first()
+        if job is None:
+            return
+        job.stages = {k: round(v, 3) for k, v in stages.items()} or None
+        if state == "IGNORED":
+            # replaced by a chord: the merge finishes this job
+            db.commit()
+            return
+        now = datetime.now(timezone.utc)
+        job.finished_at = now
+        job.duration_seconds = round((now - _utc(job.started_at)).total_seconds(), 3)
+        if state == "FAILURE":
+            job.status = "failure"
+            job.error = f"{type(retval).__name__}: {retval}"[:ERROR_CHARS]
+        else:
+            result = retval if isinstance(retval, dict) else {}
+            job.status = "cancelled" if result.get("cancelled") else "success"
+            job.result = result or None
+            job.rows = result.get(ROWS_KEY.get(job.kind, "total"))
+            for field in ("created", "updated", "unchanged", "rejected"):
+                setattr(job, field, result.get(field))
+            if job.rows and job.duration_seconds:
+                job.rows_per_second = round(job.rows / job.duration_seconds, 1)
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        logger.exception("Could not record end of job %s", task_id)
+    finally:
+        db.close()
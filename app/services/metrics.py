@@ -0,0 +1,187 @@
+import os
+import json
+import time
+import logging
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from app.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# METRICS_ENABLED=0 turns every call below into a no-op and hides /metrics
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+# Celery workers push their samples here after each task; the API merges them into /metrics
+PUSH_KEY = "metrics:workers"
+PUSH_GAUGES_KEY = "metrics:workers:gauges"
+
+# Set by app.services.jobs around a tracked task: timer() adds each stage's seconds to it
+stage_sink: ContextVar[Optional[dict]] = ContextVar("stage_sink", default=None)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STAGE_BUCKETS = (0.01, 0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1800)
+
+# name -> (type, help, buckets)
+DEFINITIONS = {
+    "http_request_duration_seconds": ("histogram", "API request latency by route template", LATENCY_BUCKETS),
+    "task_stage_duration_seconds": ("histogram", "Duration of each stage of import / delete tasks", STAGE_BUCKETS),
+    "import_rows_total": ("counter", "Rows read from uploaded files", None),
+    "import_rows_rejected_total": ("counter", "Rows rejected by import validation", None),
+    "import_rows_per_second": ("gauge", "Throughput of the most recent import", None),
+    "webhook_delivery_duration_seconds": ("histogram", "Webhook POST latency by outcome (status class, error type or circuit_open)", LATENCY_BUCKETS),
+    "db_pool_checkout_wait_seconds": ("histogram", "Time to get a pooled DB connection (queue wait plus any new connect)", LATENCY_BUCKETS),
+}
+
+
+def _labels(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(labels, extra: Optional[tuple] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in items)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+
+class Metrics:
+    """
+    Minimal Prometheus-style registry: counters, gauges and fixed-bucket histograms kept in
+    process memory. Samples are flat (name, labels, field) -> value entries so they can be
+    summed with the ones Celery workers push to Redis.
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self._values: dict = defaultdict(float)  # (name, labels, field) -> value
+        self._gauges: dict = {}  # (name, labels) -> value
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._values[(name, _labels(labels), "")] += value
+
+    def set(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges[(name, _labels(labels))] = value
+
+    def observe(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        buckets = DEFINITIONS[name][2]
+        i = bisect_left(buckets, value)
+        key = _labels(labels)
+        with self._lock:
+            self._values[(name, key, str(buckets[i]) if i < len(buckets) else "+Inf")] += 1
+            self._values[(name, key, "sum")] += value
+            self._values[(name, key, "count")] += 1
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            self.observe(name, elapsed, **labels)
+            if "stage" in labels:
+                self.note_stage(labels["stage"], elapsed)
+
+    @staticmethod
+    def note_stage(stage: str, seconds: float):
+        """Add to the running task's job history entry, if it has one (works with metrics disabled)."""
+        sink = stage_sink.get()
+        if sink is not None:
+            sink[stage] = sink.get(stage, 0.0) + seconds
+
+    def record_import(self, task: str, rows: int, seconds: float):
+        """Rows counter plus rows/sec gauge for a finished import."""
+        self.inc("import_rows_total", rows, task=task)
+        if seconds > 0:
+            self.set("import_rows_per_second", rows / seconds, task=task)
+
+    def push(self):
+        """Move this process's samples into Redis (called by Celery workers after each task)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            values, self._values = self._values, defaultdict(float)
+            gauges, self._gauges = self._gauges, {}
+        if not values and not gauges:
+            return
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            for (name, labels, field), v in values.items():
+                pipe.hincrbyfloat(PUSH_KEY, json.dumps([name, labels, field]), v)
+            for (name, labels), v in gauges.items():
+                pipe.hset(PUSH_GAUGES_KEY, json.dumps([name, labels]), v)
+            pipe.execute()
+        except RedisError:
+            logger.warning("Metrics: push to Redis failed; %s samples dropped", len(values) + len(gauges))
+
+    def _pushed(self) -> tuple[dict, dict]:
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            pipe.hgetall(PUSH_KEY)
+            pipe.hgetall(PUSH_GAUGES_KEY)
+            raw_values, raw_gauges = pipe.execute()
+        except RedisError:
+            return {}, {}
+        values = {}
+        for k, v in raw_values.items():
+            name, labels, field = json.loads(k)
+            values[(name, tuple(map(tuple, labels)), field)] = float(v)
+        gauges = {}
+        for k, v in raw_gauges.items():
+            name, labels = json.loads(k)
+            gauges[(name, tuple(map(tuple, labels)))] = float(v)
+        return values, gauges
+
+    def render(self, include_pushed: bool = True) -> str:
+        """Prometheus text exposition format (0.0.4)."""
+        with self._lock:
+            values = dict(self._values)
+            gauges = dict(self._gauges)
+        if include_pushed:
+            pushed_values, pushed_gauges = self._pushed()
+            for k, v in pushed_values.items():
+                values[k] = values.get(k, 0.0) + v
+            for k, v in pushed_gauges.items():
+                gauges.setdefault(k, v)
+
+        series: dict = defaultdict(lambda: defaultdict(dict))  # name -> labels -> field -> value
+        for (name, labels, field), v in values.items():
+            series[name][labels][field] = v
+        for (name, labels), v in gauges.items():
+            series[name][labels][""] = v
+
+        lines = []
+        for name, (kind, help_text, buckets) in DEFINITIONS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, fields in sorted(series.get(name, {}).items()):
+                if kind != "histogram":
+                    lines.append(f"{name}{_fmt_labels(labels)} {fields.get('', 0.0)}")
+                    continue
+                cumulative = 0.0
+                for le in [str(b) for b in buckets] + ["+Inf"]:
+                    cumulative += fields.get(le, 0.0)
+                    lines.append(f"{name}_bucket{_fmt_labels(labels, ('le', le))} {cumulative}")
+                lines.append(f"{name}_sum{_fmt_labels(labels)} {fields.get('sum', 0.0)}")
+                lines.append(f"{name}_count{_fmt_labels(labels)} {fields.get('count', 0.0)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
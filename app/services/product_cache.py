@@ -0,0 +1,243 @@
+import os
+import json
+import asyncio
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+from redis.exceptions import RedisError
+
+from app.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = "catalog:generation"
+
+PRODUCT_CACHE_SIZE = int(os.getenv("PRODUCT_CACHE_SIZE", "10000"))
+# Local entries are only invalidated precisely in the process that made the write, so their
+# TTL bounds how stale another API process can be. Redis entries are tombstoned on every write.
+PRODUCT_CACHE_TTL = float(os.getenv("PRODUCT_CACHE_TTL", "5"))
+PRODUCT_CACHE_REDIS = os.getenv("PRODUCT_CACHE_REDIS", "0") == "1"
+PRODUCT_CACHE_REDIS_TTL = int(os.getenv("PRODUCT_CACHE_REDIS_TTL", "300"))
+PRODUCT_CACHE_GEN_CHECK = float(os.getenv("PRODUCT_CACHE_GEN_CHECK", "1"))
+# An invalidated Redis entry is replaced by an empty tombstone for this many seconds, and fills
+# only write where no entry exists, so a reader that loaded the row before the write cannot put
+# it back; it should outlast the slowest lookup query
+PRODUCT_CACHE_TOMBSTONE_TTL = int(os.getenv("PRODUCT_CACHE_TOMBSTONE_TTL", "10"))
+
+
+class ProductCache:
+    """
+    Read-through cache of product dicts keyed by id and by lower(sku): a process-local
+    LRU with TTL, optionally backed by Redis. Bulk operations bump a catalog generation
+    number that is part of every key, which invalidates everything at once.
+
+    A miss hands out a fill token; invalidating the key (or bumping the generation) before the
+    loader returns voids it, so a row read before a write is never cached after it.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = PRODUCT_CACHE_SIZE,
+        ttl: float = PRODUCT_CACHE_TTL,
+        use_redis: bool = PRODUCT_CACHE_REDIS,
+        redis_ttl: int = PRODUCT_CACHE_REDIS_TTL,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.use_redis = use_redis
+        self.redis_ttl = redis_ttl
+        self._local: OrderedDict = OrderedDict()  # key -> (expires_at, value)
+        self._generation = 0
+        self._checked_at = 0.0
+        self._pending: OrderedDict = OrderedDict()  # key -> token of the fill in flight
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _keys(value: dict) -> list[str]:
+        return [f"id:{value['id']}", f"sku:{value['sku'].lower()}"]
+
+    def _current_generation(self) -> int:
+        now = time.monotonic()
+        if now - self._checked_at >= PRODUCT_CACHE_GEN_CHECK:
+            self._checked_at = now
+            try:
+                remote = int(get_redis().get(GENERATION_KEY) or 0)
+            except RedisError:
+                return self._generation
+            if remote != self._generation:
+                self._generation = remote
+                self._local.clear()
+        return self._generation
+
+    def _store_local(self, value: dict):
+        expires = time.monotonic() + self.ttl
+        for key in self._keys(value):
+            self._local[key] = (expires, value)
+            self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    def _generation_known(self) -> bool:
+        """True while the last generation check is recent enough to skip Redis."""
+        return time.monotonic() - self._checked_at < PRODUCT_CACHE_GEN_CHECK
+
+    def _lookup_local(self, key: str, gen: int) -> tuple[bool, Optional[dict], int]:
+        entry = self._local.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._local.move_to_end(key)
+            self.hits += 1
+            return True, entry[1], gen
+        return False, None, gen
+
+    def _begin_fill(self, key: str, gen: int) -> tuple:
+        token = (key, gen, object())
+        self._pending[key] = token
+        self._pending.move_to_end(key)
+        while len(self._pending) > self.max_entries:
+            # loaders that raised never fill; forget their tokens
+            self._pending.popitem(last=False)
+        return token
+
+    def lookup(self, key: str) -> tuple[bool, Optional[dict], tuple]:
+        """
+        Return (hit, value, token) for "id:<id>" or "sku:<lower sku>"; on a miss, pass the token
+        to fill() with whatever the loader returned.
+        """
+        with self._lock:
+            gen = self._current_generation()
+            hit, value, _ = self._lookup_local(key, gen)
+            if hit:
+                return hit, value, None
+
+        if self.use_redis:
+            try:
+                raw = get_redis().get(f"product:{gen}:{key}")
+            except RedisError:
+                raw = None
+            if raw:  # b"" is an invalidation tombstone
+                value = json.loads(raw)
+                with self._lock:
+                    self.redis_hits += 1
+                    self._store_local(value)
+                return True, value, None
+
+        with self._lock:
+            return False, None, self._begin_fill(key, gen)
+
+    def fill(self, value: Optional[dict], token: tuple):
+        """
+        Record a miss and cache what the loader returned, unless the key was invalidated or a
+        bulk op bumped the generation since lookup() handed out `token`.
+        """
+        key, gen, _ = token
+        with self._lock:
+            self.misses += 1
+            current = self._pending.get(key) is token
+            if current:
+                del self._pending[key]
+            if value is None or not current or gen != self._generation:
+                return
+            self._store_local(value)
+        if self.use_redis:
+            try:
+                pipe = get_redis().pipeline()
+                for k in self._keys(value):
+                    pipe.set(f"product:{gen}:{k}", json.dumps(value), ex=self.redis_ttl, nx=True)
+                pipe.execute()
+            except RedisError:
+                logger.warning("Product cache: Redis write failed")
+
+    def get_or_load(self, key: str, loader: Callable[[], Optional[dict]]) -> Optional[dict]:
+        hit, value, token = self.lookup(key)
+        if hit:
+            return value
+        value = loader()
+        self.fill(value, token)
+        return value
+
+    async def aget_or_load(self, key: str, loader: Callable[[], Awaitable[Optional[dict]]]) -> Optional[dict]:
+        # anything that talks to Redis runs in a thread, so a slow Redis can't stall the event
+        # loop; a local hit between generation checks stays in memory
+        hit = False
+        if self._generation_known():
+            with self._lock:
+                hit, value, _ = self._lookup_local(key, self._generation)
+        if not hit:
+            hit, value, token = await asyncio.to_thread(self.lookup, key)
+        if hit:
+            return value
+        value = await loader()
+        if self.use_redis and value is not None:
+            await asyncio.to_thread(self.fill, value, token)
+        else:
+            self.fill(value, token)
+        return value
+
+    def _tombstone(self, r, gen: int, keys: list[str]):
+        pipe = r.pipeline()
+        for k in keys:
+            pipe.set(f"product:{gen}:{k}", b"", ex=PRODUCT_CACHE_TOMBSTONE_TTL)
+        pipe.execute()
+
+    def invalidate(self, product_id: Optional[int] = None, sku: Optional[str] = None):
+        keys = []
+        if product_id is not None:
+            keys.append(f"id:{product_id}")
+        if sku:
+            keys.append(f"sku:{sku.lower()}")
+        with self._lock:
+            for key in keys:
+                self._local.pop(key, None)
+                self._pending.pop(key, None)
+            gen = self._generation
+        if self.use_redis and keys:
+            try:
+                self._tombstone(get_redis(), gen, keys)
+            except RedisError:
+                logger.warning("Product cache: Redis invalidation failed")
+
+    def invalidate_many(self, products: list[tuple[int, str]]):
+        """invalidate() for a batch of (id, sku) in one round trip; reads the generation from Redis,
+        since a worker never looks products up and so never tracks it."""
+        keys = [k for product_id, sku in products for k in (f"id:{product_id}", f"sku:{sku.lower()}")]
+        with self._lock:
+            for key in keys:
+                self._local.pop(key, None)
+                self._pending.pop(key, None)
+        if self.use_redis and keys:
+            try:
+                r = get_redis()
+                self._tombstone(r, int(r.get(GENERATION_KEY) or 0), keys)
+            except RedisError:
+                logger.warning("Product cache: Redis invalidation failed")
+
+    def bump_generation(self):
+        """Invalidate every cached product in every process (after imports / delete-all)."""
+        with self._lock:
+            self._local.clear()
+            self._pending.clear()
+            self._checked_at = 0.0
+        try:
+            get_redis().incr(GENERATION_KEY)
+        except RedisError:
+            logger.warning("Product cache: could not bump generation; other processes expire by TTL")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.redis_hits + self.misses
+        return {
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": ((self.hits + self.redis_hits) / lookups) if lookups else 0.0,
+            "entries": len(self._local),
+            "generation": self._generation,
+        }
+
+
+product_cache = ProductCache()
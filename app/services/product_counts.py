@@ -0,0 +1,80 @@
+import os
+import json
+import asyncio
+import hashlib
+import logging
+from typing import Awaitable, Callable, Optional
+
+from redis.exceptions import RedisError
+
+from app.services.fingerprints import WRITES_KEY
+from app.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Cached counts are keyed by the catalog:writes counter, so any product write or import
+# invalidates them; the TTL only bounds how long unused keys linger
+COUNT_CACHE_TTL = int(os.getenv("COUNT_CACHE_TTL", "300"))
+# Unfiltered totals above this are estimated from pg_class instead of counted
+COUNT_ESTIMATE_MIN_ROWS = int(os.getenv("COUNT_ESTIMATE_MIN_ROWS", "100000"))
+
+# The planner's own trick: tuple density from the last ANALYZE times the table's current size,
+# so the estimate follows bulk imports before autovacuum catches up. NULL when never analyzed.
+ESTIMATE_SQL = """
+    SELECT CASE WHEN c.reltuples < 0 OR c.relpages = 0 THEN NULL
+                ELSE (c.reltuples / c.relpages)
+                     * (pg_relation_size(c.oid) / current_setting('block_size')::int)
+           END::bigint
+    FROM pg_class c WHERE c.oid = 'products'::regclass
+"""
+
+
+def _key(writes: int, search: str, active: Optional[bool], include_archived: bool) -> str:
+    filters = json.dumps([search, active, include_archived]).encode()
+    return f"count:{writes}:{hashlib.sha1(filters).hexdigest()}"
+
+
+def _lookup(search: str, active: Optional[bool], include_archived: bool) -> tuple[Optional[str], Optional[dict]]:
+    """Return (cache key, cached {"count", "exact"}); the key is None when Redis is unavailable."""
+    try:
+        r = get_redis()
+        key = _key(int(r.get(WRITES_KEY) or 0), search, active, include_archived)
+        raw = r.get(key)
+    except RedisError:
+        return None, None
+    return key, (json.loads(raw) if raw is not None else None)
+
+
+def _store(key: Optional[str], value: dict):
+    if key is None or COUNT_CACHE_TTL <= 0:
+        return
+    try:
+        get_redis().setex(key, COUNT_CACHE_TTL, json.dumps(value))
+    except RedisError:
+        logger.warning("Product counts: Redis write failed")
+
+
+def get_or_count(
+    search: str, active: Optional[bool], include_archived: bool, loader: Callable[[], dict]
+) -> dict:
+    key, value = _lookup(search, active, include_archived)
+    if value is None:
+        value = loader()
+        _store(key, value)
+    return value
+
+
+async def aget_or_count(
+    search: str, active: Optional[bool], include_archived: bool, loader: Callable[[], Awaitable[dict]]
+) -> dict:
+    # the Redis round trips block, so they run in a thread rather than on the event loop
+    key, value = await asyncio.to_thread(_lookup, search, active, include_archived)
+    if value is None:
+        value = await loader()
+        await asyncio.to_thread(_store, key, value)
+    return value
+
+
+def set_headers(response, value: dict):
+    response.headers["X-Total-Count"] = str(value["count"])
+    response.headers["X-Total-Count-Exact"] = "true" if value["exact"] else "false"
@@ -0,0 +1,121 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from app.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "task:progress:"
+TERMINAL_STATES = {"SUCCESS", "FAILURE", "REVOKED"}
+# An SSE stream re-reads the result backend after this many quiet seconds, since pub/sub
+# delivery is fire-and-forget (a message sent while the API was reconnecting is gone)
+PROGRESS_RECHECK_SECONDS = float(os.getenv("PROGRESS_RECHECK_SECONDS", "15"))
+# Updates buffered per listener; a slow client only misses intermediate ones
+LISTENER_QUEUE_SIZE = 16
+
+
+def status_payload(task_id: str, state: Optional[str], result) -> dict:
+    """Same shape as GET /api/uploads/status/{task_id}; exceptions become exc_type / exc."""
+    if isinstance(result, BaseException):
+        result = {"exc_type": type(result).__name__, "exc": str(result)}
+    return {"task_id": task_id, "status": state, "result": result}
+
+
+def publish(task_id: str, state: Optional[str], result):
+    """Called by tasks next to every update_state (see celery_app.ProgressTask)."""
+    if not task_id:
+        return
+    try:
+        payload = json.dumps(status_payload(task_id, state, result), default=str)
+        get_redis().publish(CHANNEL_PREFIX + task_id, payload)
+    except RedisError:
+        logger.debug("Could not publish progress for task %s", task_id)
+
+
+def _offer(q: asyncio.Queue, item: dict):
+    # progress messages are snapshots, so when a listener falls behind the oldest can go
+    if q.full():
+        q.get_nowait()
+    q.put_nowait(item)
+
+
+class ProgressHub:
+    """
+    One Redis pattern subscription per API process, fanned out to every SSE listener.
+
+    The subscriber runs on a daemon thread only while somebody is listening and hands each
+    message to the listeners' asyncio queues on their own event loops.
+    """
+
+    def __init__(self):
+        self._listeners: dict[str, set] = {}  # task_id -> {(loop, queue)}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def listen(self, task_id: str) -> asyncio.Queue:
+        q: asyncio.Queue = asyncio.Queue(maxsize=LISTENER_QUEUE_SIZE)
+        entry = (asyncio.get_running_loop(), q)
+        with self._lock:
+            self._listeners.setdefault(task_id, set()).add(entry)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="progress-hub", daemon=True)
+                self._thread.start()
+        return q
+
+    def unlisten(self, task_id: str, q: asyncio.Queue):
+        with self._lock:
+            entries = self._listeners.get(task_id, set())
+            entries.difference_update({e for e in entries if e[1] is q})
+            if not entries:
+                self._listeners.pop(task_id, None)
+
+    def _dispatch(self, message: dict):
+        task_id = message["channel"].decode()[len(CHANNEL_PREFIX):]
+        with self._lock:
+            entries = list(self._listeners.get(task_id, ()))
+        if not entries:
+            return
+        data = json.loads(message["data"])
+        for loop, q in entries:
+            try:
+                loop.call_soon_threadsafe(_offer, q, data)
+            except RuntimeError:
+                pass  # that listener's loop has closed
+
+    def _idle(self) -> bool:
+        """True (and the thread is forgotten) once nobody listens any more."""
+        with self._lock:
+            if self._listeners:
+                return False
+            self._thread = None
+            return True
+
+    def _run(self):
+        while not self._idle():
+            pubsub = None
+            try:
+                pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(CHANNEL_PREFIX + "*")
+                while not self._idle():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None and message["type"] == "pmessage":
+                        self._dispatch(message)
+            except RedisError:
+                logger.warning("Progress hub: Redis subscription lost; retrying")
+                time.sleep(1)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except RedisError:
+                        pass
+
+
+hub = ProgressHub()
@@ -0,0 +1,317 @@
+import io
+import os
+import csv
+import time
+import logging
+from itertools import chain
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+
+from app.services.formats import _IterReader
+from app.services.storage import EXPECTED_HEADER, UPLOAD_DIR
+
+logger = logging.getLogger(__name__)
+
+# 0 skips the per-row parse and COPYs the file as-is (columns still mapped by header name);
+# one bad row then aborts the whole import again
+IMPORT_VALIDATE_ROWS = os.getenv("IMPORT_VALIDATE_ROWS", "1") == "1"
+# Rejected-row reports older than this (seconds) are removed when a new one is written
+REJECTS_RETENTION_SECONDS = int(os.getenv("REJECTS_RETENTION_SECONDS", str(7 * 24 * 3600)))
+
+REJECTS_DIR = UPLOAD_DIR / "rejects"
+REQUIRED_COLUMNS = ("name", "sku")
+# Characters of a rejected record kept in the report (an unbalanced quote can swallow a lot)
+REJECT_RECORD_CHARS = 2000
+READ_SIZE = 1024 * 1024
+OUTPUT_BATCH_ROWS = 10000
+
+# csv's 128 KiB default would reject legitimately long descriptions; past this, an unbalanced
+# quote becomes one reject instead of swallowing the rest of the file
+MAX_FIELD_SIZE = 16 * 1024 * 1024
+csv.field_size_limit(max(csv.field_size_limit(), MAX_FIELD_SIZE))
+
+
+class ColumnMap:
+    """Where name / sku / description sit in an upload, from its header (case-insensitive, any order)."""
+
+    def __init__(self, header: list[str]):
+        self.names = [h.strip().lower() for h in header]
+        if self.names:
+            self.names[0] = self.names[0].lstrip("\ufeff")
+        missing = [c for c in REQUIRED_COLUMNS if c not in self.names]
+        if missing:
+            raise ValueError(f"Header is missing column(s) {', '.join(missing)}, got {','.join(self.names)}")
+        dupes = sorted({c for c in EXPECTED_HEADER if self.names.count(c) > 1})
+        if dupes:
+            raise ValueError(f"Header repeats column(s) {', '.join(dupes)}")
+        self.width = len(self.names)
+        # source position of each EXPECTED_HEADER column; None for an absent description
+        self.positions = [self.names.index(c) if c in self.names else None for c in EXPECTED_HEADER]
+
+    @classmethod
+    def from_line(cls, line: str) -> "ColumnMap":
+        return cls(next(csv.reader([line.rstrip("\r\n")]), []))
+
+    def copy_columns(self) -> list[str]:
+        """Column list for a COPY of the file as it is, which only works without extra columns."""
+        extra = [n for n in self.names if n not in EXPECTED_HEADER]
+        if extra:
+            raise ValueError(f"Unknown column(s) {', '.join(extra)} need IMPORT_VALIDATE_ROWS=1")
+        return self.names
+
+
+def split_header(fh: BinaryIO) -> tuple[ColumnMap, BinaryIO]:
+    """Read the header record off `fh`; returns its ColumnMap and a stream of the remaining bytes."""
+    head = b""
+    while True:
+        chunk = fh.read(64 * 1024)
+        head += chunk
+        end = head.find(b"\n")
+        while end >= 0 and head[:end].count(b'"') % 2:
+            end = head.find(b"\n", end + 1)
+        if end >= 0 or not chunk:
+            break
+    end = len(head) if end < 0 else end + 1
+    columns = ColumnMap.from_line(head[:end].decode("utf-8-sig"))
+    rest = chain([head[end:]], iter(lambda: fh.read(READ_SIZE), b""))
+    return columns, io.BufferedReader(_IterReader(rest), buffer_size=READ_SIZE)
+
+
+class RejectsReport:
+    """
+    CSV of rejected rows (line, reason, record) under REJECTS_DIR. Rows are buffered and only
+    written on flush(), so a batched import can write a batch's rejects after it commits.
+    A `part` report is a headerless piece that merge_parts() later joins into the full report.
+    """
+
+    def __init__(self, report_id: str, part: Optional[int] = None):
+        self.report_id = report_id
+        self.path = REJECTS_DIR / (f"{report_id}.csv" if part is None else f"{report_id}.{part}.part")
+        self.header = part is None
+        self.count = 0
+        self._pending: list[tuple[int, str, str]] = []
+
+    def reset(self):
+        """Start over, e.g. when a retried import would otherwise append to its earlier report."""
+        self.path.unlink(missing_ok=True)
+        self.count = 0
+        self._pending = []
+
+    def add(self, line: int, reason: str, record: str):
+        self.count += 1
+        self._pending.append((line, reason, record[:REJECT_RECORD_CHARS]))
+
+    def discard(self):
+        """Drop rows not yet flushed (their batch was rolled back)."""
+        self.count -= len(self._pending)
+        self._pending = []
+
+    def flush(self):
+        if not self._pending:
+            return
+        REJECTS_DIR.mkdir(parents=True, exist_ok=True)
+        new = not self.path.exists()
+        with open(self.path, "a", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            if new and self.header:
+                writer.writerow(["line", "reason", "record"])
+            writer.writerows(self._pending)
+        self._pending = []
+
+    def resume(self):
+        """Continue a report left by an earlier run of the same import."""
+        if self.path.exists():
+            with open(self.path, encoding="utf-8", newline="") as f:
+                self.count = max(0, sum(1 for _ in csv.reader(f)) - self.header)
+
+    @property
+    def url(self) -> Optional[str]:
+        return f"/api/uploads/rejects/{self.report_id}" if self.count else None
+
+
+def merge_parts(report_id: str) -> int:
+    """Join the part reports of a sharded / streamed import in order; returns the rows rejected."""
+    parts = sorted(REJECTS_DIR.glob(f"{report_id}.*.part"), key=lambda p: int(p.suffixes[-2][1:]))
+    if not parts:
+        return 0
+    target = REJECTS_DIR / f"{report_id}.csv"
+    count = 0
+    with open(target, "w", encoding="utf-8", newline="") as out:
+        writer = csv.writer(out)
+        writer.writerow(["line", "reason", "record"])
+        for part in parts:
+            with open(part, encoding="utf-8", newline="") as f:
+                for row in csv.reader(f):
+                    writer.writerow(row)
+                    count += 1
+            part.unlink()
+    return count
+
+
+def report_path(report_id: str) -> Path:
+    return REJECTS_DIR / f"{report_id}.csv"
+
+
+def prune_reports():
+    if REJECTS_RETENTION_SECONDS <= 0 or not REJECTS_DIR.exists():
+        return
+    cutoff = time.time() - REJECTS_RETENTION_SECONDS
+    for p in REJECTS_DIR.iterdir():
+        try:
+            if p.stat().st_mtime < cutoff:
+                p.unlink()
+        except OSError:
+            logger.warning("Could not prune rejects report %s", p)
+
+
+class RowFilter:
+    """
+    Single pass between an upload and COPY: parses each record with the csv module, maps its
+    columns by header name and re-emits valid rows as name,sku,description CSV. Rejected rows
+    go to `report` with their line number and reason instead of aborting the COPY.
+
+    With `columns` None the first record is the header; otherwise the input starts at data
+    line `first_line` (a shard or a batch of a larger file).
+    """
+
+    def __init__(self, columns: Optional[ColumnMap] = None, first_line: int = 1, report: Optional[RejectsReport] = None):
+        self.columns = columns
+        self._passthrough = columns is not None and columns.names == EXPECTED_HEADER
+        self.report = report
+        self.first_line = first_line
+        self.accepted = 0
+        self.rejected = 0
+        # decoded lines from _buf_start on, kept until the records spanning them are done
+        self._buf: list[str] = []
+        self._buf_start = first_line
+        self._record_start = first_line
+        self._bad: dict[int, str] = {}  # line number -> problem found while decoding
+        self._line = io.StringIO()
+        self._line_writer = csv.writer(self._line, lineterminator="\n")
+
+    def stream(self, fh: BinaryIO) -> BinaryIO:
+        """File object of the accepted rows (no header), for copy_expert."""
+        return io.BufferedReader(_IterReader(self._chunks(fh)), buffer_size=READ_SIZE)
+
+    def _decode(self, data: bytes) -> list[str]:
+        """Lines of a run of whole lines, decoded in one go unless it holds invalid UTF-8 or NULs."""
+        drop = self._record_start - self._buf_start
+        if drop > 0:
+            del self._buf[:drop]
+            self._buf_start += drop
+        try:
+            text = data.decode("utf-8")
+        except UnicodeDecodeError:
+            text = None
+        if text is not None and "\x00" not in text:
+            lines = list(io.StringIO(text, newline="\n"))
+        else:
+            lines = []
+            number = self._buf_start + len(self._buf)
+            for raw in io.BytesIO(data):
+                try:
+                    line = raw.decode("utf-8")
+                except UnicodeDecodeError:
+                    line = raw.decode("utf-8", "replace")
+                    self._bad[number] = "invalid UTF-8"
+                if "\x00" in line:
+                    self._bad[number] = "NUL byte"
+                lines.append(line)
+                number += 1
+        self._buf.extend(lines)
+        return lines
+
+    def _runs(self, fh: BinaryIO) -> Iterator[list[str]]:
+        tail = b""
+        for chunk in iter(lambda: fh.read(READ_SIZE), b""):
+            data = tail + chunk
+            cut = data.rfind(b"\n") + 1
+            tail = data[cut:]
+            if cut:
+                yield self._decode(data[:cut])
+        if tail:
+            yield self._decode(tail)
+
+    def _record(self, start: int, end: int) -> str:
+        return "".join(self._buf[start - self._buf_start:end - self._buf_start + 1])
+
+    def _reject(self, start: int, end: int, reason: str):
+        self.rejected += 1
+        if self.report is not None:
+            self.report.add(start, reason, self._record(start, end).rstrip("\r\n"))
+
+    def _problem(self, row: list[str], start: int, end: int) -> Optional[str]:
+        if self._bad:
+            found = {self._bad.pop(n) for n in range(start, end + 1) if n in self._bad}
+            if found:
+                return ", ".join(sorted(found))
+        if len(row) != self.columns.width:
+            return f"expected {self.columns.width} fields, got {len(row)}"
+        name_at, sku_at, _ = self.columns.positions
+        if not row[sku_at].strip():
+            return "missing sku"
+        if not row[name_at].strip():
+            return "missing name"
+        return None
+
+    def _serialize(self, row: list[str]) -> str:
+        self._line.seek(0)
+        self._line.truncate()
+        self._line_writer.writerow(row)
+        return self._line.getvalue()
+
+    def _encode(self, out: list) -> bytes:
+        if self._passthrough:
+            return "".join(out).encode()
+        buf = io.StringIO()
+        csv.writer(buf, lineterminator="\n").writerows(out)
+        return buf.getvalue().encode()
+
+    def _chunks(self, fh: BinaryIO) -> Iterator[bytes]:
+        # lines reach the csv module straight from C-level iterators; reader.line_num then says
+        # which lines each record spanned, for line numbers and the record's original text
+        reader = csv.reader(chain.from_iterable(self._runs(fh)), strict=True)
+        base = self.first_line - 1
+        out: list = []
+        while True:
+            start = self._record_start
+            try:
+                row = next(reader)
+            except StopIteration:
+                break
+            except csv.Error as exc:
+                end = base + reader.line_num
+                self._reject(start, end, f"malformed CSV: {exc}")
+                self._record_start = end + 1
+                continue
+            end = base + reader.line_num
+            self._record_start = end + 1
+            if not row:
+                continue  # blank line
+            if self.columns is None:
+                self.columns = ColumnMap(row)
+                self._passthrough = self.columns.names == EXPECTED_HEADER
+                continue
+            problem = self._problem(row, start, end)
+            if problem:
+                self._reject(start, end, problem)
+                continue
+            self.accepted += 1
+            if self._passthrough:
+                # already name,sku,description: hand COPY the record as it was, which is much
+                # cheaper than re-serializing it. Only without quotes, though: the csv module takes
+                # a stray " inside an unquoted field (5" screen) that COPY reads as an open quote
+                # a record without quotes is a single line; it ends in "\n" like a serialized one,
+                # as COPY rejects a file whose line endings change partway
+                record = self._buf[start - self._buf_start] if start == end else self._record(start, end)
+                if '"' in record:
+                    out.append(self._serialize(row))
+                else:
+                    out.append(record.rstrip("\r\n") + "\n")
+            else:
+                out.append([row[i] if i is not None else None for i in self.columns.positions])
+            if len(out) >= OUTPUT_BATCH_ROWS:
+                yield self._encode(out)
+                out = []
+        if out:
+            yield self._encode(out)
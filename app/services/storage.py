@@ -1,19 +1,31 @@
 import os
+import codecs
+import hashlib
+import logging
 from pathlib import Path
 from fastapi import UploadFile
 import time
 import uuid
 
+logger = logging.getLogger(__name__)
+
 UPLOAD_DIR = Path("/app/uploads")
+EXPECTED_HEADER = ["name", "sku", "description"]
+# Keep upload files after a successful import (they are removed by default)
+IMPORT_KEEP_UPLOADS = os.getenv("IMPORT_KEEP_UPLOADS", "0") == "1"
 
 def init_storage():
     UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
-def save_csv(file: UploadFile) -> str:
+def upload_path(filename: str) -> Path:
     init_storage()
     suffix = f"{int(time.time())}-{uuid.uuid4().hex[:8]}"
-    safe_name = f"{suffix}-{os.path.basename(file.filename)}"
-    file_path = UPLOAD_DIR / safe_name
+    return UPLOAD_DIR / f"{suffix}-{os.path.basename(filename)}"
+
+def save_csv(file: UploadFile) -> tuple[str, str]:
+    """Copy an upload to UPLOAD_DIR; returns (path, sha256 of the bytes written)."""
+    file_path = upload_path(file.filename)
+    digest = hashlib.sha256()
 
     try:
         file.file.seek(0)
@@ -25,7 +37,72 @@ def save_csv(file: UploadFile) -> str:
             chunk = file.file.read(1024 * 1024)
             if not chunk:
                 break
+            digest.update(chunk)
             f.write(chunk)
-            f.flush()
 
-    return str(file_path)
\ No newline at end of file
+    return str(file_path), digest.hexdigest()
+
+def remove_upload(path: str):
+    """Delete an imported file, but only if it lives in UPLOAD_DIR."""
+    if IMPORT_KEEP_UPLOADS:
+        return
+    try:
+        p = Path(path).resolve()
+        if p.parent == UPLOAD_DIR.resolve() and p.exists():
+            p.unlink()
+    except OSError:
+        logger.exception("Could not remove upload %s", path)
+
+
+class UploadValidator:
+    """
+    Checks a CSV upload chunk by chunk while it streams: strict UTF-8, a header naming at least
+    the name and sku columns (any order, extra columns allowed), and a running SHA-256 of the raw bytes. feed() raises ValueError on the first problem and
+    returns the CSV bytes of the chunk (decompressed first when a decompressor is given).
+    """
+
+    def __init__(self, decompressor=None):
+        self.decompressor = decompressor
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="strict")
+        self._hash = hashlib.sha256()
+        self._head = ""
+        self.header_ok = False
+        self.columns = None
+        self.size = 0
+        self.csv_size = 0
+
+    def feed(self, chunk: bytes) -> bytes:
+        self._hash.update(chunk)
+        self.size += len(chunk)
+        data = self.decompressor.feed(chunk) if self.decompressor is not None else chunk
+        try:
+            text = self._decoder.decode(data)
+        except UnicodeDecodeError as exc:
+            raise ValueError(f"File is not valid UTF-8 near byte {self.csv_size + exc.start}")
+        self.csv_size += len(data)
+        if not self.header_ok:
+            self._head += text
+            if "\n" in self._head:
+                self._check_header(self._head.split("\n", 1)[0])
+        return data
+
+    def finish(self):
+        if self.decompressor is not None:
+            self.decompressor.finish()
+        try:
+            self._decoder.decode(b"", final=True)
+        except UnicodeDecodeError:
+            raise ValueError("File ends with a truncated UTF-8 sequence")
+        if not self.header_ok:
+            if not self._head.strip():
+                raise ValueError("File is empty")
+            self._check_header(self._head)
+
+    def _check_header(self, line: str):
+        from app.services.row_validation import ColumnMap
+
+        self.columns = ColumnMap.from_line(line)  # ValueError names the missing columns
+        self.header_ok = True
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
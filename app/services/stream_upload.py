@@ -0,0 +1,109 @@
+import queue
+import uuid
+import asyncio
+import logging
+from typing import AsyncIterator
+
+import anyio
+
+from app.database import engine
+from app.services.storage import UploadValidator, upload_path
+
+logger = logging.getLogger(__name__)
+
+# Chunks buffered between the request body and the COPY thread (bounds memory per upload)
+QUEUE_CHUNKS = 16
+
+
+async def save_stream(chunks: AsyncIterator[bytes], filename: str, validator: UploadValidator) -> str:
+    """Write a validated request body to UPLOAD_DIR without blocking the event loop."""
+    path = upload_path(filename)
+    try:
+        async with await anyio.open_file(path, "wb") as f:
+            async for chunk in chunks:
+                if chunk:
+                    validator.feed(chunk)
+                    await f.write(chunk)
+        validator.finish()
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    return str(path)
+
+
+class _QueueReader:
+    """File-like object fed from another thread; read() blocks until data or end-of-stream arrives."""
+
+    def __init__(self):
+        self.q: queue.Queue = queue.Queue(maxsize=QUEUE_CHUNKS)
+        self.closed = False
+        self._buf = b""
+
+    def put(self, item):
+        # gives up once the consumer has gone away (e.g. the COPY failed), instead of blocking forever
+        while not self.closed:
+            try:
+                self.q.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._buf:
+            item = self.q.get()
+            if item is None:
+                return b""
+            if isinstance(item, BaseException):
+                raise item
+            self._buf = item
+        if size is None or size < 0:
+            size = len(self._buf)
+        data, self._buf = self._buf[:size], self._buf[size:]
+        return data
+
+
+async def copy_stream(chunks: AsyncIterator[bytes], validator: UploadValidator) -> tuple[str, int]:
+    """
+    COPY a validated (and, for .csv.gz / .csv.zst, decompressed) request body straight into
+    import_staging, with no file on disk.
+    Returns (job_id, rows); merge_import_shards(job_id) then upserts the rows.
+    """
+    from app.services.row_validation import RejectsReport
+    from app.tasks.shard_import_task import copy_into_staging, ensure_staging_table
+
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, ensure_staging_table)
+    job_id = uuid.uuid4().hex
+    reader = _QueueReader()
+
+    def run_copy() -> int:
+        raw_conn = engine.raw_connection()
+        try:
+            # rejects go to a part report that merge_import_shards turns into the job's report
+            return copy_into_staging(raw_conn, reader, job_id, report=RejectsReport(job_id, part=0))
+        except BaseException:
+            raw_conn.rollback()
+            raise
+        finally:
+            reader.closed = True
+            raw_conn.close()
+
+    copy_done = loop.run_in_executor(None, run_copy)
+    try:
+        async for chunk in chunks:
+            if copy_done.done():
+                break
+            if chunk:
+                data = validator.feed(chunk)
+                if data:
+                    await loop.run_in_executor(None, reader.put, data)
+        if not copy_done.done():
+            validator.finish()
+    except BaseException as exc:
+        # abort the COPY (rolled back in run_copy), then surface the original error
+        await loop.run_in_executor(None, reader.put, ValueError(f"upload aborted: {exc}"))
+        await asyncio.gather(copy_done, return_exceptions=True)
+        raise
+    await loop.run_in_executor(None, reader.put, None)
+    rows = await copy_done
+    return job_id, rows
@@ -0,0 +1,108 @@
+import os
+import time
+import logging
+import threading
+from typing import NamedTuple, Optional
+
+from redis.exceptions import RedisError
+
+from app import models
+from app.database import SessionLocal
+from app.services.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "webhooks:version"
+# How often a process re-reads the shared version, and the max age of a snapshot if Redis is down
+WEBHOOK_REGISTRY_CHECK_INTERVAL = float(os.getenv("WEBHOOK_REGISTRY_CHECK_INTERVAL", "1"))
+WEBHOOK_REGISTRY_MAX_AGE = float(os.getenv("WEBHOOK_REGISTRY_MAX_AGE", "60"))
+
+
+class Subscription(NamedTuple):
+    id: int
+    url: str
+    event: str
+    secret: Optional[str]
+
+
+class SubscriptionRegistry:
+    """
+    Enabled webhooks grouped by event, held in memory and shared by the API and workers.
+
+    Writers bump a version counter in Redis; readers compare it against the version their
+    snapshot was built from (at most every WEBHOOK_REGISTRY_CHECK_INTERVAL seconds) and
+    reload the whole table on change. It is small and changes rarely.
+    """
+
+    def __init__(self):
+        self._by_event: Optional[dict[str, list[Subscription]]] = None
+        self._version: Optional[int] = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _remote_version(self) -> Optional[int]:
+        try:
+            return int(get_redis().get(VERSION_KEY) or 0)
+        except RedisError:
+            logger.warning("Webhook registry: Redis unavailable, falling back to max-age expiry")
+            return None
+
+    def _is_stale(self, now: float) -> bool:
+        if self._by_event is None:
+            return True
+        if now - self._checked_at < WEBHOOK_REGISTRY_CHECK_INTERVAL:
+            return False
+        self._checked_at = now
+        remote = self._remote_version()
+        if remote is None:
+            return now - self._loaded_at > WEBHOOK_REGISTRY_MAX_AGE
+        return remote != self._version
+
+    def _load(self, now: float):
+        version = self._remote_version()
+        db = SessionLocal()
+        try:
+            rows = db.query(models.Webhook).filter(models.Webhook.enabled.is_(True)).all()
+            by_event: dict[str, list[Subscription]] = {}
+            for wh in rows:
+                by_event.setdefault(wh.event, []).append(Subscription(wh.id, wh.url, wh.event, wh.secret))
+        finally:
+            db.close()
+        self._by_event = by_event
+        self._version = version
+        self._loaded_at = self._checked_at = now
+
+    def get(self, event: str) -> list[Subscription]:
+        with self._lock:
+            now = time.monotonic()
+            if self._is_stale(now):
+                self.misses += 1
+                self._load(now)
+            else:
+                self.hits += 1
+            return list(self._by_event.get(event, ()))
+
+    def invalidate(self):
+        """Drop this process's snapshot and tell every other process to reload."""
+        with self._lock:
+            self._by_event = None
+        try:
+            get_redis().incr(VERSION_KEY)
+        except RedisError:
+            logger.warning("Webhook registry: could not bump version; other processes refresh after max age")
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+            "version": self._version,
+            "events": len(self._by_event or {}),
+        }
+
+
+registry = SubscriptionRegistry()
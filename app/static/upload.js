@@ -57,7 +57,10 @@ async function uploadCSV() {
             return;
         }
         const data = await res.json();
-        if (data.task_id) {
+        if (data.deduplicated) {
+            const r = data.result || {};
+            progressEl.textContent = `File already imported (task ${data.task_id}), catalog unchanged since — created: ${r.created ?? 0}, updated: ${r.updated ?? 0}, unchanged: ${r.unchanged ?? 0}`;
+        } else if (data.task_id) {
             progressEl.textContent = `Upload accepted — processing (task ${data.task_id})`;
             checkTaskStatus(data.task_id);
         } else {
@@ -93,67 +96,118 @@ async function checkTaskStatus(taskId) {
         progressEl.appendChild(percent);
     }
 
-    const interval = setInterval(async () => {
-        try {
-            const res = await fetch(`/api/uploads/status/${taskId}`);
-            if (!res.ok) {
-                clearInterval(interval);
-                document.getElementById("progressStage").textContent = `Status check failed: ${res.status}`;
-                return;
-            }
-            const data = await res.json();
-            const meta = data.result || {};
-            const status = data.status || "";
-
-            if (status === "STARTED" || meta.stage === "parsing") {
-                document.getElementById("progressStage").textContent = meta.message || "Parsing CSV…";
-                document.getElementById("progressBar").style.width = "6%";
-                document.getElementById("progressPercent").textContent = "Parsing…";
-            } else if (meta.stage === "parsed") {
-                const total = meta.total ?? 0;
-                document.getElementById("progressStage").textContent = `Parsed ${total} rows — preparing updates`;
-                document.getElementById("progressBar").style.width = "12%";
-                document.getElementById("progressPercent").textContent = `0% — 0 / ${total}`;
-            } else if (meta.stage === "updating") {
-                const total = meta.total ?? 0;
-                const updated = meta.updated ?? 0;
-                const pct = meta.percentage ?? Math.round((updated / Math.max(total, 1)) * 100);
-                document.getElementById("progressStage").textContent = `Updating existing — ${updated} updated`;
-                document.getElementById("progressBar").style.width = `${Math.min(pct, 90)}%`;
-                document.getElementById("progressPercent").textContent = `${pct}% — ${updated} / ${total}`;
-            } else if (meta.stage === "inserting") {
-                const total = meta.total ?? 0;
-                const updated = meta.updated ?? 0;
-                const created = meta.created ?? 0;
-                const processed = updated + created;
-                const pct = meta.percentage ?? Math.round((processed / Math.max(total, 1)) * 100);
-                document.getElementById("progressStage").textContent = `Inserting new — ${created} created`;
-                document.getElementById("progressBar").style.width = `${Math.min(pct, 98)}%`;
-                document.getElementById("progressPercent").textContent = `${pct}% — ${processed} / ${total}`;
-            } else if (status === "SUCCESS") {
-                clearInterval(interval);
-                const created = data.result?.created ?? 0;
-                const updated = data.result?.updated ?? 0;
-                const total = data.result?.total ?? (created + updated);
-                document.getElementById("progressStage").textContent = `Import complete — created: ${created}, updated: ${updated}`;
-                document.getElementById("progressBar").style.width = `100%`;
-                document.getElementById("progressPercent").textContent = `100% — ${total} / ${total}`;
-                if (typeof loadProducts === "function") loadProducts();
-            } else if (status === "FAILURE") {
-                clearInterval(interval);
-                document.getElementById("progressStage").textContent = `Import failed: ${meta.exc || JSON.stringify(meta)}`;
-                document.getElementById("progressBar").style.width = "0%";
-                document.getElementById("progressPercent").textContent = "Failed";
-            } else {
-                document.getElementById("progressStage").textContent = `Status: ${status} ${meta.message || ""}`;
+    let interval = null;
+    let source = null;
+    const done = () => {
+        if (interval) clearInterval(interval);
+        if (source) source.close();
+    };
+
+    const render = (data) => {
+        const meta = data.result || {};
+        const status = data.status || "";
+
+        if (status === "STARTED" || meta.stage === "parsing") {
+            document.getElementById("progressStage").textContent = meta.message || "Parsing CSV…";
+            document.getElementById("progressBar").style.width = "6%";
+            document.getElementById("progressPercent").textContent = "Parsing…";
+        } else if (meta.stage === "parsed") {
+            const total = meta.total ?? 0;
+            document.getElementById("progressStage").textContent = `Parsed ${total} rows — preparing updates`;
+            document.getElementById("progressBar").style.width = "12%";
+            document.getElementById("progressPercent").textContent = `0% — 0 / ${total}`;
+        } else if (meta.stage === "splitting" || meta.stage === "merging") {
+            document.getElementById("progressStage").textContent = meta.message || "Parallel import…";
+            document.getElementById("progressBar").style.width = meta.stage === "merging" ? "70%" : "10%";
+            document.getElementById("progressPercent").textContent = meta.stage === "merging" ? "Merging…" : "Splitting…";
+        } else if (meta.stage === "upserting") {
+            const total = meta.total ?? 0;
+            document.getElementById("progressStage").textContent = `Upserting ${total} rows…`;
+            document.getElementById("progressBar").style.width = "50%";
+            document.getElementById("progressPercent").textContent = `— / ${total}`;
+        } else if (meta.stage === "importing") {
+            const processed = meta.processed ?? 0;
+            const created = meta.created ?? 0;
+            const updated = meta.updated ?? 0;
+            const pct = meta.percentage ?? 0;
+            document.getElementById("progressStage").textContent = `Importing — ${created} created, ${updated} updated`;
+            document.getElementById("progressBar").style.width = `${Math.min(pct, 98)}%`;
+            document.getElementById("progressPercent").textContent = `${pct}% — ${processed} rows`;
+        } else if (meta.stage === "deleting") {
+            const pct = meta.percentage ?? 0;
+            document.getElementById("progressStage").textContent = meta.message || "Deleting…";
+            document.getElementById("progressBar").style.width = `${pct}%`;
+            document.getElementById("progressPercent").innerHTML =
+                `${pct}% <button class="btn small" id="cancelDeleteBtn">Cancel</button>`;
+            document.getElementById("cancelDeleteBtn").onclick = () =>
+                fetch(`/api/products/delete-all/${taskId}/cancel`, { method: "POST" });
+        } else if (status === "SUCCESS" && data.result && "deleted" in data.result) {
+            done();
+            const r = data.result;
+            document.getElementById("progressStage").textContent = r.cancelled
+                ? `Delete cancelled after ${r.deleted} products`
+                : `Deleted ${r.deleted} products (${r.strategy})`;
+            document.getElementById("progressBar").style.width = "100%";
+            document.getElementById("progressPercent").textContent = "Done";
+            if (typeof loadProducts === "function") loadProducts();
+        } else if (status === "SUCCESS") {
+            done();
+            const created = data.result?.created ?? 0;
+            const updated = data.result?.updated ?? 0;
+            const unchanged = data.result?.unchanged ?? 0;
+            const total = data.result?.total ?? (created + updated + unchanged);
+            const rejected = data.result?.rejected ?? 0;
+            document.getElementById("progressStage").textContent = `Import complete — created: ${created}, updated: ${updated}, unchanged: ${unchanged}`;
+            if (rejected) {
+                const link = document.createElement("a");
+                link.href = data.result.rejects_url;
+                link.textContent = ` — ${rejected} rows rejected (download report)`;
+                document.getElementById("progressStage").appendChild(link);
             }
-        } catch (err) {
-            clearInterval(interval);
-            document.getElementById("progressStage").textContent = "Status check error: " + err.message;
+            document.getElementById("progressBar").style.width = `100%`;
+            document.getElementById("progressPercent").textContent = `100% — ${total} / ${total}`;
+            if (typeof loadProducts === "function") loadProducts();
+        } else if (status === "FAILURE") {
+            done();
+            document.getElementById("progressStage").textContent = `Import failed: ${meta.exc || JSON.stringify(meta)}`;
             document.getElementById("progressBar").style.width = "0%";
-            document.getElementById("progressPercent").textContent = "Error";
+            document.getElementById("progressPercent").textContent = "Failed";
+        } else {
+            document.getElementById("progressStage").textContent = `Status: ${status} ${meta.message || ""}`;
         }
-    }, 1200);
+    };
+
+    const poll = () => {
+        interval = setInterval(async () => {
+            try {
+                const res = await fetch(`/api/uploads/status/${taskId}`);
+                if (!res.ok) {
+                    done();
+                    document.getElementById("progressStage").textContent = `Status check failed: ${res.status}`;
+                    return;
+                }
+                render(await res.json());
+            } catch (err) {
+                done();
+                document.getElementById("progressStage").textContent = "Status check error: " + err.message;
+                document.getElementById("progressBar").style.width = "0%";
+                document.getElementById("progressPercent").textContent = "Error";
+            }
+        }, 1200);
+    };
+
+    // updates are pushed over Server-Sent Events; fall back to polling if the stream breaks
+    if (window.EventSource) {
+        source = new EventSource(`/api/uploads/status/${taskId}/events`);
+        source.onmessage = (e) => render(JSON.parse(e.data));
+        source.onerror = () => {
+            source.close();
+            source = null;
+            poll();
+        };
+    } else {
+        poll();
+    }
 }
 
 async function loadProducts() {
@@ -163,7 +217,7 @@ async function loadProducts() {
     const activeFilter = document.getElementById("activeFilter").value;
     const activeParam = (activeFilter === "all") ? "" : `&active=${activeFilter}`;
 
-    const res = await fetch(`/api/products?page=${currentPage}&per_page=${perPage}&search=${search}${activeParam}`);
+    const res = await fetch(`/api/products?page=${currentPage}&per_page=${perPage}&search=${search}${activeParam}&count=true`);
     if (!res.ok) {
         console.error("Failed to load products", await res.text());
         return;
@@ -239,7 +293,11 @@ async function loadProducts() {
         });
     });
 
-    document.getElementById("currentPage").textContent = currentPage;
+    const total = parseInt(res.headers.get("X-Total-Count") || "", 10);
+    const exact = res.headers.get("X-Total-Count-Exact") === "true";
+    document.getElementById("currentPage").textContent = isNaN(total)
+        ? currentPage
+        : `${currentPage} of ${exact ? "" : "~"}${Math.max(1, Math.ceil(total / perPage))} (${exact ? "" : "~"}${total} products)`;
     document.getElementById("prevPageBtn").disabled = currentPage <= 1;
     document.getElementById("nextPageBtn").disabled = products.length < perPage;
 }
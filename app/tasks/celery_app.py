@@ -1,16 +1,75 @@
 import os
 import logging
 import importlib
-from celery import Celery
+from celery import Celery, Task
+from celery.signals import celeryd_init, task_prerun, task_postrun
+from kombu import Queue
+
+from app.services import jobs, progress
+from app.services.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
 
+# Long imports, bulk catalog maintenance and latency-sensitive webhook work each get a queue,
+# so a 10-minute import never sits in front of a webhook delivery or a delete-all request
+IMPORT_QUEUE = "imports"
+BULK_QUEUE = "bulk"
+WEBHOOK_QUEUE = "webhooks"
+DEFAULT_QUEUE = "celery"
+
+# task -> (queue, priority). On Redis 0 is the highest priority: within a queue, work that
+# finishes something already running (a chord's shards and merge) goes before new work
+TASK_ROUTES = {
+    "app.tasks.import_task.import_csv_task": (IMPORT_QUEUE, 5),
+    "app.tasks.shard_import_task.import_csv_parallel": (IMPORT_QUEUE, 5),
+    "app.tasks.shard_import_task.import_csv_shard": (IMPORT_QUEUE, 4),
+    "app.tasks.shard_import_task.merge_import_shards": (IMPORT_QUEUE, 3),
+    "app.tasks.shard_import_task.discard_staging": (IMPORT_QUEUE, 3),
+    "app.tasks.shard_import_task.purge_stale_staging": (BULK_QUEUE, 8),
+    "app.tasks.delete_task.delete_all_products": (BULK_QUEUE, 3),
+    "app.tasks.compact_task.purge_archived": (BULK_QUEUE, 8),
+    "app.tasks.webhook_task.send_webhook": (WEBHOOK_QUEUE, 2),
+    "app.tasks.webhook_task.dispatch_events": (WEBHOOK_QUEUE, 4),
+}
+
+# WORKER_PROFILE picks the queues a worker consumes and how it takes work from them:
+# long tasks want prefetch 1 (nothing waits behind a running import) and acks_late (a
+# killed worker's import is redelivered); short I/O-bound deliveries want more of both.
+# concurrency None keeps Celery's default (one process per CPU).
+WORKER_PROFILES = {
+    "all": {"queues": [IMPORT_QUEUE, BULK_QUEUE, WEBHOOK_QUEUE, DEFAULT_QUEUE], "concurrency": None, "prefetch": 1, "acks_late": False},
+    "imports": {"queues": [IMPORT_QUEUE], "concurrency": 2, "prefetch": 1, "acks_late": True},
+    "bulk": {"queues": [BULK_QUEUE], "concurrency": 1, "prefetch": 1, "acks_late": True},
+    "webhooks": {"queues": [WEBHOOK_QUEUE, DEFAULT_QUEUE], "concurrency": 8, "prefetch": 8, "acks_late": False},
+}
+WORKER_PROFILE = os.getenv("WORKER_PROFILE", "all")
+if WORKER_PROFILE not in WORKER_PROFILES:
+    raise RuntimeError(f"WORKER_PROFILE must be one of {', '.join(WORKER_PROFILES)}, got {WORKER_PROFILE!r}")
+_profile = WORKER_PROFILES[WORKER_PROFILE]
+# Per-worker overrides of the profile (e.g. WORKER_CONCURRENCY=4 on a bigger import box)
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "0")) or _profile["concurrency"]
+WORKER_PREFETCH_MULTIPLIER = int(os.getenv("WORKER_PREFETCH_MULTIPLIER", str(_profile["prefetch"])))
+WORKER_ACKS_LATE = os.getenv("WORKER_ACKS_LATE", "1" if _profile["acks_late"] else "0") == "1"
+# Redis redelivers an unacked message after this many seconds; with acks_late it has to
+# outlast the longest import, or a still-running import is started a second time
+BROKER_VISIBILITY_TIMEOUT = int(os.getenv("BROKER_VISIBILITY_TIMEOUT", str(6 * 3600)))
+
+
+class ProgressTask(Task):
+    """Publishes every state update on Redis pub/sub as well, for the SSE status stream."""
+
+    def update_state(self, task_id=None, state=None, meta=None, **kwargs):
+        super().update_state(task_id=task_id, state=state, meta=meta, **kwargs)
+        progress.publish(task_id or self.request.id, state, meta)
+
+
 celery = Celery(
     "worker",
     broker=REDIS_URL,
     backend=REDIS_URL, 
+    task_cls=ProgressTask,
 )
 
 celery.conf.update(
@@ -21,11 +80,75 @@ celery.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
+    task_queues=[Queue(name) for name in (IMPORT_QUEUE, BULK_QUEUE, WEBHOOK_QUEUE, DEFAULT_QUEUE)],
+    task_default_queue=DEFAULT_QUEUE,
+    task_routes={name: {"queue": queue, "priority": priority} for name, (queue, priority) in TASK_ROUTES.items()},
+    task_default_priority=5,
+    broker_transport_options={
+        "priority_steps": list(range(10)),
+        "sep": ":",
+        "visibility_timeout": BROKER_VISIBILITY_TIMEOUT,
+    },
+    worker_concurrency=WORKER_CONCURRENCY,
+    worker_prefetch_multiplier=WORKER_PREFETCH_MULTIPLIER,
+    task_acks_late=WORKER_ACKS_LATE,
+    task_reject_on_worker_lost=WORKER_ACKS_LATE,
+    beat_schedule={
+        "dispatch-webhook-events": {
+            "task": "app.tasks.webhook_task.dispatch_events",
+            "schedule": float(os.getenv("WEBHOOK_BATCH_WINDOW", "5")),
+        },
+        "purge-archived-products": {
+            "task": "app.tasks.compact_task.purge_archived",
+            "schedule": float(os.getenv("COMPACT_INTERVAL", "3600")),
+        },
+        "purge-stale-staging": {
+            "task": "app.tasks.shard_import_task.purge_stale_staging",
+            "schedule": float(os.getenv("COMPACT_INTERVAL", "3600")),
+        },
+    },
 )
 
+@celeryd_init.connect
+def select_profile_queues(sender=None, instance=None, options=None, **kwargs):
+    # an explicit -Q on the command line wins over the profile
+    if not (options or {}).get("queues"):
+        instance.app.amqp.queues.select(WORKER_PROFILES[WORKER_PROFILE]["queues"])
+    logger.info(
+        "Worker profile %s: queues=%s concurrency=%s prefetch=%s acks_late=%s",
+        WORKER_PROFILE, ",".join(WORKER_PROFILES[WORKER_PROFILE]["queues"]),
+        WORKER_CONCURRENCY or "auto", WORKER_PREFETCH_MULTIPLIER, WORKER_ACKS_LATE,
+    )
+
+
+@task_prerun.connect
+def open_job_history(task_id=None, task=None, args=(), kwargs=None, **_):
+    jobs.task_started(task_id, task.name, args or (), kwargs or {})
+
+
+@task_postrun.connect
+def close_job_history(task_id=None, task=None, state=None, retval=None, **_):
+    jobs.task_finished(task_id, task.name, state, retval)
+
+
+@task_postrun.connect
+def push_task_metrics(**kwargs):
+    # worker samples live in the worker process; hand them to the API's /metrics via Redis
+    metrics.push()
+
+
+@task_postrun.connect
+def publish_final_state(task_id=None, state=None, retval=None, **kwargs):
+    # not every task reports SUCCESS / FAILURE through update_state itself
+    if state in ("SUCCESS", "FAILURE"):
+        progress.publish(task_id, state, retval)
+
+
 TASK_MODULES = [
     "app.tasks.import_task",
+    "app.tasks.shard_import_task",
     "app.tasks.delete_task",
+    "app.tasks.compact_task",
     "app.tasks.webhook_task",
 ]
 
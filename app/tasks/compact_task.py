@@ -0,0 +1,77 @@
+import os
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from app.tasks.celery_app import celery
+from app.database import engine
+from sqlalchemy import text
+from app.services import cancellation, fingerprints
+from app.services.metrics import metrics
+from app.services.product_cache import product_cache
+
+logger = logging.getLogger(__name__)
+
+# Archived products older than this are purged for good (seconds; the beat entry runs this hourly)
+ARCHIVE_RETENTION_SECONDS = int(os.getenv("ARCHIVE_RETENTION_SECONDS", str(30 * 24 * 3600)))
+COMPACT_BATCH_SIZE = int(os.getenv("COMPACT_BATCH_SIZE", "5000"))
+
+# Walks ix_products_archived_at oldest first, so live rows are never scanned. The outer WHERE
+# repeats the predicate: a row revived by an import or create after the subselect read it is
+# re-checked once its lock is released, and then left alone.
+PURGE_BATCH_SQL = """
+    DELETE FROM products WHERE id IN (
+        SELECT id FROM products WHERE archived_at IS NOT NULL AND archived_at < :cutoff ORDER BY archived_at LIMIT :n
+    )
+    AND archived_at IS NOT NULL AND archived_at < :cutoff
+"""
+
+
+@celery.task(bind=True, name="app.tasks.compact_task.purge_archived")
+def purge_archived_task(self, older_than: Optional[int] = None, batch_size: Optional[int] = None):
+    """Hard-delete archived products older than `older_than` seconds, `batch_size` rows per committed transaction."""
+    try:
+        retention = ARCHIVE_RETENTION_SECONDS if older_than is None else older_than
+        batch_size = batch_size or COMPACT_BATCH_SIZE
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=retention)
+
+        purged = 0
+        cancelled = False
+        while True:
+            if cancellation.is_cancelled(self.request.id):
+                cancelled = True
+                break
+            with metrics.timer("task_stage_duration_seconds", task="compact", stage="purge_batch"), engine.begin() as conn:
+                n = conn.execute(text(PURGE_BATCH_SQL), {"cutoff": cutoff, "n": batch_size}).rowcount or 0
+            purged += n
+            if n < batch_size:
+                break
+            try:
+                self.update_state(state="PROGRESS", meta={
+                    "stage": "purging",
+                    "message": f"Purged {purged} archived products",
+                    "purged": purged,
+                })
+            except Exception:
+                logger.exception("Failed to update state for purge batch")
+        cancellation.clear(self.request.id)
+
+        if purged:
+            # archived rows are invisible to reads, but cached lookups by id may still hold them
+            product_cache.bump_generation()
+            fingerprints.note_write()
+
+        result = {"purged": purged, "cutoff": cutoff.isoformat(), "cancelled": cancelled}
+        try:
+            self.update_state(state="SUCCESS", meta={"stage": "done", **result})
+        except Exception:
+            logger.exception("Failed to set SUCCESS meta for purge task")
+        return result
+    except Exception as exc:
+        logger.exception("Failed to purge archived products: %s", exc)
+        exc_type = type(exc).__name__
+        try:
+            self.update_state(state="FAILURE", meta={"stage": "error", "exc_type": exc_type, "exc": str(exc)})
+        except Exception:
+            logger.exception("Could not set FAILURE meta for purge task")
+        raise
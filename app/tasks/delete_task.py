@@ -1,29 +1,122 @@
+import os
 import logging
+from typing import Optional
+
 from app.tasks.celery_app import celery
 from app.database import engine
 from sqlalchemy import text
+from app.services import cancellation, fingerprints, product_counts
+from app.services.metrics import metrics
+from app.services.product_cache import product_cache
 
 logger = logging.getLogger(__name__)
 
+# "auto" truncates when nothing references products (PostgreSQL only), otherwise deletes in batches
+DELETE_ALL_STRATEGY = os.getenv("DELETE_ALL_STRATEGY", "auto")
+DELETE_BATCH_SIZE = int(os.getenv("DELETE_BATCH_SIZE", "10000"))
+
+REFERENCED_SQL = """
+    SELECT EXISTS (SELECT 1 FROM pg_constraint WHERE contype = 'f' AND confrelid = 'products'::regclass)
+"""
+
+# Upper id of the next batch: a keyset walk, so gaps in the id sequence cost nothing
+NEXT_BATCH_SQL = """
+    SELECT max(id) FROM (
+        SELECT id FROM products WHERE id > :after AND id <= :last ORDER BY id LIMIT :n
+    ) AS batch
+"""
+
+
+def resolve_strategy(strategy: str) -> str:
+    if strategy == "batched" or engine.dialect.name != "postgresql":
+        return "batched"
+    with engine.connect() as conn:
+        referenced = conn.execute(text(REFERENCED_SQL)).scalar()
+    if referenced:
+        if strategy == "truncate":
+            logger.warning("products is referenced by a foreign key; deleting in batches instead of TRUNCATE")
+        return "batched"
+    return "truncate"
+
+
+def _truncate() -> Optional[int]:
+    """TRUNCATE products; returns the planner's row estimate (None if never analyzed), since an
+    exact count would scan the whole table just to report on it."""
+    with metrics.timer("task_stage_duration_seconds", task="delete_all", stage="truncate"), engine.begin() as conn:
+        deleted = conn.execute(text(product_counts.ESTIMATE_SQL)).scalar()
+        conn.execute(text("TRUNCATE products"))
+    return deleted
+
+
+def _delete_batched(task, batch_size: int) -> tuple[int, bool]:
+    """
+    Delete the rows that exist when the task starts, `batch_size` ids per committed transaction.
+    Returns (deleted, cancelled); rows inserted meanwhile get higher ids and are left alone.
+    """
+    with engine.connect() as conn:
+        # min / max come off the primary key; the total only feeds progress, so it is the
+        # planner's estimate (PostgreSQL only) rather than a count(*) over the whole table
+        first, last = conn.execute(text("SELECT min(id), max(id) FROM products")).one()
+        total = conn.execute(text(product_counts.ESTIMATE_SQL)).scalar() if engine.dialect.name == "postgresql" else None
+    if last is None:
+        return 0, False
+
+    deleted = 0
+    after = first - 1
+    while True:
+        if cancellation.is_cancelled(task.request.id):
+            return deleted, True
+
+        with metrics.timer("task_stage_duration_seconds", task="delete_all", stage="delete_batch"), engine.begin() as conn:
+            upper = conn.execute(text(NEXT_BATCH_SQL), {"after": after, "last": last, "n": batch_size}).scalar()
+            if upper is None:
+                break
+            res = conn.execute(text("DELETE FROM products WHERE id > :after AND id <= :upper"), {"after": after, "upper": upper})
+            deleted += res.rowcount or 0
+        after = upper
+        product_cache.bump_generation()
+        fingerprints.note_write()
+
+        try:
+            task.update_state(state="PROGRESS", meta={
+                "stage": "deleting",
+                "message": f"Deleted {deleted} of about {total} products" if total else f"Deleted {deleted} products",
+                "deleted": deleted,
+                "total": total,
+                # how far the walk is through the id range, which needs no count
+                "percentage": min(99, int((upper - first + 1) / (last - first + 1) * 100)),
+            })
+        except Exception:
+            logger.exception("Failed to update state for delete batch")
+    return deleted, False
+
 
 @celery.task(bind=True, name="app.tasks.delete_task.delete_all_products")
-def delete_all_products_task(self):
+def delete_all_products_task(self, strategy: Optional[str] = None, batch_size: Optional[int] = None):
     try:
         try:
             self.update_state(state="STARTED", meta={"stage": "started", "message": "Preparing to delete all products"})
         except Exception:
             logger.exception("Failed to set STARTED state for delete task")
 
-        with engine.begin() as conn:
-            res = conn.execute(text("DELETE FROM products"))
-            deleted = res.rowcount if res is not None else 0
+        strategy = resolve_strategy(strategy or DELETE_ALL_STRATEGY)
+        if strategy == "truncate":
+            deleted, cancelled = _truncate(), False
+        else:
+            deleted, cancelled = _delete_batched(self, batch_size or DELETE_BATCH_SIZE)
+        cancellation.clear(self.request.id)
+
+        with metrics.timer("task_stage_duration_seconds", task="delete_all", stage="invalidate"):
+            product_cache.bump_generation()
+            fingerprints.note_write()
 
+        result = {"deleted": deleted, "deleted_exact": strategy != "truncate", "strategy": strategy, "cancelled": cancelled}
         try:
-            self.update_state(state="SUCCESS", meta={"stage": "done", "deleted": deleted})
+            self.update_state(state="SUCCESS", meta={"stage": "done", **result})
         except Exception:
             logger.exception("Failed to set SUCCESS meta for delete task")
 
-        return {"deleted": deleted}
+        return result
     except Exception as exc:
         logger.exception("Failed to delete all products: %s", exc)
         exc_type = type(exc).__name__
@@ -31,4 +124,4 @@ def delete_all_products_task(self):
             self.update_state(state="FAILURE", meta={"stage": "error", "exc_type": exc_type, "exc": str(exc)})
         except Exception:
             logger.exception("Could not set FAILURE meta for delete task")
-        raise
\ No newline at end of file
+        raise
@@ -1,14 +1,412 @@
+import io
+import os
+import re
+import time
+import hashlib
 import logging
 from pathlib import Path
+from typing import Optional
 
 from app.tasks.celery_app import celery
 from app.database import engine
+from app.services import events, fingerprints, row_validation
+from app.services.formats import open_csv_source, upload_format
+from app.services.metrics import metrics
+from app.services.product_cache import product_cache
+from app.services.row_validation import ColumnMap, RejectsReport, RowFilter, split_header
+from app.services.storage import remove_upload
 
 logger = logging.getLogger(__name__)
 
+# Rows per committed batch in chunked mode; 0 keeps the single-transaction import
+IMPORT_CHUNK_ROWS = int(os.getenv("IMPORT_CHUNK_ROWS", "0"))
+# A delta import that changed at most this many products invalidates just their cache entries;
+# past it, bumping the catalog generation is cheaper
+DELTA_INVALIDATE_MAX = int(os.getenv("DELTA_INVALIDATE_MAX", "1000"))
+# Changed SKUs listed in a delta import's result (all of them get a webhook event regardless)
+DELTA_RESULT_SKUS = 1000
+# (id, sku) pairs a delta import keeps: enough to list DELTA_RESULT_SKUS and invalidate
+# DELTA_INVALIDATE_MAX products, and one more to tell either limit was passed
+DELTA_KEEP_ROWS = max(DELTA_RESULT_SKUS, DELTA_INVALIDATE_MAX) + 1
 
-@celery.task(bind=True, name="app.tasks.import_task.import_csv_task", autoretry_for=(), retry_backoff=True, retry_kwargs={'max_retries': 3})
-def import_csv_task(self, path: str):
+TMP_TABLE_SQL = """
+    CREATE TEMP TABLE tmp_products (
+        name TEXT,
+        sku TEXT,
+        description TEXT
+    ) ON COMMIT {on_commit};
+"""
+
+# Must stay in step with app.models.product_content_hash().
+CONTENT_HASH_SQL = "md5(concat_ws(E'\\x1f', sku, name, coalesce(description, '')))"
+
+# Single pass over tmp_products through the ix_products_sku_lower arbiter. Duplicates within the
+# file are collapsed with DISTINCT ON first (ON CONFLICT cannot touch the same row twice). Rows
+# whose content hash matches the stored one are dropped by the anti-join before the INSERT, so a
+# re-sent catalog never enters the conflict path; the IS DISTINCT FROM guard covers rows stored
+# before content_hash existed. Archived rows are revived in place rather than re-inserted, and
+# every row written gets version + 1. xmax = 0 on a RETURNING row means it was freshly inserted.
+UPSERT_CTE = f"""
+    WITH src AS (
+        SELECT DISTINCT ON (lower(sku)) sku, name, description, {CONTENT_HASH_SQL} AS content_hash
+        FROM tmp_products
+        ORDER BY lower(sku)
+    ),
+    changed AS (
+        SELECT s.* FROM src s
+        WHERE NOT EXISTS (
+            SELECT 1 FROM products e
+            WHERE lower(e.sku) = lower(s.sku) AND e.content_hash = s.content_hash AND e.archived_at IS NULL
+        )
+    ),
+    up AS (
+        INSERT INTO products AS p (sku, name, description, content_hash, updated_at, version)
+        SELECT sku, name, description, content_hash, now(), 1 FROM changed
+        ON CONFLICT ((lower(sku))) DO UPDATE
+        SET sku = EXCLUDED.sku,
+            name = EXCLUDED.name,
+            description = EXCLUDED.description,
+            content_hash = EXCLUDED.content_hash,
+            active = CASE WHEN p.archived_at IS NOT NULL THEN true ELSE p.active END,
+            archived_at = NULL,
+            updated_at = now(),
+            version = coalesce(p.version, 0) + 1
+        WHERE (p.sku, p.name, p.description, p.content_hash)
+              IS DISTINCT FROM (EXCLUDED.sku, EXCLUDED.name, EXCLUDED.description, EXCLUDED.content_hash)
+           OR p.archived_at IS NOT NULL
+        RETURNING p.id, p.sku, p.name, p.description, p.active, p.version, (xmax = 0) AS inserted
+    )
+"""
+
+UPSERT_SQL = UPSERT_CTE + """
+    SELECT
+        (SELECT count(*) FROM up WHERE inserted),
+        (SELECT count(*) FROM up WHERE NOT inserted),
+        (SELECT count(*) FROM src);
+"""
+
+# Delta mode: the same upsert, plus one outbox event per product it actually wrote (queued in
+# the same statement, so it commits with the batch) and the written SKUs handed back, so
+# webhooks and caches learn exactly what changed without rescanning the catalog. Only the first
+# DELTA_KEEP_ROWS written come back; the counts cover the rest.
+DELTA_UPSERT_SQL = UPSERT_CTE + """
+    , ev AS (
+        INSERT INTO webhook_events (event, data)
+        SELECT CASE WHEN inserted THEN 'product.created' ELSE 'product.updated' END,
+               json_build_object('id', id, 'sku', sku, 'name', name, 'description', description,
+                                 'active', active, 'version', version)
+        FROM up
+        ORDER BY id
+    )
+    SELECT
+        (SELECT count(*) FROM up WHERE inserted),
+        (SELECT count(*) FROM up WHERE NOT inserted),
+        (SELECT count(*) FROM src),
+        (SELECT coalesce(json_agg(json_build_array(id, sku) ORDER BY id), '[]')
+         FROM (SELECT id, sku FROM up ORDER BY id LIMIT %s) w);
+"""
+
+
+# Mirror mode: archive every live product whose SKU is not in the file just upserted
+MIRROR_SQL = """
+    UPDATE products p
+    SET active = false, archived_at = now(), updated_at = now(), version = coalesce(p.version, 0) + 1
+    WHERE p.archived_at IS NULL
+      AND NOT EXISTS (SELECT 1 FROM tmp_products t WHERE lower(t.sku) = lower(p.sku));
+"""
+
+
+def archive_missing(cur) -> int:
+    """Archive products absent from tmp_products; returns how many were archived."""
+    cur.execute(MIRROR_SQL)
+    return cur.rowcount
+
+
+def copy_into_tmp(
+    cur, fh, columns: Optional[ColumnMap] = None, first_line: int = 1, report: Optional[RejectsReport] = None
+) -> int:
+    """
+    COPY CSV from `fh` into tmp_products, mapping columns by header name; with `columns` None the
+    first record of `fh` is the header. Rows go through RowFilter unless IMPORT_VALIDATE_ROWS=0,
+    so malformed ones land in `report` instead of aborting the COPY. Returns the rows rejected.
+    """
+    if row_validation.IMPORT_VALIDATE_ROWS:
+        rows = RowFilter(columns, first_line, report)
+        cur.copy_expert("COPY tmp_products(name, sku, description) FROM STDIN WITH (FORMAT csv)", rows.stream(fh))
+        return rows.rejected
+    if columns is None:
+        columns, fh = split_header(fh)
+    cur.copy_expert(f"COPY tmp_products({', '.join(columns.copy_columns())}) FROM STDIN WITH (FORMAT csv)", fh)
+    return 0
+
+
+def report_id_for(path) -> str:
+    """Rejects report id of a file import; stable across re-runs so a resumed import keeps its report."""
+    return hashlib.sha1(str(path).encode()).hexdigest()[:20]
+
+
+class DeltaChanges:
+    """Products a delta import wrote: how many, and the (id, sku) of the first DELTA_KEEP_ROWS."""
+
+    def __init__(self):
+        self.count = 0
+        self.rows: list[tuple] = []
+
+    def add(self, count: int, rows):
+        self.count += count
+        self.rows.extend(tuple(r) for r in rows[: max(0, DELTA_KEEP_ROWS - len(self.rows))])
+
+    def extend(self, other: "DeltaChanges"):
+        self.add(other.count, other.rows)
+
+
+def upsert_from_tmp(cur, changes: Optional[DeltaChanges] = None):
+    """
+    Upsert tmp_products into products; returns (created, updated, unchanged). With `changes`
+    (delta mode) it also queues product.created / product.updated events and records the
+    products written in it.
+    """
+    if changes is None:
+        cur.execute(UPSERT_SQL)
+        created, updated, distinct = cur.fetchone()
+    else:
+        cur.execute(DELTA_UPSERT_SQL, (DELTA_KEEP_ROWS,))
+        created, updated, distinct, written = cur.fetchone()
+        changes.add(created + updated, written)
+    return created, updated, distinct - created - updated
+
+
+def note_changes(result: dict, changes: Optional[DeltaChanges]):
+    """Changed SKUs of a delta import into its result, capped at DELTA_RESULT_SKUS."""
+    if changes is None:
+        return
+    result["changed"] = changes.count
+    result["changed_skus"] = [sku for _, sku in changes.rows[:DELTA_RESULT_SKUS]]
+    if changes.count > DELTA_RESULT_SKUS:
+        result["changed_skus_truncated"] = True
+
+
+def refresh_cache(changes: Optional[DeltaChanges]):
+    """After commit: drop just the changed products from the cache when a delta import knows them."""
+    if changes is None or changes.count > DELTA_INVALIDATE_MAX:
+        product_cache.bump_generation()
+    elif changes.count:
+        product_cache.invalidate_many(changes.rows)
+
+
+CHECKPOINT_SQL = """
+    INSERT INTO import_checkpoints (path, byte_offset, rows_done, created, updated, unchanged)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON CONFLICT (path) DO UPDATE
+    SET byte_offset = EXCLUDED.byte_offset,
+        rows_done = EXCLUDED.rows_done,
+        created = EXCLUDED.created,
+        updated = EXCLUDED.updated,
+        unchanged = EXCLUDED.unchanged,
+        updated_at = now();
+"""
+
+
+_QUOTE_OR_DELIMITER = re.compile(rb'[",]')
+
+
+def _ends_in_quote(line: bytes, in_quote: bool) -> bool:
+    """
+    Whether a quoted field is still open at the end of `line`, given whether one was open at its
+    start. As in the csv module, a quote only opens a field at the field's first byte, so a stray
+    one inside an unquoted field (5" screen) is data; "" inside a quoted field is an escaped quote.
+    """
+    field_start = None if in_quote else 0
+    closed_at = None
+    for m in _QUOTE_OR_DELIMITER.finditer(line):
+        i = m.start()
+        if m.group() == b",":
+            if not in_quote:
+                field_start = i + 1
+        elif in_quote:
+            in_quote = False
+            closed_at = i
+        elif i == field_start or (closed_at is not None and i == closed_at + 1):
+            in_quote = True
+    return in_quote
+
+
+def iter_csv_records(fh):
+    """
+    Yield (record_bytes, end_offset) for each CSV record of a binary file handle.
+
+    Quoted fields may contain newlines, so a record ends at the first newline outside one. A
+    quote left open past MAX_FIELD_SIZE bytes ends its record there, as the csv module gives up
+    on such a field at the same size, so RowFilter rejects it and parsing resumes on the next line.
+    """
+    parts: list[bytes] = []
+    size = 0
+    in_quote = False
+    for line in iter(fh.readline, b""):
+        parts.append(line)
+        size += len(line)
+        if b'"' in line:
+            in_quote = _ends_in_quote(line, in_quote)
+        if not in_quote or size > row_validation.MAX_FIELD_SIZE:
+            yield b"".join(parts), fh.tell()
+            parts, size, in_quote = [], 0, False
+    if parts:
+        yield b"".join(parts), fh.tell()
+
+
+def _count_lines(pathp: Path, end: int) -> int:
+    """Newlines in the first `end` bytes, to number lines again when resuming mid-file."""
+    lines = 0
+    with open(pathp, "rb") as fh:
+        while end > 0:
+            chunk = fh.read(min(end, 4 * 1024 * 1024))
+            if not chunk:
+                break
+            lines += chunk.count(b"\n")
+            end -= len(chunk)
+    return lines
+
+
+def note_rejects(result: dict, report: RejectsReport, task: str):
+    result["rejected"] = report.count
+    if report.count:
+        result["rejects_url"] = report.url
+        metrics.inc("import_rows_rejected_total", report.count, task=task)
+    row_validation.prune_reports()
+
+
+def _import_chunked(task, pathp: Path, chunk_rows: int, delta: bool = False):
+    """
+    COPY + upsert the file in batches of `chunk_rows`, committing each batch together with
+    its import_checkpoints row. A re-run for the same path resumes after the last committed batch
+    (in delta mode its result then lists the products changed by this run only).
+    """
+    total_bytes = pathp.stat().st_size or 1
+    started = time.perf_counter()
+    raw_conn = None
+    cur = None
+
+    try:
+        raw_conn = engine.raw_connection()
+        cur = raw_conn.cursor()
+        cur.execute(TMP_TABLE_SQL.format(on_commit="DELETE ROWS"))
+
+        cur.execute(
+            "SELECT byte_offset, rows_done, created, updated, unchanged FROM import_checkpoints WHERE path = %s",
+            (str(pathp),),
+        )
+        row = cur.fetchone()
+        offset, rows_done, created, updated, unchanged = row if row else (0, 0, 0, 0, 0)
+        report = RejectsReport(report_id_for(pathp))
+        changes = DeltaChanges() if delta else None
+        line = 2  # physical line of the next record (the header is line 1)
+        if row:
+            logger.info("Resuming import of %s at byte %s (%s rows done)", pathp, offset, rows_done)
+            report.resume()
+            line = _count_lines(pathp, offset) + 1
+        else:
+            report.reset()
+
+        def flush(batch, end_offset):
+            nonlocal rows_done, created, updated, unchanged, line
+            with metrics.timer("task_stage_duration_seconds", task="import_chunked", stage="copy"):
+                data = b"".join(batch)
+                copy_into_tmp(cur, io.BytesIO(data), columns, line, report)
+                line += data.count(b"\n")
+            batch_changes = DeltaChanges() if delta else None
+            with metrics.timer("task_stage_duration_seconds", task="import_chunked", stage="upsert"):
+                batch_created, batch_updated, batch_unchanged = upsert_from_tmp(cur, batch_changes)
+            created += batch_created
+            updated += batch_updated
+            unchanged += batch_unchanged
+            rows_done += len(batch)
+            cur.execute(CHECKPOINT_SQL, (str(pathp), end_offset, rows_done, created, updated, unchanged))
+            with metrics.timer("task_stage_duration_seconds", task="import_chunked", stage="commit"):
+                raw_conn.commit()
+            report.flush()  # only now: a batch rolled back and retried must not list its rejects twice
+            refresh_cache(batch_changes)
+            if delta:
+                changes.extend(batch_changes)
+            fingerprints.note_write()
+
+            try:
+                task.update_state(state="PROGRESS", meta={
+                    "stage": "importing",
+                    "message": f"Imported {rows_done} rows",
+                    "processed": rows_done,
+                    "created": created,
+                    "updated": updated,
+                    "unchanged": unchanged,
+                    "rejected": report.count,
+                    "percentage": int(end_offset / total_bytes * 100),
+                })
+            except Exception:
+                logger.exception("Failed to update state for batch")
+
+        with open(pathp, "rb") as fh:
+            records = iter_csv_records(fh)
+            header = next(records, None)
+            if header is None:
+                raise ValueError("File is empty")
+            columns = ColumnMap.from_line(header[0].decode("utf-8-sig"))
+            if offset:
+                fh.seek(offset)
+
+            batch = []
+            for record, end_offset in records:
+                batch.append(record)
+                if len(batch) >= chunk_rows:
+                    flush(batch, end_offset)
+                    batch = []
+            if batch:
+                flush(batch, end_offset)
+
+        result = {"created": created, "updated": updated, "unchanged": unchanged, "total": rows_done - report.count}
+        note_rejects(result, report, "import_chunked")
+        note_changes(result, changes)
+        cur.execute("DELETE FROM import_checkpoints WHERE path = %s", (str(pathp),))
+        events.emit_raw(cur, events.IMPORT_COMPLETED, {"file": pathp.name, **result})
+        raw_conn.commit()
+        metrics.record_import("import_chunked", rows_done, time.perf_counter() - started)
+
+        try:
+            task.update_state(state="SUCCESS", meta={**result, "percentage": 100})
+        except Exception:
+            logger.exception("Failed to set SUCCESS meta")
+        return result
+
+    except Exception:
+        try:
+            if raw_conn is not None:
+                raw_conn.rollback()
+        except Exception:
+            logger.exception("Failed to rollback connection after exception")
+        raise
+
+    finally:
+        try:
+            if cur is not None:
+                cur.close()
+        except Exception:
+            logger.exception("Error closing cursor")
+        try:
+            if raw_conn is not None:
+                raw_conn.close()
+        except Exception:
+            logger.exception("Error closing raw connection")
+
+
+@celery.task(bind=True, name="app.tasks.import_task.import_csv_task", autoretry_for=(), retry_backoff=True, retry_kwargs={'max_retries': 3},
+             acks_late=True, reject_on_worker_lost=True)
+def import_csv_task(
+    self, path: str, chunk_rows: Optional[int] = None, sha256: Optional[str] = None, mirror: bool = False, delta: bool = False
+):
+    """
+    Import an uploaded file. Every file is a full snapshot unless `delta`: then it may hold only
+    the rows that changed, and every product actually written gets its own product.created /
+    product.updated event and is listed in the result's changed_skus.
+    """
+    started = time.perf_counter()
     try:
         self.update_state(state="STARTED", meta={"stage": "parsing", "message": "Parsing CSV / copying to temporary table"})
     except Exception:
@@ -39,10 +437,32 @@ def import_csv_task(self, path: str):
             logger.exception("Could not set FAILURE meta")
         raise RuntimeError(msg)
 
+    fmt = upload_format(pathp.name) or "csv"
+    if chunk_rows is None:
+        chunk_rows = IMPORT_CHUNK_ROWS
+    # resumable batches checkpoint byte offsets into the file, which only plain CSV has, and
+    # mirror mode needs every SKU of the file in one temp table
+    if fmt != "csv" or mirror:
+        chunk_rows = 0
+    if chunk_rows and chunk_rows > 0:
+        try:
+            result = _import_chunked(self, pathp, chunk_rows, delta)
+            fingerprints.record(sha256, self.request.id, result, fingerprints.note_write())
+            remove_upload(path)
+            return result
+        except Exception as exc:
+            logger.exception("Chunked import failed: %s", exc)
+            try:
+                self.update_state(state="FAILURE", meta={"stage": "error", "exc_type": type(exc).__name__, "exc": str(exc)})
+            except Exception:
+                logger.exception("Could not set FAILURE meta")
+            raise
+
     raw_conn = None
     cur = None
     created = 0
     updated = 0
+    unchanged = 0
     total_rows = 0
 
     try:
@@ -50,112 +470,71 @@ def import_csv_task(self, path: str):
         cur = raw_conn.cursor()
 
         # create temp table
-        cur.execute("""
-            CREATE TEMP TABLE tmp_products (
-                name TEXT,
-                sku TEXT,
-                description TEXT
-            ) ON COMMIT DROP;
-        """)
-
-        # COPY CSV into temp table, detect header
-        with open(pathp, "r", encoding="utf-8") as fh:
-            copy_sql = """
-                COPY tmp_products(name, sku, description)
-                FROM STDIN
-                WITH (FORMAT csv, HEADER true)
-            """
-            cur.copy_expert(copy_sql, fh)
+        cur.execute(TMP_TABLE_SQL.format(on_commit="DROP"))
+
+        # COPY into the temp table, decompressing / converting on the fly for non-CSV uploads and
+        # validating rows in the same pass
+        report = RejectsReport(report_id_for(pathp))
+        report.reset()
+        with metrics.timer("task_stage_duration_seconds", task="import", stage="copy"), open_csv_source(pathp, fmt) as fh:
+            copy_into_tmp(cur, fh, report=report)
+        report.flush()
 
         # Count total rows in tmp table
-        cur.execute("SELECT count(*) FROM tmp_products;")
-        total_rows = cur.fetchone()[0] or 0
+        with metrics.timer("task_stage_duration_seconds", task="import", stage="count"):
+            cur.execute("SELECT count(*) FROM tmp_products;")
+            total_rows = cur.fetchone()[0] or 0
 
         try:
             self.update_state(state="PROGRESS", meta={"stage": "parsed", "message": "File parsed", "total": total_rows})
         except Exception:
             logger.exception("Failed to update state: parsed")
 
-        if total_rows == 0:
+        if total_rows == 0:  # also keeps mirror mode from archiving the whole catalog on an empty file
             raw_conn.commit()
-            result = {"created": 0, "updated": 0, "total": 0}
+            result = {"created": 0, "updated": 0, "unchanged": 0, "total": 0}
+            note_rejects(result, report, "import")
+            note_changes(result, DeltaChanges() if delta else None)
             try:
                 self.update_state(state="SUCCESS", meta=result)
             except Exception:
                 logger.exception("Failed to set SUCCESS meta for empty file")
+            remove_upload(path)
             return result
 
-        # 1) Update existing products (case-insensitive)
+        # Upsert in one pass (case-insensitive on sku, no-op rows skipped)
         try:
-            self.update_state(state="PROGRESS", meta={"stage": "updating", "message": "Updating existing products", "total": total_rows})
+            self.update_state(state="PROGRESS", meta={"stage": "upserting", "message": "Upserting products", "total": total_rows})
         except Exception:
-            logger.exception("Failed to update state: updating")
-
-        update_sql = """
-            WITH up AS (
-                UPDATE products p
-                SET name = t.name,
-                    description = t.description,
-                    sku = t.sku
-                FROM tmp_products t
-                WHERE lower(p.sku) = lower(t.sku)
-                RETURNING p.id
-            )
-            SELECT count(*) FROM up;
-        """
-        cur.execute(update_sql)
-        updated = cur.fetchone()[0] or 0
+            logger.exception("Failed to update state: upserting")
 
-        try:
-            percent_after_update = int((updated / total_rows) * 100) if total_rows else 0
-            self.update_state(state="PROGRESS", meta={
-                "stage": "updating",
-                "message": "Updated existing products",
-                "total": total_rows,
-                "updated": updated,
-                "percentage": percent_after_update
-            })
-        except Exception:
-            logger.exception("Failed to update state after update stage")
+        changes = DeltaChanges() if delta else None
+        with metrics.timer("task_stage_duration_seconds", task="import", stage="upsert"):
+            created, updated, unchanged = upsert_from_tmp(cur, changes)
 
-        # 2) Insert new rows — deduplicate tmp_products by lower(sku) to avoid multiple inserts for same SKU
-        try:
-            self.update_state(state="PROGRESS", meta={"stage": "inserting", "message": "Inserting new products (deduped)", "total": total_rows, "updated": updated})
-        except Exception:
-            logger.exception("Failed to update state: inserting")
-
-        # Deduped subquery: pick one row per lower(sku). DISTINCT ON chooses the first row for each lower(sku).
-        # Ordering determines which duplicate is kept; here we use ORDER BY lower(sku) (keeps first encountered).
-        insert_sql = """
-            INSERT INTO products (sku, name, description)
-            SELECT q.sku, q.name, q.description
-            FROM (
-                SELECT DISTINCT ON (lower(sku)) sku, name, description
-                FROM tmp_products
-                ORDER BY lower(sku)
-            ) q
-            WHERE NOT EXISTS (
-                SELECT 1 FROM products p WHERE lower(p.sku) = lower(q.sku)
-            )
-            RETURNING id;
-        """
-
-        # Execute insert — since we deduped by lower(sku) inside the subquery, UNIQUE violations should not occur
-        cur.execute(insert_sql)
-        inserted_rows = cur.fetchall() or []
-        created = len(inserted_rows)
-
-        processed_total = updated + created
-        final_percent = int((processed_total / total_rows) * 100) if total_rows else 100
-
-        raw_conn.commit()
+        result = {"created": created, "updated": updated, "unchanged": unchanged, "total": total_rows}
+        note_rejects(result, report, "import")
+        note_changes(result, changes)
+        if mirror and report.count:
+            # a rejected row's SKU is missing from tmp_products, but not from the catalog
+            logger.warning("Skipping mirror archive for %s: %s rows were rejected", pathp, report.count)
+            result["archived"] = 0
+        elif mirror:
+            with metrics.timer("task_stage_duration_seconds", task="import", stage="mirror"):
+                result["archived"] = archive_missing(cur)
+        events.emit_raw(cur, events.IMPORT_COMPLETED, {"file": pathp.name, **result})
+        with metrics.timer("task_stage_duration_seconds", task="import", stage="commit"):
+            raw_conn.commit()
+        metrics.record_import("import", total_rows, time.perf_counter() - started)
+        refresh_cache(changes)
+        fingerprints.record(sha256, self.request.id, result, fingerprints.note_write())
 
-        result = {"created": created, "updated": updated, "total": total_rows}
         try:
-            self.update_state(state="SUCCESS", meta={**result, "percentage": final_percent})
+            self.update_state(state="SUCCESS", meta={**result, "percentage": 100})
         except Exception:
             logger.exception("Failed to set SUCCESS meta")
 
+        remove_upload(path)
         return result
 
     except Exception as exc:
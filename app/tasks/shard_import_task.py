@@ -0,0 +1,295 @@
+import os
+import time
+import logging
+import uuid
+from pathlib import Path
+from typing import Optional
+
+from celery import chord, group
+
+from app.tasks.celery_app import celery
+from app.tasks.import_task import (
+    TMP_TABLE_SQL,
+    DeltaChanges,
+    archive_missing,
+    copy_into_tmp,
+    iter_csv_records,
+    note_changes,
+    note_rejects,
+    refresh_cache,
+    upsert_from_tmp,
+)
+from sqlalchemy import text
+
+from app.database import engine
+from app.services import events, fingerprints
+from app.services.metrics import metrics
+from app.services.row_validation import ColumnMap, RejectsReport, merge_parts
+from app.services.storage import EXPECTED_HEADER, remove_upload
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on the shards one import fans out over; more only adds tasks and merge overhead
+MAX_SHARDS = int(os.getenv("MAX_SHARDS", "32"))
+# Staged rows older than this (seconds) belong to a job whose merge never ran and are purged
+STAGING_MAX_AGE = int(os.getenv("STAGING_MAX_AGE", str(24 * 3600)))
+
+# Shared across connections (temp tables are not), unlogged because it is scratch space.
+# created_at is added to tables from before it existed only when missing, so the ALTER's
+# exclusive lock is not taken on every import.
+STAGING_TABLE_SQL = """
+    CREATE UNLOGGED TABLE IF NOT EXISTS import_staging (
+        job_id TEXT NOT NULL,
+        name TEXT,
+        sku TEXT,
+        description TEXT,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    );
+    CREATE INDEX IF NOT EXISTS ix_import_staging_job_id ON import_staging (job_id);
+    DO $$ BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'import_staging' AND column_name = 'created_at'
+        ) THEN
+            ALTER TABLE import_staging ADD COLUMN created_at TIMESTAMPTZ NOT NULL DEFAULT now();
+        END IF;
+    END $$;
+"""
+
+
+class _RangeReader:
+    """File-like view of bytes [start, end) of a file, for copy_expert."""
+
+    def __init__(self, fh, start: int, end: int):
+        fh.seek(start)
+        self.fh = fh
+        self.remaining = end - start
+
+    def read(self, size: int = -1) -> bytes:
+        if self.remaining <= 0:
+            return b""
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.fh.read(size)
+        self.remaining -= len(data)
+        return data
+
+
+def split_ranges(pathp: Path, shards: int) -> tuple[Optional[list[str]], list[tuple[int, int, int]]]:
+    """
+    Split the data rows of a CSV into at most `shards` byte ranges that start and end on
+    record boundaries. Boundaries come from one sequential scan, since a quoted field can
+    contain newlines and a seek to an arbitrary offset cannot tell where a record starts.
+    Returns the header columns and (start, end, first line number) per range.
+    """
+    size = pathp.stat().st_size
+    with open(pathp, "rb") as fh:
+        records = iter_csv_records(fh)
+        header = next(records, None)
+        if header is None:
+            return None, []
+        columns = ColumnMap.from_line(header[0].decode("utf-8-sig")).names
+        start = header[1]
+        line = header[0].count(b"\n") + 1  # line number of the next record
+        targets = [start + (size - start) * k // shards for k in range(1, shards)]
+
+        bounds = [(start, line)]
+        for record, end in records:
+            line += record.count(b"\n")
+            if targets and end >= targets[0]:
+                while targets and end >= targets[0]:
+                    targets.pop(0)
+                bounds.append((end, line))
+
+    if bounds[-1][0] != size:
+        bounds.append((size, None))
+    return columns, [(lo, hi, first) for (lo, first), (hi, _) in zip(bounds, bounds[1:]) if hi > lo]
+
+
+def ensure_staging_table():
+    with engine.begin() as conn:
+        conn.exec_driver_sql(STAGING_TABLE_SQL)
+
+
+def discard_staging(job_id: str):
+    """Drop whatever a failed or abandoned job left in import_staging."""
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM import_staging WHERE job_id = :job_id"), {"job_id": job_id})
+
+
+def copy_into_staging(
+    raw_conn, fileobj, job_id: str, columns: Optional[ColumnMap] = None, first_line: int = 1, report=None
+) -> int:
+    """
+    COPY CSV data from `fileobj` into import_staging under `job_id` and commit; returns the row
+    count. With `columns` None, `fileobj` starts with the header. Rejects are flushed to `report`.
+    """
+    cur = raw_conn.cursor()
+    cur.execute(TMP_TABLE_SQL.format(on_commit="DROP"))
+    copy_into_tmp(cur, fileobj, columns, first_line, report)
+    cur.execute(
+        "INSERT INTO import_staging (job_id, name, sku, description) SELECT %s, name, sku, description FROM tmp_products",
+        (job_id,),
+    )
+    rows = cur.rowcount
+    raw_conn.commit()
+    if report is not None:
+        report.flush()
+    return rows
+
+
+@celery.task(bind=True, name="app.tasks.shard_import_task.import_csv_shard")
+def import_csv_shard_task(
+    self, path: str, job_id: str, start: int, end: int, columns: Optional[list] = None, first_line: int = 2
+):
+    raw_conn = engine.raw_connection()
+    report = RejectsReport(job_id, part=start)
+    report.reset()
+    started = time.perf_counter()
+    try:
+        with metrics.timer("task_stage_duration_seconds", task="import_shard", stage="copy"), open(path, "rb") as fh:
+            column_map = ColumnMap(columns or EXPECTED_HEADER)
+            rows = copy_into_staging(raw_conn, _RangeReader(fh, start, end), job_id, column_map, first_line, report)
+        seconds = round(time.perf_counter() - started, 3)
+        return {"rows": rows, "rejected": report.count, "start": start, "end": end, "seconds": seconds}
+    except Exception:
+        raw_conn.rollback()
+        logger.exception("Shard %s-%s of %s failed", start, end, path)
+        raise
+    finally:
+        raw_conn.close()
+
+
+@celery.task(bind=True, name="app.tasks.shard_import_task.merge_import_shards")
+def merge_import_shards_task(
+    self, shard_results: list, path: str, job_id: str, sha256: Optional[str] = None, mirror: bool = False,
+    delta: bool = False,
+):
+    """
+    Chord callback: move every shard's rows into tmp_products and run the same upsert as the
+    serial import, so duplicates across shards collapse by lower(sku) exactly as they would there.
+    Also used on its own to finish a streamed upload that was COPYed straight into import_staging.
+    """
+    try:
+        self.update_state(state="PROGRESS", meta={"stage": "merging", "message": f"Merging {len(shard_results)} shards"})
+    except Exception:
+        logger.exception("Failed to update state: merging")
+
+    # shards ran in other workers; the slowest one is what the job waited for (a streamed
+    # upload was COPYed by the API and has no timing here)
+    slowest = max((r.get("seconds", 0) for r in shard_results), default=0)
+    if slowest:
+        metrics.note_stage("shards", slowest)
+
+    raw_conn = engine.raw_connection()
+    try:
+        cur = raw_conn.cursor()
+        cur.execute(TMP_TABLE_SQL.format(on_commit="DROP"))
+        with metrics.timer("task_stage_duration_seconds", task="import_merge", stage="gather"):
+            cur.execute(
+                "INSERT INTO tmp_products (name, sku, description) SELECT name, sku, description FROM import_staging WHERE job_id = %s",
+                (job_id,),
+            )
+            total_rows = cur.rowcount
+        changes = DeltaChanges() if delta else None
+        with metrics.timer("task_stage_duration_seconds", task="import_merge", stage="upsert"):
+            created, updated, unchanged = upsert_from_tmp(cur, changes)
+        result = {
+            "created": created,
+            "updated": updated,
+            "unchanged": unchanged,
+            "total": total_rows,
+            "shards": len(shard_results),
+        }
+        report = RejectsReport(job_id)
+        report.count = merge_parts(job_id)
+        note_rejects(result, report, "import_merge")
+        note_changes(result, changes)
+        if mirror and report.count:
+            # a rejected row's SKU is missing from tmp_products, but not from the catalog
+            logger.warning("Skipping mirror archive for %s: %s rows were rejected", path, report.count)
+            result["archived"] = 0
+        elif mirror and total_rows:
+            result["archived"] = archive_missing(cur)
+        cur.execute("DELETE FROM import_staging WHERE job_id = %s", (job_id,))
+        events.emit_raw(cur, events.IMPORT_COMPLETED, {"file": Path(path).name, **result})
+        with metrics.timer("task_stage_duration_seconds", task="import_merge", stage="commit"):
+            raw_conn.commit()
+        metrics.inc("import_rows_total", total_rows, task="import_merge")
+        refresh_cache(changes)
+        fingerprints.record(sha256, self.request.id, result, fingerprints.note_write())
+    except Exception:
+        raw_conn.rollback()
+        logger.exception("Merging shards for %s failed", path)
+        try:
+            discard_staging(job_id)
+        except Exception:
+            logger.exception("Could not discard staged rows of %s", job_id)
+        raise
+    finally:
+        raw_conn.close()
+
+    remove_upload(path)
+    return result
+
+
+@celery.task(name="app.tasks.shard_import_task.discard_staging")
+def discard_staging_task(job_id: str):
+    """Chord error callback: a failed shard means the merge never runs, so nothing else deletes the rows."""
+    discard_staging(job_id)
+
+
+@celery.task(name="app.tasks.shard_import_task.purge_stale_staging")
+def purge_stale_staging_task(older_than: Optional[int] = None) -> dict:
+    """
+    Beat task: delete staged rows older than STAGING_MAX_AGE, left by a streamed upload whose
+    merge was never delivered or a worker killed before either cleanup above could run.
+    """
+    if engine.dialect.name != "postgresql":
+        return {"purged": 0}
+    with engine.begin() as conn:
+        if conn.execute(text("SELECT to_regclass('import_staging')")).scalar() is None:
+            return {"purged": 0}
+        purged = conn.execute(
+            text("DELETE FROM import_staging WHERE created_at < now() - make_interval(secs => :age)"),
+            {"age": STAGING_MAX_AGE if older_than is None else older_than},
+        ).rowcount or 0
+    if purged:
+        logger.warning("Purged %s stale rows from import_staging", purged)
+    return {"purged": purged}
+
+
+@celery.task(bind=True, name="app.tasks.shard_import_task.import_csv_parallel")
+def import_csv_parallel_task(
+    self, path: str, shards: int = 4, sha256: Optional[str] = None, mirror: bool = False, delta: bool = False
+):
+    """
+    Fan an import out over `shards` workers (at most MAX_SHARDS). The task replaces itself with the
+    group/chord, so its task id resolves to the merge result like a serial import's does.
+    """
+    shards = min(max(1, shards), MAX_SHARDS)
+    pathp = Path(path)
+    if not pathp.exists():
+        raise FileNotFoundError(f"CSV file not found: {path}")
+    if engine.dialect.name != "postgresql":
+        raise RuntimeError("Parallel COPY import requires PostgreSQL.")
+
+    try:
+        self.update_state(state="PROGRESS", meta={"stage": "splitting", "message": f"Splitting file into {shards} shards"})
+    except Exception:
+        logger.exception("Failed to update state: splitting")
+
+    columns, ranges = split_ranges(pathp, shards)
+    if not ranges:
+        return {"created": 0, "updated": 0, "unchanged": 0, "total": 0, "shards": 0}
+
+    ensure_staging_table()
+
+    job_id = uuid.uuid4().hex
+    workflow = chord(
+        group(import_csv_shard_task.s(path, job_id, lo, hi, columns, first) for lo, hi, first in ranges),
+        merge_import_shards_task.s(path, job_id, sha256=sha256, mirror=mirror, delta=delta).on_error(
+            discard_staging_task.si(job_id)
+        ),
+    )
+    raise self.replace(workflow)
@@ -1,22 +1,126 @@
+import os
+import json
 import logging
-import requests
+import httpx
 import time
+from collections import OrderedDict, defaultdict
+from typing import Optional
+
+from sqlalchemy import delete, select
+
 from app.tasks.celery_app import celery
+from app.database import SessionLocal
+from app import models
+from app.services.delivery import SIGNATURE_HEADER, CircuitOpenError, get_delivery_engine, sign_payload
+from app.services.subscriptions import registry
 
 logger = logging.getLogger(__name__)
 
-@celery.task(bind=True, name="app.tasks.webhook_task.send_webhook", autoretry_for=(requests.RequestException,), retry_backoff=True, retry_kwargs={'max_retries': 3})
-def send_webhook(self, url: str, payload: dict, headers: dict = None, timeout: int = 10):
+# Max events per delivered payload, and how often the outbox is drained (the coalescing window)
+WEBHOOK_BATCH_SIZE = int(os.getenv("WEBHOOK_BATCH_SIZE", "500"))
+WEBHOOK_BATCH_WINDOW = float(os.getenv("WEBHOOK_BATCH_WINDOW", "5"))
+# Max outbox rows claimed per dispatcher run
+WEBHOOK_DISPATCH_LIMIT = int(os.getenv("WEBHOOK_DISPATCH_LIMIT", "10000"))
+# Deliveries re-queued when retries run out are gone (the outbox rows are already dispatched), so
+# allow enough retries to outlast an open breaker: each one waits for the breaker's cooldown
+WEBHOOK_MAX_RETRIES = int(os.getenv("WEBHOOK_MAX_RETRIES", "8"))
+
+@celery.task(bind=True, name="app.tasks.webhook_task.send_webhook", autoretry_for=(httpx.HTTPError,), retry_backoff=True,
+             retry_backoff_max=600, retry_kwargs={'max_retries': WEBHOOK_MAX_RETRIES})
+def send_webhook(self, url: str, payload: dict, headers: dict = None, timeout: int = 10, secret: Optional[str] = None):
+    # serialize once so the HMAC covers exactly the bytes that go over the wire
+    body = json.dumps(payload, separators=(",", ":"), default=str).encode()
+    headers = {"Content-Type": "application/json", **(headers or {})}
+    if secret:
+        headers[SIGNATURE_HEADER] = sign_payload(secret, body)
     try:
         start = time.time()
-        r = requests.post(url, json=payload, headers=headers or {}, timeout=timeout)
+        engine = get_delivery_engine()
+        r = engine.post(url, body, headers=headers, timeout=timeout)
         elapsed = time.time() - start
+        if engine.is_failure(r):
+            # 5xx / 429 count against the breaker too; raising hands them to autoretry
+            raise httpx.HTTPStatusError(f"Webhook endpoint answered {r.status_code}", request=r.request, response=r)
         result = {"status_code": r.status_code, "elapsed": elapsed, "text": r.text[:500]}
         try:
             self.update_state(state="SUCCESS", meta=result)
         except Exception:
             logger.exception("Failed to set success meta for webhook task")
         return result
-    except requests.RequestException as exc:
+    except CircuitOpenError as exc:
+        # backing off by seconds would only hit the open breaker again: wait out its cooldown
+        logger.warning("Circuit open for %s; deferring delivery %.0fs", url, exc.retry_after)
+        raise self.retry(exc=exc, countdown=exc.retry_after + 1)
+    except httpx.HTTPError as exc:
         logger.exception("Webhook POST failed")
-        raise
\ No newline at end of file
+        raise
+
+
+def _coalesce(events: list) -> list:
+    """Keep only the latest event per entity (by data["id"]) so a burst of edits sends one entry."""
+    latest = OrderedDict()
+    for ev in events:
+        key = ev.data.get("id", f"event-{ev.id}") if isinstance(ev.data, dict) else f"event-{ev.id}"
+        latest.pop(key, None)
+        latest[key] = ev
+    return list(latest.values())
+
+
+@celery.task(bind=True, name="app.tasks.webhook_task.dispatch_events")
+def dispatch_events(self):
+    """
+    Drain the webhook_events outbox: group pending events by type, coalesce them, and enqueue
+    one signed send_webhook per subscriber per WEBHOOK_BATCH_SIZE events. Drained events are
+    deleted in the same transaction, so the outbox only ever holds what is still pending.
+    Runs on the beat schedule every WEBHOOK_BATCH_WINDOW seconds.
+    """
+    db = SessionLocal()
+    try:
+        # rows only marked dispatched, before drained events were deleted
+        stale = select(models.WebhookEvent.id).where(models.WebhookEvent.dispatched_at.isnot(None)).limit(WEBHOOK_DISPATCH_LIMIT)
+        pruned = db.execute(delete(models.WebhookEvent).where(models.WebhookEvent.id.in_(stale))).rowcount or 0
+        pending = (
+            db.query(models.WebhookEvent)
+            .filter(models.WebhookEvent.dispatched_at.is_(None))
+            .order_by(models.WebhookEvent.id)
+            .limit(WEBHOOK_DISPATCH_LIMIT)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        if not pending:
+            db.commit()
+            return {"events": 0, "batches": 0, "pruned": pruned}
+
+        by_event = defaultdict(list)
+        for ev in pending:
+            by_event[ev.event].append(ev)
+
+        batches = 0
+        for event, evs in by_event.items():
+            evs = _coalesce(evs)
+            for wh in registry.get(event):
+                for i in range(0, len(evs), WEBHOOK_BATCH_SIZE):
+                    chunk = evs[i:i + WEBHOOK_BATCH_SIZE]
+                    payload = {
+                        "event": event,
+                        "count": len(chunk),
+                        "events": [
+                            {"id": ev.id, "created_at": ev.created_at.isoformat() if ev.created_at else None, "data": ev.data}
+                            for ev in chunk
+                        ],
+                    }
+                    send_webhook.delay(wh.url, payload, secret=wh.secret)
+                    batches += 1
+
+        db.execute(
+            delete(models.WebhookEvent).where(models.WebhookEvent.id.in_([ev.id for ev in pending])),
+            execution_options={"synchronize_session": False},
+        )
+        db.commit()
+        return {"events": len(pending), "batches": batches, "pruned": pruned}
+    except Exception:
+        db.rollback()
+        logger.exception("Webhook event dispatch failed")
+        raise
+    finally:
+        db.close()
@@ -0,0 +1,99 @@
+"""
+Sync (threadpool) vs. async (DB_ASYNC=1) request path under concurrent listing and lookup traffic.
+
+    python -m benchmarks.bench_api_load --concurrency 200 --duration 20
+
+Starts the API under uvicorn once per mode against DATABASE_URL (seeding a few thousand
+"BENCH-" products if needed) and reports requests/s and latency percentiles.
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+
+import httpx
+from sqlalchemy import text
+
+from app.database import Base, engine
+from benchmarks.bench_search import seed
+
+
+async def hammer(base: str, concurrency: int, duration: float, max_id: int):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=30) as client:
+        async def worker(seed_: int):
+            nonlocal errors
+            rng = random.Random(seed_)
+            while time.perf_counter() < deadline:
+                if rng.random() < 0.5:
+                    path = f"/api/products/?page={rng.randint(1, 50)}&per_page=20"
+                else:
+                    path = f"/api/products/{rng.randint(1, max_id)}"
+                t0 = time.perf_counter()
+                try:
+                    r = await client.get(path)
+                    if r.status_code >= 500:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - t0)
+
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return latencies, errors
+
+
+def run_mode(async_mode: bool, args, max_id: int):
+    env = {**os.environ, "DB_ASYNC": "1" if async_mode else "0", "PRODUCT_CACHE_TTL": "0"}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+        env=env,
+    )
+    base = f"http://127.0.0.1:{args.port}"
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(base + "/api/products/?per_page=1", timeout=1)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.2)
+        latencies, errors = asyncio.run(hammer(base, args.concurrency, args.duration, max_id))
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    latencies.sort()
+    n = len(latencies)
+    pct = lambda q: latencies[min(n - 1, int(n * q))] * 1000 if n else 0.0
+    label = "async" if async_mode else "sync "
+    print(f"{label} {n / args.duration:8.0f} req/s  p50={pct(0.5):7.1f}ms  p99={pct(0.99):7.1f}ms  errors={errors}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        have = conn.execute(text("SELECT count(*) FROM products WHERE sku LIKE 'BENCH-%'")).scalar()
+        if have < args.rows:
+            seed(conn, have, args.rows)
+        max_id = conn.execute(text("SELECT max(id) FROM products")).scalar() or 1
+
+    print(f"concurrency={args.concurrency} duration={args.duration}s (product cache disabled)")
+    run_mode(False, args, max_id)
+    run_mode(True, args, max_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+End-to-end import time per upload format on the same synthetic catalog.
+
+    python -m benchmarks.bench_import_formats --rows 1000000 --mbps 100
+    python -m benchmarks.bench_import_formats --rows 1000000 --decode-only
+
+The catalog is written as .csv, .csv.gz, .csv.zst and .parquet. For each file the benchmark
+reports its size, the time to upload it at `mbps` megabits/s, the time to decode it into CSV
+bytes (open_csv_source, no database), and unless --decode-only the time import_csv_task takes
+to load it into an empty catalog (Postgres only; BENCH- rows are deleted between runs).
+"""
+import argparse
+import gzip
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from app.database import Base, engine
+from app.services.formats import open_csv_source
+
+FORMATS = ["csv", "csv.gz", "csv.zst", "parquet"]
+
+
+def write_files(directory: Path, rows: int) -> dict:
+    csv_path = directory / "catalog.csv"
+    with open(csv_path, "w", encoding="utf-8") as f:
+        f.write("name,sku,description\n")
+        for i in range(rows):
+            f.write(f"Product {i},BENCH-{i:08d},Synthetic description for product number {i}\n")
+
+    paths = {"csv": csv_path}
+    with open(csv_path, "rb") as src, gzip.open(directory / "catalog.csv.gz", "wb", compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    paths["csv.gz"] = directory / "catalog.csv.gz"
+
+    try:
+        import zstandard
+        with open(csv_path, "rb") as src, open(directory / "catalog.csv.zst", "wb") as dst:
+            zstandard.ZstdCompressor(level=3).copy_stream(src, dst)
+        paths["csv.zst"] = directory / "catalog.csv.zst"
+    except ImportError:
+        print("zstandard not installed; skipping .csv.zst")
+
+    try:
+        import pyarrow.csv
+        import pyarrow.parquet
+        pyarrow.parquet.write_table(pyarrow.csv.read_csv(csv_path), directory / "catalog.parquet")
+        paths["parquet"] = directory / "catalog.parquet"
+    except ImportError:
+        print("pyarrow not installed; skipping .parquet")
+    return paths
+
+
+def decode(path: Path) -> float:
+    t0 = time.perf_counter()
+    with open_csv_source(path) as fh:
+        while fh.read(1024 * 1024):
+            pass
+    return time.perf_counter() - t0
+
+
+def import_once(path: Path) -> tuple[float, dict]:
+    from app.tasks.import_task import import_csv_task
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DELETE FROM products WHERE sku LIKE 'BENCH-%'")
+    t0 = time.perf_counter()
+    result = import_csv_task.apply(args=[str(path)], kwargs={"chunk_rows": 0}).get()
+    return time.perf_counter() - t0, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--mbps", type=float, default=100.0, help="Assumed upload bandwidth in megabits/s")
+    parser.add_argument("--decode-only", action="store_true", help="Skip the database import")
+    args = parser.parse_args()
+
+    if not args.decode_only:
+        if engine.dialect.name != "postgresql":
+            raise SystemExit("bench_import_formats needs a PostgreSQL DATABASE_URL (or --decode-only)")
+        Base.metadata.create_all(bind=engine)
+
+    directory = Path(tempfile.mkdtemp(prefix="bench-formats-"))
+    try:
+        paths = write_files(directory, args.rows)
+        print(f"rows={args.rows} upload={args.mbps} Mbit/s")
+        print(f"{'format':10} {'size MB':>9} {'upload s':>9} {'decode s':>9} {'import s':>9} {'total s':>9}")
+        for fmt in FORMATS:
+            if fmt not in paths:
+                continue
+            size = paths[fmt].stat().st_size
+            upload_s = size * 8 / (args.mbps * 1_000_000)
+            decode_s = decode(paths[fmt])
+            import_s = 0.0
+            if not args.decode_only:
+                import_s, result = import_once(paths[fmt])
+                assert result["total"] == args.rows, result
+            total = upload_s + (import_s or decode_s)
+            print(f"{fmt:10} {size / 1e6:9.1f} {upload_s:9.2f} {decode_s:9.2f} {import_s:9.2f} {total:9.2f}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+        if not args.decode_only:
+            with engine.begin() as conn:
+                conn.exec_driver_sql("DELETE FROM products WHERE sku LIKE 'BENCH-%'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Offset vs. keyset (cursor) latency for a deep page of crud.get_products.
+
+Point DATABASE_URL at a scratch database, then:
+
+    python -m benchmarks.bench_pagination --rows 200000 --page 1000
+
+Rows are inserted with a "BENCH-" SKU prefix and removed again at the end.
+"""
+import argparse
+import statistics
+import time
+
+from sqlalchemy import text
+
+from app import crud
+from app.database import Base, SessionLocal, engine
+from benchmarks.bench_search import seed
+
+
+def timed(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--page", type=int, default=1000)
+    parser.add_argument("--per-page", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    try:
+        with engine.begin() as conn:
+            seed(conn, 0, args.rows)
+            if engine.dialect.name == "postgresql":
+                conn.execute(text("ANALYZE products"))
+
+        db = SessionLocal()
+        try:
+            skip = (args.page - 1) * args.per_page
+            # boundary id for the same page, resolved once outside the timed section
+            prev = crud.get_products(db, skip=skip - 1, limit=1) if skip else []
+            before_id = prev[0].id if prev else None
+
+            offset_ms = timed(lambda: crud.get_products(db, skip=skip, limit=args.per_page), args.repeat)
+            keyset_ms = timed(lambda: crud.get_products(db, limit=args.per_page, before_id=before_id), args.repeat)
+        finally:
+            db.close()
+
+        print(f"rows={args.rows} page={args.page} per_page={args.per_page}")
+        print(f"offset  p50={offset_ms:8.2f}ms")
+        print(f"keyset  p50={keyset_ms:8.2f}ms")
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM products WHERE sku LIKE 'BENCH-%'"))
+
+
+if __name__ == "__main__":
+    main()
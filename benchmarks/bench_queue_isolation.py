@@ -0,0 +1,131 @@
+"""
+Webhook delivery latency on an idle system vs. while a large import runs.
+
+    docker compose up -d
+    python -m benchmarks.bench_queue_isolation --rows 2000000 --rate 20 --seconds 30 \\
+        --callback-host 172.17.0.1 --upload-dir ./uploads
+
+Needs the broker and the workers running. Starts a stub receiver, sends send_webhook tasks at a
+steady `rate` and measures enqueue -> receipt latency for `seconds`, first with nothing else
+queued, then again right after submitting import_csv_task for a generated `rows`-row catalog.
+With dedicated queues the two latency distributions should match. --shared-queue sends the
+deliveries to the imports queue instead, to show the head-of-line blocking that avoids.
+
+--callback-host must be an address of this machine the workers can reach, and --upload-dir
+the host side of the directory the workers see as UPLOAD_DIR. The BENCH- products the import
+creates are left in place, so run it against a scratch database.
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from app.services.storage import UPLOAD_DIR
+from app.tasks.celery_app import IMPORT_QUEUE, celery
+from benchmarks.catalog import write_catalog
+
+
+class Receiver:
+    """Stub webhook endpoint recording how long each payload took from enqueue to arrival."""
+
+    def __init__(self, port: int):
+        self.latencies: dict[str, list[float]] = {}
+        self._lock = threading.Lock()
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                with receiver._lock:
+                    receiver.latencies.setdefault(payload["phase"], []).append(time.time() - payload["sent"])
+                self.send_response(200)
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"ok")
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def received(self, phase: str) -> list[float]:
+        with self._lock:
+            return list(self.latencies.get(phase, []))
+
+
+def run_phase(receiver: Receiver, phase: str, url: str, rate: float, seconds: float, queue, drain: float) -> dict:
+    options = {"queue": queue} if queue else {}
+    sent = 0
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < seconds:
+        celery.send_task(
+            "app.tasks.webhook_task.send_webhook",
+            args=[url, {"phase": phase, "seq": sent, "sent": time.time()}],
+            **options,
+        )
+        sent += 1
+        time.sleep(max(0.0, sent / rate - (time.perf_counter() - t0)))
+    deadline = time.perf_counter() + drain
+    while len(receiver.received(phase)) < sent and time.perf_counter() < deadline:
+        time.sleep(0.2)
+
+    samples = sorted(receiver.received(phase))
+    n = len(samples)
+    pct = lambda q: round(samples[min(n - 1, int(n * q))] * 1000, 1) if n else None
+    stats = {"sent": sent, "received": n, "p50_ms": pct(0.5), "p95_ms": pct(0.95), "p99_ms": pct(0.99), "max_ms": pct(1.0)}
+    print(f"{phase:<14} sent={sent:<5} received={n:<5} p50={stats['p50_ms']}ms  p95={stats['p95_ms']}ms  "
+          f"p99={stats['p99_ms']}ms  max={stats['max_ms']}ms")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--rate", type=float, default=20, help="webhook deliveries per second")
+    parser.add_argument("--seconds", type=float, default=30, help="length of each phase")
+    parser.add_argument("--drain", type=float, default=120, help="max seconds to wait for stragglers after a phase")
+    parser.add_argument("--callback-host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--upload-dir", type=Path, default=UPLOAD_DIR)
+    parser.add_argument("--shared-queue", action="store_true", help="send deliveries to the imports queue")
+    parser.add_argument("--out", help="write the results as JSON")
+    args = parser.parse_args()
+
+    receiver = Receiver(args.port)
+    url = f"http://{args.callback_host}:{args.port}/hook"
+    queue = IMPORT_QUEUE if args.shared_queue else None
+
+    try:
+        idle = run_phase(receiver, "idle", url, args.rate, args.seconds, queue, args.drain)
+
+        # the import worker sees the file under UPLOAD_DIR, whatever it is called on this side
+        name = f"bench_queue_{uuid.uuid4().hex}.csv"
+        args.upload_dir.mkdir(parents=True, exist_ok=True)
+        with open(args.upload_dir / name, "w", newline="", encoding="utf-8") as f:
+            write_catalog(f, args.rows)
+        task = celery.send_task("app.tasks.import_task.import_csv_task", args=[str(UPLOAD_DIR / name)])
+        started = time.perf_counter()
+        busy = run_phase(receiver, "during_import", url, args.rate, args.seconds, queue, args.drain)
+        state = task.state
+        print(f"import {task.id} after {time.perf_counter() - started:.1f}s: {state}"
+              + (" (finished before the phase did; use more --rows)" if state in ("SUCCESS", "FAILURE") else ""))
+    finally:
+        receiver.server.shutdown()
+
+    if args.out:
+        report = {
+            "params": {"rows": args.rows, "rate": args.rate, "seconds": args.seconds, "shared_queue": args.shared_queue},
+            "scenarios": {"queue_isolation": {"idle": idle, "during_import": busy}},
+        }
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
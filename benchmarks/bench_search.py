@@ -0,0 +1,79 @@
+"""
+Search latency vs. table size for crud.get_products.
+
+Point DATABASE_URL at a scratch database, then:
+
+    python -m benchmarks.bench_search --sizes 10000 100000 1000000
+
+Rows are inserted with a "BENCH-" SKU prefix and removed again at the end.
+"""
+import argparse
+import random
+import statistics
+import string
+import time
+
+from sqlalchemy import text
+
+from app import crud, models
+from app.database import Base, SessionLocal, engine
+
+WORDS = ["steel", "widget", "cable", "bracket", "adapter", "premium", "compact", "wireless", "module", "sensor"]
+TERMS = ["wid", "sensor", "BENCH-00042", "compact module", "zzz-no-match"]
+
+
+def seed(conn, start: int, stop: int, batch: int = 10_000):
+    rng = random.Random(start)
+    for lo in range(start, stop, batch):
+        rows = []
+        for i in range(lo, min(lo + batch, stop)):
+            words = rng.sample(WORDS, 3)
+            rows.append({
+                "sku": f"BENCH-{i:08d}",
+                "name": " ".join(words).title(),
+                "description": " ".join(words + ["".join(rng.choices(string.ascii_lowercase, k=12))]),
+            })
+        conn.execute(models.Product.__table__.insert(), rows)
+
+
+def measure(repeat: int):
+    out = {}
+    db = SessionLocal()
+    try:
+        for term in TERMS:
+            samples = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                crud.get_products(db, skip=0, limit=20, search=term)
+                samples.append((time.perf_counter() - t0) * 1000)
+            samples.sort()
+            out[term] = (statistics.median(samples), samples[max(0, int(len(samples) * 0.99) - 1)])
+    finally:
+        db.close()
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    seeded = 0
+    try:
+        for size in sorted(args.sizes):
+            with engine.begin() as conn:
+                seed(conn, seeded, size)
+                if engine.dialect.name == "postgresql":
+                    conn.execute(text("ANALYZE products"))
+            seeded = size
+            for term, (p50, p99) in measure(args.repeat).items():
+                print(f"rows={size:>9} term={term!r:<18} p50={p50:8.2f}ms p99={p99:8.2f}ms")
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM products WHERE sku LIKE 'BENCH-%'"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Legacy UPDATE + INSERT vs. single-pass ON CONFLICT upsert for the COPY import (Postgres only).
+
+    python -m benchmarks.bench_upsert --rows 1000000 --new 0.2 --changed 0.1
+
+The catalog is seeded with `rows` products; the synthetic CSV then has `new` fresh SKUs,
+`changed` existing SKUs with a new name, and identical rows for the rest. Each strategy runs in
+its own transaction that is rolled back, so both see the same starting table.
+"""
+import argparse
+import io
+import random
+import time
+
+from app.database import Base, engine
+from app.tasks.import_task import TMP_TABLE_SQL, upsert_from_tmp
+
+LEGACY_SQL = [
+    """
+    UPDATE products p
+    SET name = t.name, description = t.description, sku = t.sku
+    FROM tmp_products t
+    WHERE lower(p.sku) = lower(t.sku)
+    """,
+    """
+    INSERT INTO products (sku, name, description)
+    SELECT q.sku, q.name, q.description
+    FROM (SELECT DISTINCT ON (lower(sku)) sku, name, description FROM tmp_products ORDER BY lower(sku)) q
+    WHERE NOT EXISTS (SELECT 1 FROM products p WHERE lower(p.sku) = lower(q.sku))
+    """,
+]
+
+
+def build_csv(rows: int, new: float, changed: float, seed: int = 7) -> io.StringIO:
+    rng = random.Random(seed)
+    out = io.StringIO()
+    n_new = int(rows * new)
+    for i in range(rows):
+        if i < n_new:
+            sku, name = f"BENCH-NEW-{i:08d}", f"New {i}"
+        elif rng.random() < changed / max(1 - new, 1e-9):
+            sku, name = f"BENCH-{i:08d}", f"Changed {i}"
+        else:
+            sku, name = f"BENCH-{i:08d}", f"Product {i}"
+        out.write(f"{name},{sku},desc {i}\n")
+    out.seek(0)
+    return out
+
+
+def run(strategy, data: io.StringIO):
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        cur.execute(TMP_TABLE_SQL.format(on_commit="DROP"))
+        data.seek(0)
+        cur.copy_expert("COPY tmp_products(name, sku, description) FROM STDIN WITH (FORMAT csv)", data)
+        t0 = time.perf_counter()
+        counts = strategy(cur)
+        elapsed = time.perf_counter() - t0
+        raw.rollback()
+        return elapsed, counts
+    finally:
+        raw.close()
+
+
+def legacy(cur):
+    for sql in LEGACY_SQL:
+        cur.execute(sql)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--new", type=float, default=0.2)
+    parser.add_argument("--changed", type=float, default=0.1)
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("bench_upsert needs a PostgreSQL DATABASE_URL")
+
+    Base.metadata.create_all(bind=engine)
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        seed_csv = io.StringIO("".join(f"Product {i},BENCH-{i:08d},desc {i}\n" for i in range(args.rows)))
+        cur.copy_expert("COPY products(name, sku, description) FROM STDIN WITH (FORMAT csv)", seed_csv)
+        cur.execute("ANALYZE products")
+        raw.commit()
+
+        data = build_csv(args.rows, args.new, args.changed)
+        legacy_s, _ = run(legacy, data)
+        upsert_s, counts = run(upsert_from_tmp, data)
+
+        print(f"rows={args.rows} new={args.new} changed={args.changed}")
+        print(f"legacy update+insert  {legacy_s:8.2f}s")
+        print(f"single-pass upsert    {upsert_s:8.2f}s  created/updated/unchanged={counts}")
+    finally:
+        cur.execute("DELETE FROM products WHERE sku LIKE 'BENCH-%'")
+        raw.commit()
+        raw.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Webhook fan-out: one fresh connection per POST (the old send_webhook) vs. the pooled DeliveryEngine.
+
+    python -m benchmarks.bench_webhook_fanout --receivers 20 --deliveries 2000
+
+Starts `receivers` local stub HTTP servers (one of them optionally slow) and POSTs
+`deliveries` payloads round-robin across them.
+"""
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from app.services.delivery import DeliveryEngine
+
+
+def make_handler(delay: float):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if delay:
+                time.sleep(delay)
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start_receivers(n: int, slow_delay: float):
+    servers = []
+    for i in range(n):
+        srv = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(slow_delay if i == 0 else 0))
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        servers.append(srv)
+    return servers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--receivers", type=int, default=20)
+    parser.add_argument("--deliveries", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--slow-delay", type=float, default=0.0, help="latency of receiver 0, in seconds")
+    args = parser.parse_args()
+
+    servers = start_receivers(args.receivers, args.slow_delay)
+    urls = [f"http://127.0.0.1:{s.server_address[1]}/hook" for s in servers]
+    body = json.dumps({"event": "product.updated", "events": [{"id": 1}]}).encode()
+    headers = {"Content-Type": "application/json"}
+    work = [(urls[i % len(urls)], body, headers) for i in range(args.deliveries)]
+
+    try:
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(lambda w: requests.post(w[0], data=w[1], headers=w[2], timeout=10), work))
+        fresh = time.perf_counter() - t0
+
+        engine = DeliveryEngine(max_concurrency=args.concurrency)
+        t0 = time.perf_counter()
+        results = engine.deliver_many(work)
+        pooled = time.perf_counter() - t0
+        engine.close()
+        errors = sum(isinstance(r, Exception) for r in results)
+
+        print(f"receivers={args.receivers} deliveries={args.deliveries} concurrency={args.concurrency}")
+        print(f"fresh connection per POST  {fresh:7.2f}s  {args.deliveries / fresh:8.0f} req/s")
+        print(f"pooled DeliveryEngine      {pooled:7.2f}s  {args.deliveries / pooled:8.0f} req/s  errors={errors}")
+    finally:
+        for s in servers:
+            s.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Deterministic synthetic catalog CSV for benchmarks; the same arguments always give the same bytes.
+
+    python -m benchmarks.catalog /tmp/catalog.csv --rows 1000000 --duplicates 0.05 \\
+        --case-variants 0.02 --long-descriptions 0.01 --malformed 0.001
+
+SKUs are "BENCH-<n>" so benchmark rows can be told apart from real ones. Duplicates repeat an
+earlier SKU exactly, case variants repeat one in lower case (the import treats both as the same
+product), long descriptions contain commas, quotes and newlines, and malformed rows have a
+missing or extra field.
+"""
+import argparse
+import csv
+import json
+import random
+import sys
+from typing import TextIO
+
+WORDS = ["steel", "widget", "cable", "bracket", "adapter", "premium", "compact", "wireless", "module", "sensor"]
+SKU_PREFIX = "BENCH-"
+
+
+def sku(n: int) -> str:
+    return f"{SKU_PREFIX}{n:08d}"
+
+
+def write_catalog(
+    out: TextIO,
+    rows: int,
+    seed: int = 42,
+    duplicates: float = 0.0,
+    case_variants: float = 0.0,
+    long_descriptions: float = 0.0,
+    long_chars: int = 4000,
+    malformed: float = 0.0,
+) -> dict:
+    """Write header + `rows` data rows to `out`; returns counts of what was generated."""
+    rng = random.Random(seed)
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow(["name", "sku", "description"])
+    stats = {"rows": rows, "unique_skus": 0, "duplicates": 0, "case_variants": 0, "long_descriptions": 0, "malformed": 0}
+
+    for i in range(rows):
+        words = rng.sample(WORDS, 3)
+        name = " ".join(words).title()
+        description = " ".join(words + [f"#{i}"])
+        roll = rng.random()
+
+        if stats["unique_skus"] and roll < duplicates:
+            code = sku(rng.randrange(stats["unique_skus"]))
+            stats["duplicates"] += 1
+        elif stats["unique_skus"] and roll < duplicates + case_variants:
+            code = sku(rng.randrange(stats["unique_skus"])).lower()
+            stats["case_variants"] += 1
+        else:
+            code = sku(stats["unique_skus"])
+            stats["unique_skus"] += 1
+
+        if rng.random() < long_descriptions:
+            filler = 'Long text, with "quotes",\nline breaks and commas. '
+            description = (filler * (long_chars // len(filler) + 1))[:long_chars]
+            stats["long_descriptions"] += 1
+
+        if rng.random() < malformed:
+            stats["malformed"] += 1
+            writer.writerow([name, code] if rng.random() < 0.5 else [name, code, description, "extra"])
+        else:
+            writer.writerow([name, code, description])
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="Output file, or - for stdout")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--duplicates", type=float, default=0.0, help="Fraction of rows repeating an earlier SKU")
+    parser.add_argument("--case-variants", type=float, default=0.0, help="Fraction repeating an earlier SKU in lower case")
+    parser.add_argument("--long-descriptions", type=float, default=0.0)
+    parser.add_argument("--long-chars", type=int, default=4000)
+    parser.add_argument("--malformed", type=float, default=0.0, help="Fraction of rows with a missing or extra field")
+    args = parser.parse_args()
+
+    options = {k: v for k, v in vars(args).items() if k != "path"}
+    if args.path == "-":
+        stats = write_catalog(sys.stdout, **options)
+    else:
+        with open(args.path, "w", encoding="utf-8", newline="") as f:
+            stats = write_catalog(f, **options)
+    print(json.dumps(stats), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
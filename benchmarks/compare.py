@@ -0,0 +1,63 @@
+"""
+Compare two benchmarks.suite JSON reports and flag regressions.
+
+    python -m benchmarks.compare results/base.json results/new.json --threshold 0.10
+
+Every numeric leaf whose key ends in _ms or seconds (lower is better) or per_sec (higher is
+better) is compared. Exits 1 if any of them got worse by more than `threshold`.
+"""
+import argparse
+import json
+import sys
+
+
+def leaves(node, prefix=""):
+    if isinstance(node, dict):
+        for k, v in node.items():
+            yield from leaves(v, f"{prefix}.{k}" if prefix else k)
+    elif isinstance(node, (int, float)) and not isinstance(node, bool):
+        yield prefix, float(node)
+
+
+def direction(path: str):
+    key = path.rsplit(".", 1)[-1]
+    if key.endswith("_ms") or key.endswith("seconds"):
+        return -1
+    if key.endswith("per_sec"):
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    if base.get("database") != new.get("database") or base.get("params") != new.get("params"):
+        print("warning: reports differ in database or params; the comparison may not be meaningful", file=sys.stderr)
+
+    old = dict(leaves(base.get("scenarios", {})))
+    regressions = 0
+    for path, value in leaves(new.get("scenarios", {})):
+        sign = direction(path)
+        if not sign or path not in old or old[path] == 0:
+            continue
+        change = (value - old[path]) / old[path]
+        worse = -change * sign > args.threshold
+        regressions += worse
+        flag = "REGRESSION" if worse else ("improved" if change * sign > args.threshold else "")
+        print(f"{path:60} {old[path]:12.3f} -> {value:12.3f}  {change:+7.1%}  {flag}")
+
+    print(f"{regressions} regression(s) beyond {args.threshold:.0%}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
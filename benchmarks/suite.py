@@ -0,0 +1,314 @@
+"""
+Benchmark suite: import, listing, search, single lookups, bulk delete and webhook fan-out on one
+deterministic synthetic catalog, with machine-readable JSON results.
+
+Point DATABASE_URL at a scratch PostgreSQL database (or sqlite:///... as a stand-in), then:
+
+    python -m benchmarks.suite --rows 100000 --out results/base.json
+    python -m benchmarks.suite --rows 100000 --scenarios list search lookup --out results/new.json
+    python -m benchmarks.compare results/base.json results/new.json
+
+On PostgreSQL the import scenario runs import_csv_task (COPY + upsert). SQLite has no COPY
+path, so it stands in with crud.bulk_upsert_products in batches and skips malformed rows.
+Scenarios always run in the order of SCENARIOS, so bulk_delete comes after the read ones.
+Every BENCH- product, and the outbox rows they produced, are removed at the end.
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import func, text
+
+from app import crud, models, schemas
+from app.database import Base, SessionLocal, engine
+from benchmarks.bench_search import TERMS
+from benchmarks.bench_webhook_fanout import start_receivers
+from benchmarks.catalog import SKU_PREFIX, write_catalog
+
+SCENARIOS = ["import", "list", "search", "lookup", "bulk_delete", "webhook_fanout"]
+
+
+def latency(fn, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return {
+        "n": repeat,
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "p50_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[max(0, int(len(samples) * 0.95) - 1)], 3),
+    }
+
+
+def bench_filter():
+    return func.lower(models.Product.sku).like(SKU_PREFIX.lower() + "%")
+
+
+def bench_ids(db, limit: int) -> list[int]:
+    return [pid for (pid,) in db.query(models.Product.id).filter(bench_filter()).order_by(models.Product.id).limit(limit)]
+
+
+def import_file(path: Path) -> dict:
+    if engine.dialect.name == "postgresql":
+        from app.tasks.import_task import import_csv_task
+
+        return import_csv_task.apply(args=[str(path)], kwargs={"chunk_rows": 0}).get()
+
+    # stand-in: the bulk API path, 1000 rows per request, malformed rows rejected up front
+    totals = {"created": 0, "updated": 0, "unchanged": 0, "duplicate": 0, "rejected": 0}
+    db = SessionLocal()
+    try:
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            next(reader)
+            batch = []
+            for row in reader:
+                if len(row) != 3:
+                    totals["rejected"] += 1
+                    continue
+                batch.append(schemas.ProductCreate(name=row[0], sku=row[1], description=row[2]))
+                if len(batch) == 1000:
+                    for k, v in crud.bulk_upsert_products(db, batch)["counts"].items():
+                        totals[k] = totals.get(k, 0) + v
+                    batch = []
+            if batch:
+                for k, v in crud.bulk_upsert_products(db, batch)["counts"].items():
+                    totals[k] = totals.get(k, 0) + v
+    finally:
+        db.close()
+    return totals
+
+
+def run_import(args, workdir: Path) -> dict:
+    path = workdir / "catalog.csv"
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        generated = write_catalog(
+            f,
+            args.rows,
+            seed=args.seed,
+            duplicates=args.duplicates,
+            case_variants=args.case_variants,
+            long_descriptions=args.long_descriptions,
+            malformed=args.malformed,
+        )
+    out = {"generated": generated, "bytes": path.stat().st_size}
+    for label in ("first", "repeat"):
+        t0 = time.perf_counter()
+        try:
+            result = import_file(path)
+        except Exception as exc:
+            out[label] = {"status": "failed", "error": f"{type(exc).__name__}: {exc}"[:500]}
+            break
+        seconds = time.perf_counter() - t0
+        out[label] = {"status": "ok", "seconds": round(seconds, 3), "rows_per_sec": round(args.rows / seconds, 1), "result": result}
+    return out
+
+
+def ensure_catalog(rows: int):
+    """Seed plain BENCH- rows unless an import already loaded most of them (duplicates collapse)."""
+    db = SessionLocal()
+    try:
+        have = db.query(func.count(models.Product.id)).filter(bench_filter()).scalar()
+    finally:
+        db.close()
+    if have >= rows * 0.9:
+        return
+    buf = tempfile.SpooledTemporaryFile(mode="w+", max_size=64 * 1024 * 1024)
+    write_catalog(buf, rows)
+    buf.seek(0)
+    reader = csv.reader(buf)
+    next(reader)
+    with engine.begin() as conn:
+        conn.execute(text(f"DELETE FROM products WHERE lower(sku) LIKE '{SKU_PREFIX.lower()}%'"))
+        batch = []
+        for name, code, description in reader:
+            batch.append({"name": name, "sku": code, "description": description})
+            if len(batch) == 10_000:
+                conn.execute(models.Product.__table__.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(models.Product.__table__.insert(), batch)
+
+
+def run_list(args, workdir: Path) -> dict:
+    ensure_catalog(args.rows)
+    db = SessionLocal()
+    try:
+        deep = max(0, args.rows // 2 // args.per_page)
+        ids = bench_ids(db, args.rows)
+        cursor = ids[len(ids) // 2] if ids else None
+        return {
+            "first_page": latency(lambda: crud.get_products(db, skip=0, limit=args.per_page), args.repeat),
+            "deep_offset_page": latency(lambda: crud.get_products(db, skip=deep * args.per_page, limit=args.per_page), args.repeat),
+            "deep_keyset_page": latency(lambda: crud.get_products(db, limit=args.per_page, before_id=cursor), args.repeat),
+        }
+    finally:
+        db.close()
+
+
+def run_search(args, workdir: Path) -> dict:
+    ensure_catalog(args.rows)
+    db = SessionLocal()
+    try:
+        return {term: latency(lambda: crud.get_products(db, limit=args.per_page, search=term), args.repeat) for term in TERMS}
+    finally:
+        db.close()
+
+
+def run_lookup(args, workdir: Path) -> dict:
+    ensure_catalog(args.rows)
+    db = SessionLocal()
+    try:
+        ids = bench_ids(db, args.rows)
+        skus = {p.id: p.sku for p in db.query(models.Product).filter(models.Product.id.in_(ids[:1000]))}
+        rng = random.Random(args.seed)
+        picks = [rng.choice(list(skus)) for _ in range(args.repeat)]
+        it = iter(picks * 4)
+        return {
+            "by_id": latency(lambda: crud.get_product(db, next(it)), args.repeat),
+            "by_sku": latency(lambda: crud.get_by_sku_ci(db, skus[next(it)]), args.repeat),
+            "by_id_cached_cold": latency(lambda: crud.get_product_cached(db, next(it)), args.repeat),
+            "by_id_cached_warm": latency(lambda: crud.get_product_cached(db, next(it)), args.repeat),
+        }
+    finally:
+        db.close()
+
+
+def run_bulk_delete(args, workdir: Path) -> dict:
+    ensure_catalog(args.rows)
+    db = SessionLocal()
+    try:
+        ids = bench_ids(db, args.delete_count)
+        batches = [ids[i:i + args.delete_batch] for i in range(0, len(ids), args.delete_batch)]
+        t0 = time.perf_counter()
+        for batch in batches:
+            crud.bulk_delete_products(db, batch, [])
+        seconds = time.perf_counter() - t0
+    finally:
+        db.close()
+    return {
+        "deleted": len(ids),
+        "batch": args.delete_batch,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(len(ids) / seconds, 1) if seconds else None,
+    }
+
+
+def run_webhook_fanout(args, workdir: Path) -> dict:
+    from app.services.delivery import DeliveryEngine
+
+    servers = start_receivers(args.receivers, 0)
+    try:
+        urls = [f"http://127.0.0.1:{s.server_address[1]}/hook" for s in servers]
+        body = json.dumps({"event": "product.updated", "events": [{"id": 1}]}).encode()
+        work = [(urls[i % len(urls)], body, {"Content-Type": "application/json"}) for i in range(args.deliveries)]
+        delivery = DeliveryEngine()
+        t0 = time.perf_counter()
+        results = delivery.deliver_many(work)
+        seconds = time.perf_counter() - t0
+        delivery.close()
+    finally:
+        for s in servers:
+            s.shutdown()
+    return {
+        "deliveries": args.deliveries,
+        "receivers": args.receivers,
+        "errors": sum(isinstance(r, Exception) for r in results),
+        "seconds": round(seconds, 3),
+        "deliveries_per_sec": round(args.deliveries / seconds, 1),
+    }
+
+
+RUNNERS = {
+    "import": run_import,
+    "list": run_list,
+    "search": run_search,
+    "lookup": run_lookup,
+    "bulk_delete": run_bulk_delete,
+    "webhook_fanout": run_webhook_fanout,
+}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def cleanup(first_event_id: int):
+    with engine.begin() as conn:
+        conn.execute(text(f"DELETE FROM products WHERE lower(sku) LIKE '{SKU_PREFIX.lower()}%'"))
+        conn.execute(text("DELETE FROM webhook_events WHERE id > :id"), {"id": first_event_id})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--duplicates", type=float, default=0.02)
+    parser.add_argument("--case-variants", type=float, default=0.01)
+    parser.add_argument("--long-descriptions", type=float, default=0.001)
+    parser.add_argument(
+        "--malformed", type=float, default=0.0,
+        help="Fraction of rows with a missing or extra field (counted as rejected; fail the Postgres COPY with IMPORT_VALIDATE_ROWS=0)",
+    )
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--per-page", type=int, default=20)
+    parser.add_argument("--delete-count", type=int, default=10_000)
+    parser.add_argument("--delete-batch", type=int, default=500)
+    parser.add_argument("--receivers", type=int, default=10)
+    parser.add_argument("--deliveries", type=int, default=2000)
+    parser.add_argument("--out", help="Write the JSON results here as well as to stdout")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    with engine.connect() as conn:
+        first_event_id = conn.execute(text("SELECT coalesce(max(id), 0) FROM webhook_events")).scalar()
+
+    report = {
+        "suite": "product-importer",
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "database": engine.dialect.name,
+        "params": {k: v for k, v in vars(args).items() if k != "out"},
+        "scenarios": {},
+    }
+    workdir = Path(tempfile.mkdtemp(prefix="bench-suite-"))
+    try:
+        for name in [s for s in SCENARIOS if s in args.scenarios]:
+            print(f"running {name}...", file=sys.stderr)
+            t0 = time.perf_counter()
+            report["scenarios"][name] = RUNNERS[name](args, workdir)
+            report["scenarios"][name]["wall_seconds"] = round(time.perf_counter() - t0, 3)
+    finally:
+        cleanup(first_event_id)
+        for p in workdir.iterdir():
+            p.unlink()
+        workdir.rmdir()
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+import os
+import tempfile
+
+# settings are read at import time: point the app at scratch storage before any test imports it
+_scratch = tempfile.mkdtemp(prefix="product-importer-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_scratch}/test.db")
+os.environ.setdefault("UPLOAD_DIR", os.path.join(_scratch, "uploads"))
+os.environ.setdefault("REDIS_URL", "redis://127.0.0.1:1/0")
+os.environ.setdefault("METRICS_ENABLED", "0")
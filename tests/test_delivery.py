@@ -0,0 +1,67 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.delivery import CircuitBreaker, CircuitOpenError, DeliveryEngine, endpoint_key
+
+URL = "http://hooks.test/endpoint"
+
+
+class FailingClient:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+        self.calls = 0
+
+    def post(self, *args, **kwargs):
+        self.calls += 1
+        raise self.exc
+
+
+class AsyncFailingClient(FailingClient):
+    async def post(self, *args, **kwargs):
+        return super().post(*args, **kwargs)
+
+
+def half_open_engine() -> DeliveryEngine:
+    engine = DeliveryEngine()
+    # open, with no cooldown: every call is a half-open trial
+    breaker = engine._breakers[endpoint_key(URL)] = CircuitBreaker(failures=1, cooldown=0)
+    breaker.record(False)
+    return engine
+
+
+def test_unexpected_exception_releases_half_open_trial():
+    engine = half_open_engine()
+    engine._client = FailingClient(httpx.InvalidURL("bad url"))
+
+    for _ in range(3):
+        with pytest.raises(httpx.InvalidURL):
+            engine.post(URL, b"{}")
+
+    assert engine._client.calls == 3
+    assert not engine.breaker(URL).trial_in_flight
+
+
+def test_cancelled_async_delivery_releases_half_open_trial():
+    engine = half_open_engine()
+    engine._async_client = AsyncFailingClient(asyncio.CancelledError())
+
+    async def run():
+        engine._async_slots = asyncio.Semaphore(engine.max_concurrency)
+        for _ in range(3):
+            with pytest.raises(asyncio.CancelledError):
+                await engine.apost(URL, b"{}")
+
+    asyncio.run(run())
+    assert engine._async_client.calls == 3
+    assert not engine.breaker(URL).trial_in_flight
+
+
+def test_trial_in_flight_still_blocks_concurrent_calls():
+    breaker = CircuitBreaker(failures=1, cooldown=0)
+    breaker.record(False)
+    breaker.before_call()
+
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
@@ -0,0 +1,31 @@
+import csv
+import io
+
+from app.services.row_validation import RowFilter
+
+
+def filtered(data: bytes) -> bytes:
+    return RowFilter().stream(io.BytesIO(data)).read()
+
+
+def test_crlf_upload_with_a_quoted_field_has_uniform_line_endings():
+    data = (
+        b"name,sku,description\r\n"
+        b"Plain,P-1,no quotes\r\n"
+        b'Quoted,Q-1,"with, comma"\r\n'
+        b"Plain,P-2,again\r\n"
+    )
+    out = filtered(data)
+
+    assert b"\r" not in out
+    assert list(csv.reader(io.StringIO(out.decode()))) == [
+        ["Plain", "P-1", "no quotes"],
+        ["Quoted", "Q-1", "with, comma"],
+        ["Plain", "P-2", "again"],
+    ]
+
+
+def test_stray_quote_in_unquoted_field_is_requoted():
+    out = filtered(b'name,sku,description\nWidget 5" screen,W-5,x\n')
+
+    assert list(csv.reader(io.StringIO(out.decode()))) == [['Widget 5" screen', "W-5", "x"]]
@@ -0,0 +1,56 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app import models
+from app.database import Base, SessionLocal, engine
+from app.services import events
+from app.services.subscriptions import registry
+from app.tasks import webhook_task
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(engine)
+    registry.invalidate()
+
+
+def outbox_size(db) -> int:
+    db.expire_all()
+    return db.query(models.WebhookEvent).count()
+
+
+def test_dispatch_deletes_drained_events_without_subscribers(db):
+    for i in range(3):
+        events.emit(db, events.PRODUCT_UPDATED, {"id": i})
+    db.commit()
+
+    assert webhook_task.dispatch_events.run()["events"] == 3
+    assert outbox_size(db) == 0
+
+
+def test_dispatch_sends_then_deletes(db, monkeypatch):
+    sent = []
+    monkeypatch.setattr(webhook_task.send_webhook, "delay", lambda url, payload, **kw: sent.append((url, payload)))
+    db.add(models.Webhook(url="http://hooks.test/p", event=events.PRODUCT_CREATED))
+    events.emit(db, events.PRODUCT_CREATED, {"id": 1, "sku": "A"})
+    db.commit()
+    registry.invalidate()
+
+    result = webhook_task.dispatch_events.run()
+
+    assert result["batches"] == 1
+    assert sent[0][1]["events"][0]["data"] == {"id": 1, "sku": "A"}
+    assert outbox_size(db) == 0
+
+
+def test_dispatch_prunes_rows_marked_dispatched(db):
+    db.add(models.WebhookEvent(event=events.PRODUCT_DELETED, data={"id": 9}, dispatched_at=datetime.now(timezone.utc)))
+    db.commit()
+
+    assert webhook_task.dispatch_events.run()["pruned"] == 1
+    assert outbox_size(db) == 0